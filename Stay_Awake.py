@@ -13,6 +13,9 @@
 # ----------------
 # - On start: acquires a wake lock (via wakepy) to prevent sleep.
 # - On quit: releases the lock and restores normal power management.
+# - While running: a watchdog verifies the lock is still in effect (every 30s, backing off to
+#   5 min while healthy) and re-acquires it with backoff if it was dropped underneath us; the
+#   window's “Wake lock:” line and the tray tooltip show the current state.
 # - Useful diagnostics: in a console, run `powercfg -requests` to see any blockers.
 #
 # OS & Python & Dependencies
@@ -33,7 +36,19 @@
 #
 # Command-line Usage
 # ------------------
-#   Stay_Awake.py [--icon PATH] [--for DURATION | --until "YYYY-MM-DD HH:MM:SS"]
+#   Stay_Awake.py [--icon PATH] [--for DURATION | --until "YYYY-MM-DD HH:MM:SS"] [--while-pid PID ...]
+#                 [--while-dir-nonempty PATH ...] [--while-file-growing PATH ...]
+#                 [--while-connections PORT[,PORT] ...] [--settle DURATION]
+#                 [--heartbeat DURATION --heartbeat-file PATH] [--journal [PATH]]
+#                 [--metrics-file PATH] [--metrics-port PORT] [--metrics-interval DURATION]
+#                 [--profile [DURATION] [--profile-file PATH] [--profile-memory]]
+#                 [--no-gui | --diagnostics] [--tray-progress] [--run -- CMD [ARGS...]]
+#   Stay_Awake.py --resume [--journal PATH]
+#   Stay_Awake.py --serve [--port PORT] [--journal [PATH]] [--resume]
+#   Stay_Awake.py --lease NAME [--for DURATION | --until "..."] [--heartbeat DURATION [--heartbeat-file PATH]]
+#                 | --beat NAME | --release NAME | --leases  [--port PORT]
+#   Stay_Awake.py --lease-dir PATH [--node NAME]
+#   Stay_Awake.py --lease-dir PATH --lease NAME (--for DURATION | --until "...") [--nodes NAME[,NAME]] | --release NAME | --leases
 #
 # --icon PATH
 #   - Overrides the built-in image for both the window and tray icon.
@@ -79,6 +94,154 @@
 #   - Implementation detail: we convert the target to a local epoch, then re-ceil
 #     from “now” again immediately before arming the timer to minimize drift.
 #
+# --while-pid PID   (repeatable)
+#   - Stay awake while the given process(es) are running; quit once EVERY listed PID has exited.
+#       --while-pid 4321
+#       --while-pid 4321 --while-pid 8765
+#   - Event-driven, no polling loop: the watcher thread blocks in the OS until the processes exit
+#       * Windows:   OpenProcess(SYNCHRONIZE) + WaitForMultipleObjects(bWaitAll=TRUE)
+#       * Linux:     pidfd_open() + poll()
+#       * macOS/BSD: kqueue EVFILT_PROC / NOTE_EXIT
+#     (a coarse liveness probe every PID_FALLBACK_POLL_SECS is only used when none of these work)
+#   - Quits through the same path as the auto-quit timer.
+#   - Combines with --for / --until, which then act as an upper bound.
+#   - Each PID must exist at startup (and must not be Stay_Awake itself).
+#
+# --while-dir-nonempty PATH   (repeatable)
+#   - Stay awake while the directory has any entries (e.g. a spool/queue folder); quit once it
+#     has stayed empty for the --settle time.
+#
+# --while-file-growing PATH   (repeatable)
+#   - Stay awake while the file is still being written; quit once its size/mtime has not changed
+#     for the --settle time.
+#
+# --while-connections PORT[,PORT]   (repeatable)
+#   - Stay awake while ESTABLISHED TCP sessions exist on these LOCAL ports (e.g. 22 for SSH,
+#     3389 for RDP); quit once there have been none for the --settle (grace) time.
+#       --while-connections 3389
+#       --while-connections 22,3389 --settle 10m
+#   - Windows: GetExtendedTcpTable (IPv4 + IPv6). Linux: /proc/net/tcp and /proc/net/tcp6, read
+#     line by line and abandoned at the first match.
+#   - Adaptive check interval: starts at CONN_CHECK_MIN_SECS and doubles (up to CONN_CHECK_MAX_SECS)
+#     while sessions stay up; drops back to the minimum once they're gone, to time the grace period.
+#
+# --settle DURATION   (default 1m; same syntax as --for; 1s .. 366d)
+#   - How long a --while-dir-nonempty / --while-file-growing / --while-connections condition must
+#     stay "done" before it clears (the grace period).
+#
+#   Filesystem conditions are event-driven, not tight polling loops:
+#       * Linux:   inotify (one watch per path; bursts of events are coalesced, FS_EVENT_COALESCE_SECS)
+#       * Windows: FindFirstChangeNotification on the directory (or the file's folder)
+#       * Elsewhere / if those fail: cheap stat sampling every FS_STAT_SAMPLE_SECS
+#   Emptiness checks read at most ONE directory entry, so huge directories cost the same as small ones.
+#   Each PATH must exist at startup. All hold conditions combine: quit once EVERY one has cleared.
+#
+# --run -- CMD [ARGS...]
+#   - Acquire the wake lock, start CMD as a child process, and release the lock the moment
+#     the child exits; Stay_Awake then exits with the CHILD's exit code.
+#       Stay_Awake.py --run -- robocopy C:\src D:\dst /MIR
+#       Stay_Awake.py --no-gui --run -- python render.py --frames 1-500
+#   - Everything after --run (an optional leading "--" is dropped) is the child command line,
+#     so it must be the LAST Stay_Awake option.
+#   - The child inherits stdin/stdout/stderr, so its output streams straight through (no buffering).
+#   - Lock time matches the real work (no padded --until estimate); --for/--until still act as
+#     an upper bound, in which case the child is left running.
+#   - Shell built-ins need a shell: --run -- cmd /c "dir /s"
+#
+# --no-gui
+#   - No window and no tray icon; console only. Quits on Ctrl+C or when the auto-quit timer /
+#     hold conditions (--while-pid, --run, ...) say so.
+#
+# --diagnostics
+#   - Adds rows under the countdown table: CPU time (and % over the last 10 minutes), RSS,
+#     thread count with names, and measured timer wakeups per hour (countdown ticks,
+#     watchdog checks, metrics writes and these refreshes themselves).
+#   - Refreshed every 5s ONLY while the window is viewable; minimized to the tray it costs nothing.
+#
+# --tray-progress
+#   - With --for/--until: a ring around the tray icon fills up as the run passes. The ring is
+#     quantized to TRAY_PROGRESS_STEPS (64) steps, so the icon is recomposed (one Tk timer
+#     wakeup, at exactly the step boundary) at most 64 times per run, whatever its length.
+#
+# --log-level LEVEL / --log-file PATH
+#   - Messages go through a queue to a background writer thread, so a slow or blocked console
+#     never stalls the window, the countdown or shutdown. LEVEL: DEBUG, INFO (default), WARNING, ERROR.
+#   - --log-file also writes them (with time, level and thread) to PATH, rotated at 1 MB with
+#     3 backups; the way to see them under pythonw / the --noconsole EXE.
+#
+# --metrics-file PATH / --metrics-port PORT / --metrics-interval DURATION
+#   - Prometheus text-format metrics for fleet monitoring: lock held (and mode), seconds held,
+#     auto-quit time / remaining, countdown ticks, timer wakeups, watchdog checks, lock
+#     failures / re-acquires, RSS, CPU time and thread count.
+#   - --metrics-file rewrites PATH atomically every DURATION (default 2m, at least 60s), e.g.
+#     into a node_exporter / windows_exporter textfile collector folder; one last write on exit
+#     shows the lock released. --metrics-port serves http://127.0.0.1:PORT/metrics (localhost
+#     only), rendered per scrape, so it adds no timer wakeups at all.
+#   - Collection only reads counters the app already keeps (~50 us); no extra Tk timers.
+#
+# --profile [DURATION] [--profile-file PATH] [--profile-memory]
+#   - For "Stay_Awake uses CPU" reports: profiles (cProfile, all threads; main thread only
+#     before Python 3.12) from argument parsing through startup plus DURATION of steady state
+#     (default 10m), then keeps running unprofiled. Quitting earlier writes the profile at exit
+#     instead (as does --no-gui before Python 3.12: only the main thread can end its profile).
+#   - Writes PATH (pstats; default Stay_Awake-<time>-<pid>.prof in the temp folder) and
+#     PATH.txt: CPU share, top functions by own / cumulative time, the expected hot spots
+#     (_load_eye_image, _pad_to_square_edge_stretch, _schedule_countdown_tick, tray menu
+#     callbacks, ...) and, with --profile-memory, the tracemalloc peak and top allocation sites.
+#       Stay_Awake.py --for 2h --profile 15m --profile-memory
+#
+# --heartbeat DURATION --heartbeat-file PATH
+#   - For jobs that launch Stay_Awake with a generous --for: the job touches PATH every so
+#     often, and if it goes DURATION without a touch (the job crashed or hung) Stay_Awake quits
+#     through the normal cleanup path instead of holding the machine awake for the full --for.
+#       Stay_Awake.py --for 8h --heartbeat 5m --heartbeat-file C:\jobs\render.alive
+#   - One stat() per DURATION (not per touch). Startup counts as a beat. DURATION >= 5s.
+#
+# --journal [PATH] / --resume
+#   - --journal keeps a tiny crash-safe journal of the deadline (local epoch), wake mode and (with
+#     --serve) the open leases. Written atomically (temp file + fsync + rename), only when that
+#     state changes (lease churn is coalesced to at most one write per second), and deleted on a
+#     clean exit, so only a killed/crashed instance leaves one behind.
+#     Default PATH: %LOCALAPPDATA%\Stay_Awake\ (Windows) or ~/.local/state/stay_awake/ (elsewhere).
+#     One instance per journal: while the PID that wrote it is alive, another --journal or
+#     --resume on the same PATH is refused (exit 2); give a second instance its own PATH.
+#   - --resume picks it up: re-acquires the lock and re-arms from the STORED epoch, without
+#     parsing or re-validating the original --for/--until (other options are ignored).
+#       Stay_Awake.py --until "2026-01-02 06:00:00" --journal      (killed at 02:00 ...)
+#       Stay_Awake.py --resume                                     (... still quits at 06:00)
+#   - Nothing to resume (no journal, deadline passed, or it was only held by --while-*/--run,
+#     whose processes belonged to the dead instance) exits 0.
+#
+# --serve / --lease NAME / --beat NAME / --release NAME / --leases   [--port PORT]
+#   - One lease server holds ONE wake lock for many clients (scripts, scheduled jobs, other
+#     machines' sessions, ...): it is held while any named lease is open and released when
+#     the last one closes or expires.
+#       Stay_Awake.py --serve                           (console only; Ctrl+C to stop)
+#       Stay_Awake.py --lease nightly-backup --for 3h   (opens/renews; exits immediately)
+#       Stay_Awake.py --release nightly-backup
+#       Stay_Awake.py --leases
+#   - Each lease has its own --for/--until (same syntax and bounds); none = until released.
+#     Re-opening a name replaces its deadline.
+#   - --lease NAME --heartbeat DURATION: the lease also ends once the client goes DURATION without
+#     a "Stay_Awake.py --beat NAME" (or, with --heartbeat-file, without touching that file).
+#     A beat is O(1) (a timestamp; no timer work); heartbeat expiries are checked in 1s batches.
+#   - All deadlines share a min-heap and ONE expiry thread that sleeps until the earliest,
+#     so thousands of leases cost O(log n) per operation and no per-lease timers.
+#   - Localhost only (127.0.0.1, default port 47733; line-delimited JSON, see stay_awake/leases.py).
+#
+# --lease-dir PATH [--node NAME]
+#   - Several machines (e.g. render nodes) stay awake while any job on a shared filesystem is in
+#     flight: each node watches PATH (a folder on a shared mount) and holds its wake lock while any
+#     unexpired NAME.lease file there targets it (--node defaults to the host name).
+#       Stay_Awake.py --lease-dir \\nas\renders\leases                        (on every node)
+#       Stay_Awake.py --lease-dir \\nas\renders\leases --lease shot042 --for 6h --nodes render01,render02
+#       Stay_Awake.py --lease-dir \\nas\renders\leases --release shot042
+#   - Lease files are plain text ("until = YYYY-MM-DD HH:MM:SS" with --until rules, plus "epoch =",
+#     which wins when present, and an optional "nodes =" list); written via temp file + rename.
+#   - Incremental: one stat() of the folder per 15s; the folder is only listed again when its
+#     modification time changes, and only changed files are re-read (a local index file caches
+#     the parsed leases, also across restarts). Expiry is the lease table's timer, not a rescan.
+#
 # Mutually exclusive:
 #   --for and --until cannot be used together (the CLI enforces this).
 #
@@ -92,6 +255,8 @@
 #         - ETA line (“Auto-quit at: …”)
 #         - Countdown line (“Time remaining: DDDd HH:MM:SS”)
 #         - Cadence line (“Timer update cadence: HH:MM:SS” — only updates when cadence changes)
+#     * If hold conditions are active (e.g. --while-pid):
+#         - “Awake while: …” line listing the conditions still holding the machine awake
 # - Title-bar minimize (“_”) maps to “minimize to system tray”.
 # - Right-click tray icon menu includes “Show Window” / “Hide Window” / “Quit”.
 # - Window close (“X”) performs a graceful full exit.
@@ -118,24 +283,60 @@
 # Exit Codes
 # ----------
 # - 0 on normal exit.
-# - 2 on CLI validation errors (bad --for/--until, out of bounds, invalid local time).
+# - 2 on CLI validation errors (bad --for/--until/--settle, out of bounds, invalid local time, unknown --while-pid,
+#   missing --while-dir-nonempty/--while-file-growing path, bad --while-connections port),
+#   or when the --run command cannot be started.
+# - With --run: the child's exit code (128+N if the child was killed by signal N on POSIX).
+# - --lease/--beat/--release/--leases: 1 if no lease server is running, 2 if it rejected the request
+#   (--beat: also when the lease has already expired).
 #
 # Maintenance Pointers (search for these names)
 # ---------------------------------------------
-# - Duration parser:              parse_duration_to_seconds()
-# - Local time parser (DST-safe): parse_until_to_epoch()
-# - Auto-quit bounds:             MIN_AUTO_QUIT_SECS / MAX_AUTO_QUIT_SECS
-# - Image sizing cap:             MAX_DISPLAY_PX
+# - Duration parser:              parse_duration_to_seconds()            (stay_awake/core.py)
+# - Local time parser (DST-safe): parse_until_to_epoch()                 (stay_awake/core.py)
+# - Auto-quit bounds:             MIN_AUTO_QUIT_SECS / MAX_AUTO_QUIT_SECS (stay_awake/core.py)
+# - Wake lock lifecycle:          WakeLock / Hold / hold()               (stay_awake/core.py)
+# - Image sizing cap:             MAX_DISPLAY_PX (also caps decoding: _open_image_reduced()) / MAX_SOURCE_PIXELS
+# - Window image without Pillow:  _tk_native_window_image() / _is_presized_png() / _import_pil()
+# - Window image resizing:        WINDOW_IMAGE_* / _on_window_configure() / _fit_window_image()
+# - Image file hot reload:        FileChangeWatcher / _reload_image_source()  (stay_awake/filewatch.py)
+# - Tray progress ring:           TRAY_PROGRESS_* / _tray_icon_shown() / _schedule_tray_progress()
+# - Icon file lookup:             IMAGE_CANDIDATES / _usable_icon_candidates() (probe cache in the rendition cache folder)
+# - Tray icon DPI / renditions:   TRAY_ICON_SIZES / WindowsDpiSource / FakeDpiSource (stay_awake/dpi.py)
+# - Rendition disk cache:         RenditionCache / RENDITION_FORMAT / _load_cached_renditions() (stay_awake/renditions.py)
 # - Cadence configuration:        COUNTDOWN_CADENCE
 # - Snap-to-boundary threshold:   HARD_CADENCE_SNAP_TO_THRESHOLD_SECONDS
 # - Hidden-window backoff:        HIDDEN_CADENCE_MIN_MS / HIDDEN_BACKOFF_UNTIL_SECS
+# - Hold-condition threads:       Stay_AwakeTrayApp._start_hold_conditions()
+# - Wake-lock backends / metrics: WakeBackend / WakeLock.stats()         (stay_awake/backends.py, core.py)
+# - Lock health watchdog:         WakeLockWatchdog / WATCHDOG_* constants (stay_awake/watchdog.py)
+# - Process-exit waiter:          wait_for_pids_exit() / PID_FALLBACK_POLL_SECS          (stay_awake/conditions.py)
+# - Filesystem conditions:        wait_while_dir_nonempty() / wait_while_file_growing()  (stay_awake/conditions.py)
+# - TCP session condition:        wait_while_connections() / CONN_* constants            (stay_awake/conditions.py)
+# - Lease server (--serve):       LeaseTable / LeaseServer / lease_request()             (stay_awake/leases.py)
+# - Shared lease directory:       LeaseDirWatcher / write_lease_file() / LEASE_DIR_*    (stay_awake/leasedir.py)
+# - Logging (queue + writer):     start_logging() / get_logger()          (stay_awake/logsetup.py)
+# - Profiling (--profile):        SessionProfiler / PROFILE_WATCH         (stay_awake/profiling.py)
+# - Metrics export:               MetricsExporter / Stay_AwakeTrayApp._collect_metrics()  (stay_awake/metrics.py)
+# - Crash-safe journal:           DeadlineJournal / Stay_AwakeTrayApp._record_journal()  (stay_awake/journal.py)
+# - Heartbeats:                   wait_for_missed_heartbeat() / Lease.expiry() / HEARTBEAT_* (conditions.py, leases.py)
+#
+# Library API (no GUI)
+# --------------------
+# - The GUI-free core lives in the stay_awake/ package next to this script and can be used
+#   in-process from other Python programs (no tkinter / PIL / pystray imported):
+#       import stay_awake
+#       with stay_awake.hold(for_="2h"):           # --for semantics; bound is an upper limit
+#           run_the_batch()
+#       with stay_awake.hold_until(target_epoch):  # --until semantics
+#           run_the_batch()
 #
 # Troubleshooting
 # ---------------
 # - If the tray icon doesn’t appear immediately, give it a second; the icon runs on a
 #   background thread. If Windows Explorer had issues, restarting Explorer can help.
 # - If the window doesn’t show an image, ensure a valid image source exists (see sourcing
-#   order above); check console output for “Loading icon from file: …”.
+#   order above); check console output (or --log-file) for “Loading icon from file: …”.
 # - To verify sleep blockers: `powercfg -requests` (look for this process under SYSTEM).
 #
 # Packaging (PyInstaller)
@@ -241,32 +442,89 @@
 #
 # =============================================================================
 
+from __future__ import annotations   # Image.Image annotations: Pillow is imported on first use
+
 import sys
 import os
 import time
-from datetime import datetime
 import ctypes
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from wakepy import keep
 import pystray
 from pystray import MenuItem as item
-from PIL import Image, ImageDraw, ImageTk, ImageOps
 import atexit
 import signal
 import base64
 import io
 from pathlib import Path
 import argparse
-import re  # for --for and --until duration parsing
+import logging
 import math
-import traceback
+import collections
+import hashlib
+import json
+import subprocess  # for --run
+from collections.abc import Callable
+# GUI-free core (also importable on its own: `import stay_awake`)
+from stay_awake.core import (
+    WakeLock,
+    check_for_seconds,
+    check_until_epoch,
+    format_dhms,
+    parse_duration_to_seconds,
+    parse_until_to_epoch,
+    MAX_AUTO_QUIT_SECS,
+)
+from stay_awake.watchdog import WakeLockWatchdog
+from stay_awake.leases import (LEASE_SERVER_HOST, LEASE_SERVER_PORT, LeaseServer, LeaseTable, forget_lease_key,
+                               lease_request, load_lease_key, save_lease_key)
+from stay_awake.journal import DeadlineJournal, default_journal_path
+from stay_awake.leasedir import LEASE_FILE_SUFFIX, LeaseDirWatcher, parse_lease_text, remove_lease_file, write_lease_file
+from stay_awake.conditions import (
+    FS_SETTLE_DEFAULT_SECS,
+    check_heartbeat_secs,
+    default_tcp_connection_source,
+    parse_port_list,
+    pid_exists,
+    wait_for_missed_heartbeat,
+    wait_for_pids_exit,
+    wait_while_connections,
+    wait_while_dir_nonempty,
+    wait_while_file_growing,
+)
+from stay_awake.metrics import METRICS_INTERVAL_DEFAULT_SECS, METRICS_INTERVAL_MIN_SECS, Metric, MetricsExporter, process_cpu_seconds, process_rss_bytes
+from stay_awake.dpi import TRAY_ICON_SIZES, default_dpi_source, tray_icon_size
+from stay_awake.profiling import PROFILE_DEFAULT_SECS, SessionProfiler, default_profile_path
+from stay_awake.renditions import RenditionCache, content_digest, file_digest, rendition_key
+from stay_awake.filewatch import FileChangeWatcher
+from stay_awake.logsetup import LOG_FILE_BACKUPS, LOG_FILE_MAX_BYTES, get_logger, start_logging
+
+# Pillow: imported on first use by _import_pil(). A pre-sized PNG window image is loaded by
+# Tk itself (Stay_AwakeTrayApp._tk_native_window_image()), so the window can be up before
+# Pillow is imported at all; the tray icon (pystray wants a PIL image) imports it later.
+Image = ImageDraw = ImageTk = None
+
+def _import_pil() -> None:
+    global Image, ImageDraw, ImageTk
+    if Image is None:
+        from PIL import Image as pil_image, ImageDraw as pil_draw, ImageTk as pil_tk
+        ImageDraw, ImageTk = pil_draw, pil_tk
+        Image = pil_image     # last: other threads test Image
+
+# All console/file output goes through a queue to a background writer (stay_awake/logsetup.py),
+# so a slow or blocked stdout never stalls the Tk thread, cleanup() or quit_application().
+log = get_logger("app")
 
 # --------------------------------------------------------------------
 # Config
 # --------------------------------------------------------------------
 MAX_DISPLAY_PX = 512  # max long-side pixels for images in windows
+MAX_SOURCE_PIXELS = 25_000_000  # larger --icon / Stay_Awake_icon.* files are not decoded (see _open_image_reduced())
+# Pixels counted against MAX_SOURCE_PIXELS per decoded pixel: Pillow decodes WebP through
+# libwebp's own full-size canvases first (~16 bytes per pixel at peak, vs ~4 for the rest)
+SOURCE_PIXEL_COST = {"WEBP": 4}
+RENDITION_FORMAT = 1  # bump when the window/tray pixel pipeline changes (invalidates the rendition cache)
 
 APP_BLURB = (
     "WEDJAT  :  THE EYE OF HORUS\n"
@@ -276,27 +534,6 @@ APP_BLURB = (
     "Closing this app re-allows sleep & hibernation."
 )
 
-# For decoding --for days minutes, seconds:
-_RE_DURATION_TOKEN = re.compile(r'\s*(\d+)\s*([dhmsDHMS]?)')
-
-# For decoding --until relaxed local timestamp:
-# Accepts: "YYYY-MM-DD HH:MM:SS" with optional spaces and 1–2 digit M/D/h/m/s.
-# Examples:
-#   2025-01-02 23:22:21
-#   2025- 1- 2 03:02:01
-#   2025-1-2 3:2:1
-_RE_UNTIL_TOKEN = re.compile(
-    r"""^\s*
-        (\d{4})\s*-\s*       # year
-        (\d{1,2})\s*-\s*     # month (1..12)
-        (\d{1,2})\s+         # day   (1..31; validated later)
-        (\d{1,2})\s*:\s*     # hour  (0..23)
-        (\d{1,2})\s*:\s*     # min   (0..59)
-        (\d{1,2})\s*         # sec   (0..59)
-        $""",
-    re.VERBOSE,
-)
-
 # Candidate image file names (same folder as this script/EXE) in this order
 IMAGE_CANDIDATES = [
     "Stay_Awake_icon.png",
@@ -335,11 +572,23 @@ HIDDEN_BACKOFF_UNTIL_SECS    = 60
 # then fire appropriately so timer next appears at a multiple of an update interval for the current cadence
 HARD_CADENCE_SNAP_TO_THRESHOLD_SECONDS = 60 
 #
-# Bounds applied to BOTH --for and --until:
-# - must be at least MIN_AUTO_QUIT_SECS seconds in the future
-# - must be no more than MAX_AUTO_QUIT_SECS seconds in the future
-MIN_AUTO_QUIT_SECS = 10                     # at least 10s
-MAX_AUTO_QUIT_SECS = 366 * 24 * 60 * 60     # ≤ 366 days
+# --diagnostics rows (CPU, RSS, threads, wakeups/hour): refresh interval while the window is
+# viewable (no refreshes at all while it's hidden), and the window the wakeup rate is measured over
+DIAGNOSTICS_REFRESH_MS       = 5_000
+DIAGNOSTICS_RATE_WINDOW_SECS = 600
+#
+# Window image follows the window size (never above MAX_DISPLAY_PX): resize events are
+# debounced, the long side is rounded down to a bucket, and the last few sizes are kept
+WINDOW_PADDING_PX            = 16
+WINDOW_IMAGE_DEBOUNCE_MS     = 150
+WINDOW_IMAGE_BUCKET_PX       = 32
+WINDOW_IMAGE_MIN_PX          = 64
+WINDOW_IMAGE_LRU_SIZE        = 6
+#
+# --tray-progress: the ring advances in this many steps per run (one icon update each)
+TRAY_PROGRESS_STEPS          = 64
+TRAY_PROGRESS_TRACK_RGBA     = (0, 0, 0, 140)
+TRAY_PROGRESS_FILL_RGBA      = (46, 204, 113, 255)
 
 # --------------------------------------------------------------------
 # PASTE YOUR BASE64 HERE (leave empty to use file/CLI fallback)
@@ -21588,18 +21837,43 @@ EYE_IMAGE_BASE64 = (
         )
 
 class Stay_AwakeTrayApp:
-    def __init__(self, icon_override_path: str | None = None, auto_quit_seconds: int | None = None, auto_quit_target_epoch: float | None = None):
+    def __init__(self, icon_override_path: str | None = None, auto_quit_seconds: int | None = None, auto_quit_target_epoch: float | None = None,
+                 hold_conditions: list[tuple[str, Callable[[], None]]] | None = None,
+                 run_command: list[str] | None = None, show_gui: bool = True, wake_backend=None,
+                 heartbeat: tuple[str, int] | None = None, journal=None,
+                 metrics: tuple[str | None, int | None, int] | None = None,
+                 show_diagnostics: bool = False, dpi_source=None, rendition_cache=None,
+                 tray_progress: bool = False):
         # Core state
         self.running = False
         self.icon = None
         self.main_window = None
-        self.keep_awake_context = None
+        self.wake_lock = None                 # stay_awake.core.WakeLock while running
+        self.wake_backend = wake_backend      # stay_awake.backends.* (None = wakepy); FakeBackend for tests
+        self._watchdog = None                 # stay_awake.watchdog.WakeLockWatchdog while running
+        self._lock_state_value = None         # ttk.Label for the wake-lock health line
         self.window_visible = True
+        self.show_gui = show_gui              # False with --no-gui: no window, no tray icon
+        self.exit_code = 0                    # process exit code (the child's with --run)
+        self._quit_event = threading.Event()  # set once quit_application() has cleaned up
     
         # Tk/PIL caches to prevent GC & repeated work
         self._cached_photo_main = None
         self._pil_base_image = None   # original PIL image cache
-        self._tray_icon_image = None  # small tray PIL image cache
+        self._source_digest = None    # content digest of the bytes _pil_base_image came from
+        self._source_path = None      # image file in use (--icon / Stay_Awake_icon.*); None: embedded/drawn
+        self._icon_watcher = None     # stay_awake.filewatch.FileChangeWatcher on _source_path
+        self.image_reloads = 0
+        self._window_image = None     # window rendition (long side <= MAX_DISPLAY_PX)
+        self._tray_icon_image = None  # small tray PIL image cache (the rendition currently shown)
+        self._tray_icons: dict[int, Image.Image] = {}   # size -> rendition (TRAY_ICON_SIZES)
+        self._renditions_lock = threading.Lock()        # guards the renditions above and the decode
+        self._renditions_checked = False                # disk cache looked up (once)
+        self._renditions_from_cache = False
+        # Per-user disk cache of the final window/tray pixels (stay_awake.renditions)
+        self.rendition_cache = rendition_cache if rendition_cache is not None else RenditionCache()
+        # Taskbar DPI + change notifications (stay_awake.dpi; FakeDpiSource for tests)
+        self.dpi_source = dpi_source if dpi_source is not None else default_dpi_source()
     
         # CLI image override
         self.icon_override_path = icon_override_path
@@ -21617,6 +21891,53 @@ class Stay_AwakeTrayApp:
         self._countdown_after_id = None      # Tk after() handle so we can cancel/reschedule
         self._cadence_value = None           # ttk.Label for “Timer update frequency”
         self._last_cadence_s = None          # last cadence shown (int seconds), to avoid churn
+
+        # Hold conditions (--while-pid, ...): (description, blocking wait callable) pairs.
+        # The app quits once EVERY condition's wait has returned (they act like "stay awake while ...").
+        self.hold_conditions = list(hold_conditions or [])
+        self._hold_pending: dict[int, str] = {}   # index -> description of conditions still holding
+        self._hold_lock = threading.Lock()
+        self._hold_value = None              # ttk.Label for “Awake while:”
+
+        # --run child command (held awake for exactly its lifetime)
+        self.run_command = list(run_command or [])
+        self._child_proc = None              # subprocess.Popen once started
+
+        # --heartbeat / --heartbeat-file: (path, timeout secs); quit once the client stops touching it
+        self.heartbeat = heartbeat
+
+        # --journal / --resume: stay_awake.journal.DeadlineJournal (None = no journal)
+        self.journal = journal
+
+        # --metrics-file / --metrics-port: (file path, port, interval secs), and the counters it exports
+        self.metrics = metrics
+        self._metrics_exporter = None         # stay_awake.metrics.MetricsExporter while running
+        self._started_epoch = time.time()
+        self._held_since = None               # monotonic() when the wake lock was taken
+        self.countdown_ticks = 0              # _schedule_countdown_tick() runs (Tk timer wakeups)
+
+        # --diagnostics: resource rows under the countdown table (refreshed only while viewable)
+        self.show_diagnostics = show_diagnostics
+        self.diagnostics_refreshes = 0        # _schedule_diagnostics_tick() runs (Tk timer wakeups)
+        self._diag_values = {}                # row key -> ttk.Label (value cell)
+        self._diag_after_id = None            # Tk after() handle
+        self._diag_samples = collections.deque()   # (monotonic, CPU secs, timer wakeups) for the rates
+
+        # Window image sizing (follows the window; see WINDOW_IMAGE_*)
+        self._image_label = None
+        self._window_photos = collections.OrderedDict()   # long side -> PhotoImage, LRU order
+        self._window_photo_side = None        # long side currently shown
+        self._window_image_full = None        # (w, h) of the full-size (MAX_DISPLAY_PX) image
+        self._image_resize_after_id = None    # Tk after() handle (debounce)
+        self.image_resamples = 0              # LANCZOS resizes done for the window image
+
+        # --tray-progress: ring over the tray rendition, recomposed once per TRAY_PROGRESS_STEPS step
+        self.tray_progress = tray_progress
+        self._auto_quit_total_secs = None     # length of the armed auto-quit run
+        self._tray_progress_composite = None  # (base rendition, step, composed image)
+        self._tray_progress_after_id = None   # Tk after() handle
+        self.tray_progress_ticks = 0          # _schedule_tray_progress() runs (Tk timer wakeups)
+        self.tray_progress_updates = 0        # icons composed
     
         # Signal/cleanup hooks
         atexit.register(self.cleanup)
@@ -21636,48 +21957,202 @@ class Stay_AwakeTrayApp:
         except Exception:
             return Path(os.getcwd())
 
+    @staticmethod
+    def _base64_text() -> str:
+        return "".join(EYE_IMAGE_BASE64) if isinstance(EYE_IMAGE_BASE64, (list, tuple)) else str(EYE_IMAGE_BASE64 or "")
+
     def _try_decode_base64(self):
         """Return PIL.Image from base64 or None if not decodable/empty."""
-        raw = "".join(EYE_IMAGE_BASE64) if isinstance(EYE_IMAGE_BASE64, (list, tuple)) else str(EYE_IMAGE_BASE64 or "")
+        raw = self._base64_text()
         if not raw.strip():
             return None
         try:
-            return Image.open(io.BytesIO(base64.b64decode(raw))).convert("RGBA")
+            img = Image.open(io.BytesIO(base64.b64decode(raw))).convert("RGBA")
+            self._source_digest = content_digest(raw.encode("ascii"))
+            return img
         except Exception as e:
-            print(f"Base64 image decode failed, will try file fallback: {e}", flush=True)
+            log.warning("Base64 image decode failed, will try file fallback: %s", e)
             return None
 
+    @staticmethod
+    def _open_image_reduced(path, max_px: int = MAX_DISPLAY_PX) -> Image.Image:
+        """
+        Open an image file decoded no larger than needed, converted to RGBA last.
+        Everything downstream (window <= max_px, tray <= 64px) only needs a long side of
+        max_px, so a big source is shrunk by an integer factor that keeps it >= max_px:
+          - JPEG: draft() makes the decoder itself scale by 1/2, 1/4 or 1/8 (DCT scaling),
+            so the full-size pixels never exist
+          - others: reduce() (box filter) right after decoding, still in the file's own mode;
+            P / PA / I;16 have no meaningful reduce(), so they get a NEAREST resize in their
+            own mode (palette indices stay indices) and 1-bit goes to L first (same memory)
+        Then RGBA, on the small image. The final LANCZOS to max_px happens later, as before.
+        A file that would still decode to more than MAX_SOURCE_PIXELS (weighted by
+        SOURCE_PIXEL_COST) raises ValueError
+        before any pixel is decoded (the caller falls back to the next image source), so
+        peak memory is bounded by that cap, not by whatever file --icon points at.
+        """
+        im = Image.open(path)
+        w, h = im.size
+        factor = max(w, h) // max_px
+        if factor >= 2 and im.format == "JPEG":
+            im.draft(im.mode, (-(-w // factor), -(-h // factor)))   # ceil: stays >= max_px
+            w, h = im.size
+            factor = max(w, h) // max_px
+        cost = SOURCE_PIXEL_COST.get(im.format, 1)
+        if w * h * cost > MAX_SOURCE_PIXELS:
+            im.close()
+            raise ValueError(f"{w}x{h} is over the {MAX_SOURCE_PIXELS / cost / 1_000_000:g} megapixel limit for {im.format} files")
+        if factor >= 2:
+            if im.mode == "1":
+                im = im.convert("L")
+            if im.mode in ("L", "LA", "RGB", "RGBA", "RGBa", "CMYK", "I", "F"):
+                im = im.reduce(factor)
+            else:
+                im = im.resize((-(-w // factor), -(-h // factor)), Image.NEAREST)
+        return im.convert("RGBA")
+
+    def _override_path(self) -> Path | None:
+        if not self.icon_override_path:
+            return None
+        p = Path(self.icon_override_path).expanduser()
+        # If not absolute, resolve relative to current working dir
+        if not p.is_absolute():
+            p = (Path.cwd() / p).resolve()
+        return p
+
+    def _decode_source_file(self, path: Path) -> tuple[Image.Image, str]:
+        # One handle for the digest and the decode, both reading in chunks: the file is never
+        # in memory whole, and a save-by-rename in between can't pair two versions
+        with open(path, "rb") as f:
+            digest = file_digest(f)
+            f.seek(0)
+            img = self._open_image_reduced(f)
+        return img, digest
+
     def _try_load_override_file(self):
         """If --icon PATH was provided, try to load it first."""
         if not self.icon_override_path:
             return None
         try:
-            p = Path(self.icon_override_path).expanduser()
-            # If not absolute, resolve relative to current working dir
-            if not p.is_absolute():
-                p = (Path.cwd() / p).resolve()
+            p = self._override_path()
             if p.exists():
-                print(f"Loading icon from CLI override: {p}", flush=True)
-                return Image.open(p).convert("RGBA")
+                log.info("Loading icon from CLI override: %s", p)
+                img, self._source_digest = self._decode_source_file(p)
+                self._source_path = p
+                return img
             else:
-                print(f"CLI override not found: {p}", flush=True)
+                log.warning("CLI override not found: %s", p)
         except Exception as e:
-            print(f"Failed to load CLI override image: {e}", flush=True)
+            log.warning("Failed to load CLI override image: %s", e)
         return None
 
     def _try_load_from_files(self):
         """Try the candidate filenames in order; return PIL.Image or None."""
         folder = self._script_dir()
-        for name in IMAGE_CANDIDATES:
+        for name in self._usable_icon_candidates(folder):
             p = folder / name
-            if p.exists():
-                try:
-                    print(f"Loading icon from file: {p.name}", flush=True)
-                    return Image.open(p).convert("RGBA")
-                except Exception as e:
-                    print(f"Failed to load {p.name}: {e}", flush=True)
+            try:
+                log.info("Loading icon from file: %s", p.name)
+                img, self._source_digest = self._decode_source_file(p)
+                self._source_path = p
+                return img
+            except Exception as e:
+                log.warning("Failed to load %s: %s", p.name, e)
+                self._save_icon_candidates_cache(folder, None)   # header was fine, data isn't: re-probe next time
         return None
 
+    # ---- finding Stay_Awake_icon.* cheaply ----
+    # One scandir of the folder instead of an exists() per candidate, and a header-only probe
+    # (format, size, mode: no pixel decode) of each present candidate, so a corrupt or bogus
+    # file is skipped without paying for a failed full decode. The probe results are cached
+    # (folder mtime + each candidate's size/mtime) in the per-user cache folder, next to the
+    # rendition cache (not the shared temp folder); a warm start just stats those and goes
+    # straight to decoding the winner.
+
+    def _icon_candidates_cache_path(self, folder: Path) -> Path:
+        key = hashlib.sha1(str(folder).encode("utf-8")).hexdigest()[:12]
+        return Path(self.rendition_cache.directory) / f"icon-candidates-{key}.json"
+
+    @staticmethod
+    def _probe_image_header(path: Path) -> bool:
+        _import_pil()
+        try:
+            with Image.open(path) as im:   # reads the header only; pixels are decoded on load()
+                fmt, (w, h), mode = im.format, im.size, im.mode
+        except Exception as e:
+            log.warning("Skipping %s: %s", path.name, e)
+            return False
+        if not fmt or w < 1 or h < 1 or not mode:
+            log.warning("Skipping %s: no usable image header (%s %sx%s %s)", path.name, fmt, w, h, mode)
+            return False
+        return True
+
+    def _usable_icon_candidates(self, folder: Path) -> list[str]:
+        """Present IMAGE_CANDIDATES whose headers are valid, in priority order."""
+        cache_path = self._icon_candidates_cache_path(folder)
+        cached = None
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if cached.get("folder") != str(folder):
+                cached = None
+        except (OSError, ValueError, AttributeError):
+            cached = None
+        try:
+            dir_mtime_ns = os.stat(folder).st_mtime_ns
+        except OSError:
+            return []
+        # Warm start: nothing added/removed/renamed and no candidate rewritten
+        if cached and cached.get("dir_mtime_ns") == dir_mtime_ns:
+            files = cached.get("files", {})
+            try:
+                unchanged = True
+                for name, rec in files.items():
+                    st = os.stat(folder / name)
+                    if [st.st_size, st.st_mtime_ns] != rec[:2]:
+                        unchanged = False
+                        break
+                if unchanged:
+                    return [name for name in IMAGE_CANDIDATES if name in files and files[name][2]]
+            except (OSError, TypeError, ValueError):
+                pass
+        # Cold: one listing, probe only candidates that are new or changed
+        fold = str.casefold if os.name == "nt" else (lambda n: n)
+        wanted = {fold(name): name for name in IMAGE_CANDIDATES}
+        old = (cached or {}).get("files", {})
+        files = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    name = wanted.get(fold(entry.name))
+                    if name is None:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    rec = old.get(name)
+                    if rec and rec[:2] == [st.st_size, st.st_mtime_ns]:
+                        files[name] = rec
+                    else:
+                        files[name] = [st.st_size, st.st_mtime_ns, self._probe_image_header(folder / entry.name)]
+        except OSError:
+            return []
+        self._save_icon_candidates_cache(folder, {"folder": str(folder), "dir_mtime_ns": dir_mtime_ns, "files": files})
+        return [name for name in IMAGE_CANDIDATES if name in files and files[name][2]]
+
+    def _save_icon_candidates_cache(self, folder: Path, data: dict | None) -> None:
+        path = self._icon_candidates_cache_path(folder)
+        try:
+            if data is None:
+                path.unlink(missing_ok=True)
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass   # only a cache
+
     def _fallback_draw_eye(self, size=(640, 490)):
         """Last-resort symbolic drawing so the app never crashes."""
         image = Image.new("RGBA", size, (0, 0, 0, 0))
@@ -21705,6 +22180,7 @@ class Stay_AwakeTrayApp:
         """
         if self._pil_base_image is not None:
             return self._pil_base_image
+        _import_pil()
         #
         img = self._try_load_override_file()    # --icon
         if img is None:
@@ -21713,6 +22189,7 @@ class Stay_AwakeTrayApp:
             img = self._try_load_from_files()   # Stay_Awake_icon.* next to the EXE/script (PNG/JPG/JPEG/WEBP/BMP/GIF/ICO)
         if img is None:
             img = self._fallback_draw_eye()     # A small drawn fallback glyph
+            self._source_digest = "fallback"
         self._pil_base_image = img.convert("RGBA")
         return self._pil_base_image
 
@@ -21724,10 +22201,262 @@ class Stay_AwakeTrayApp:
         return img if new_size == img.size else img.resize(new_size, Image.LANCZOS)
 
     def get_display_image_tk(self, max_px=MAX_DISPLAY_PX):
-        pil = self._load_eye_image()
-        pil = self._resize_keep_aspect(pil, max_px)
+        if max_px == MAX_DISPLAY_PX:
+            photo = self._tk_native_window_image()
+            if photo is not None:
+                return photo
+            pil = self._window_rendition()
+        else:
+            pil = self._resize_keep_aspect(self._load_eye_image(), max_px)
+        _import_pil()
         return ImageTk.PhotoImage(pil)
 
+    # ---- Tk-native fast path ----
+    # A PNG that needs no scaling (both sides <= MAX_DISPLAY_PX, 8 bits per channel) is
+    # handed to Tk's own PNG decoder: no Pillow import, decode or PIL -> Tk pixel copy. The
+    # pixels are the same as Pillow's. Anything else (other formats, 16-bit PNGs, or
+    # sources that need scaling) takes the Pillow path. Tk's subsample() is not used for
+    # scaling: it picks every Nth pixel, which is not what LANCZOS gives.
+
+    def _first_source(self) -> tuple[str, str | Path] | None:
+        """
+        ("file", path) or ("base64", text) of the first source the priority chain would try;
+        None: drawn fallback. Reads nothing: _source_path is set by whichever loader actually
+        decodes the source.
+        """
+        p = self._override_path()
+        if p is not None and p.exists():
+            return "file", p
+        raw = self._base64_text()
+        if raw.strip():
+            return "base64", raw
+        folder = self._script_dir()
+        for name in self._usable_icon_candidates(folder):
+            if (folder / name).is_file():
+                return "file", folder / name
+        return None
+
+    @staticmethod
+    def _is_presized_png(head: bytes) -> bool:
+        # Signature + IHDR: width, height, bit depth
+        if len(head) < 25 or head[:8] != b"\x89PNG\r\n\x1a\n" or head[12:16] != b"IHDR":
+            return False
+        w, h = int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+        return head[24] == 8 and 0 < w <= MAX_DISPLAY_PX and 0 < h <= MAX_DISPLAY_PX
+
+    def _tk_native_window_image(self):
+        """tk.PhotoImage straight from a pre-sized PNG source, or None (then Pillow does it)."""
+        try:
+            src = self._first_source()
+            if src is None:
+                return None
+            kind, payload = src
+            if kind == "base64":
+                if not self._is_presized_png(base64.b64decode("".join(payload[:128].split())[:44])):
+                    return None
+                data = payload
+            else:
+                with open(payload, "rb") as f:
+                    head = f.read(33)
+                    if not self._is_presized_png(head):
+                        return None                       # only the header was read
+                    data = base64.b64encode(head + f.read()).decode("ascii")
+            photo = tk.PhotoImage(master=self.main_window, data=data, format="png")
+        except (OSError, ValueError, tk.TclError) as e:   # Tk < 8.6 has no PNG; odd PNG variants
+            log.debug("Tk-native window image not used: %s", e)
+            return None
+        self._source_path = payload if kind == "file" else None   # decoded: this file is the one in use
+        log.info("Window image loaded by Tk (%sx%s PNG)", photo.width(), photo.height())
+        return photo
+
+    # ---- rendition cache ----
+    # The window image and every tray size depend only on the source bytes, MAX_DISPLAY_PX,
+    # TRAY_ICON_SIZES and the pixel pipeline (RENDITION_FORMAT). A warm start hashes the
+    # source the priority chain would pick (no decode) and maps the stored pixels back in
+    # with Image.frombuffer() (zero-copy over the mmap): no decode, pad or resample at all.
+    # A miss builds everything as before and saves it from the background tray-set thread.
+
+    def _peek_source_digest(self) -> str:
+        """Digest of the first source the priority chain would try, without decoding it."""
+        src = self._first_source()
+        if src is None:
+            return "fallback"
+        kind, payload = src
+        if kind == "base64":
+            return content_digest(payload.encode("ascii"))
+        with open(payload, "rb") as f:
+            return file_digest(f)
+
+    @staticmethod
+    def _rendition_cache_key(source_digest: str) -> str:
+        return rendition_key(RENDITION_FORMAT, source_digest, MAX_DISPLAY_PX, TRAY_ICON_SIZES)
+
+    def _load_cached_renditions(self) -> None:
+        # Caller holds _renditions_lock. If the first-choice source fails to decode, nothing
+        # was ever saved under its digest (saves use the source actually loaded), so this
+        # misses and the full chain runs.
+        if self._renditions_checked:
+            return
+        self._renditions_checked = True
+        try:
+            key = self._rendition_cache_key(self._peek_source_digest())
+            entry = self.rendition_cache.load(key)
+        except Exception as e:
+            log.warning("Rendition cache lookup failed: %s", e)
+            return
+        names = ["window"] + [f"tray-{size}" for size in TRAY_ICON_SIZES]
+        if entry is None or any(name not in entry for name in names):
+            return
+        _import_pil()
+        images = {}
+        for name in names:
+            mode, size, pixels = entry[name]
+            images[name] = Image.frombuffer(mode, size, pixels, "raw", mode, 0, 1)
+        self._window_image = images["window"]
+        for size in TRAY_ICON_SIZES:
+            self._tray_icons.setdefault(size, images[f"tray-{size}"])
+        self._renditions_from_cache = True
+        log.info("Window and tray images loaded from the rendition cache (%s)", key[:12])
+
+    def _save_renditions(self) -> None:
+        # Background thread, once the whole tray set exists
+        with self._renditions_lock:
+            if self._renditions_from_cache or self._source_digest is None:
+                return
+            if self._window_image is None:
+                self._window_image = self._resize_keep_aspect(self._load_eye_image(), MAX_DISPLAY_PX)
+            images = {"window": self._window_image}
+            images.update((f"tray-{size}", self._tray_icons[size]) for size in TRAY_ICON_SIZES)
+            key = self._rendition_cache_key(self._source_digest)
+        data = {name: (im.mode, im.size, im.tobytes()) for name, im in images.items()}
+        if self.rendition_cache.save(key, data):
+            log.info("Saved window and tray images to the rendition cache (%s)", key[:12])
+
+    def _window_rendition(self) -> Image.Image:
+        with self._renditions_lock:
+            self._load_cached_renditions()
+            if self._window_image is None:
+                self._window_image = self._resize_keep_aspect(self._load_eye_image(), MAX_DISPLAY_PX)
+            return self._window_image
+
+    # ---- window image follows the window size ----
+    # A drag delivers a <Configure> per motion step; only the last one (after the drag pauses
+    # for WINDOW_IMAGE_DEBOUNCE_MS) does any work. The fitted long side is rounded down to a
+    # WINDOW_IMAGE_BUCKET_PX step, and the last WINDOW_IMAGE_LRU_SIZE PhotoImages are kept,
+    # so dragging back and forth reuses them instead of resampling again.
+
+    def _on_window_configure(self, event) -> None:
+        if event.widget is not self.main_window or self._image_label is None:
+            return     # the binding on the root also sees every child's <Configure>
+        if self._image_resize_after_id is not None:
+            self.main_window.after_cancel(self._image_resize_after_id)
+        self._image_resize_after_id = self.main_window.after(WINDOW_IMAGE_DEBOUNCE_MS, self._fit_window_image)
+
+    def _window_image_side(self) -> int:
+        """Bucketed long side that fits the space the window leaves for the image."""
+        win = self.main_window
+        full_w, full_h = self._window_image_full
+        avail_w = win.winfo_width() - 2 * WINDOW_PADDING_PX
+        avail_h = win.winfo_height() - (win.winfo_reqheight() - self._cached_photo_main.height())   # all but the image
+        scale = min(avail_w / full_w, avail_h / full_h, 1.0)
+        side = max(full_w, full_h)
+        if scale >= 1.0:
+            return side
+        return min(side, max(WINDOW_IMAGE_MIN_PX, int(side * scale) // WINDOW_IMAGE_BUCKET_PX * WINDOW_IMAGE_BUCKET_PX))
+
+    def _fit_window_image(self) -> None:
+        self._image_resize_after_id = None
+        win = self.main_window
+        if win is None or self._image_label is None or not win.winfo_ismapped() or win.winfo_width() <= 1:
+            return
+        side = self._window_image_side()
+        if side == self._window_photo_side:
+            return
+        photo = self._window_photos.get(side)
+        if photo is None:
+            photo = self._window_photo_for_side(side)
+            self._window_photos[side] = photo
+        self._window_photos.move_to_end(side)
+        self._image_label.configure(image=photo)
+        self._cached_photo_main = photo       # the label needs a live reference
+        self._window_photo_side = side
+        full_side = max(self._window_image_full)
+        while len(self._window_photos) > WINDOW_IMAGE_LRU_SIZE:
+            for old in self._window_photos:
+                if old not in (side, full_side):   # never the shown one, nor the full-size one
+                    del self._window_photos[old]
+                    break
+
+    def _window_photo_for_side(self, side: int):
+        pil = self._window_rendition()
+        _import_pil()
+        w, h = pil.size
+        scale = side / max(w, h)
+        self.image_resamples += 1
+        return ImageTk.PhotoImage(pil.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS))
+
+    # ---- hot reload of the image file ----
+    # The file in use (--icon, or Stay_Awake_icon.* when there is no embedded image) is watched
+    # by change notifications (stay_awake.filewatch: nothing runs while it is unchanged). A
+    # rewrite is decoded and rendered on the watcher thread, then every rendition is swapped
+    # in one step under _renditions_lock: the tray gets its new icon directly, the window's
+    # PhotoImage is made on the Tk thread. The wake lock is never touched.
+
+    def _start_icon_watch(self) -> None:
+        if self._source_path is None or self._icon_watcher is not None:
+            return
+        self._icon_watcher = FileChangeWatcher(str(self._source_path), self._reload_image_source)
+        self._icon_watcher.start()
+        log.info("Watching %s for changes", self._source_path)
+
+    def _reload_image_source(self, path: str) -> None:
+        # Watcher thread: all the slow work (read, decode, pad, resample) happens here
+        _import_pil()
+        try:
+            img, digest = self._decode_source_file(Path(path))
+        except Exception as e:
+            log.warning("Changed image %s not loaded (keeping the current one): %s", path, e)
+            return
+        window = self._resize_keep_aspect(img, MAX_DISPLAY_PX)
+        tray = {size: self._square_icon_image(img, size) for size in TRAY_ICON_SIZES}
+        with self._renditions_lock:
+            self._pil_base_image = img
+            self._source_digest = digest
+            self._window_image = window
+            self._tray_icons = tray
+            self._renditions_checked = True
+            self._renditions_from_cache = False
+            shown = self._tray_icon_image.size[0] if self._tray_icon_image is not None else None
+            icon_pil = tray[shown] if shown in tray else tray[self._tray_icon_size()]
+            self._tray_icon_image = icon_pil
+            self._tray_progress_composite = None      # built on the old rendition
+        self.image_reloads += 1
+        log.info("Reloaded the image from %s", path)
+        if self.icon is not None:
+            try:
+                self.icon.icon = self._tray_icon_shown(icon_pil)
+            except Exception as e:
+                log.warning("Could not update the tray icon: %s", e)
+        self.run_on_tk(lambda: self._swap_window_image(window))   # no-op without a window
+        with self._renditions_lock:
+            self.rendition_cache.close()              # old cached pixels: unmapped, evictable
+        try:
+            self._save_renditions()
+        except Exception as e:
+            log.warning("Could not save the rendition cache: %s", e)
+
+    def _swap_window_image(self, window_pil) -> None:
+        # Tk thread: new full-size photo, drop the old sizes, then re-fit to the current window
+        if self.main_window is None or self._image_label is None:
+            return
+        photo = ImageTk.PhotoImage(window_pil)
+        self._image_label.configure(image=photo)
+        self._cached_photo_main = photo
+        self._window_image_full = (photo.width(), photo.height())
+        self._window_photo_side = max(self._window_image_full)
+        self._window_photos = collections.OrderedDict([(self._window_photo_side, photo)])
+        self._fit_window_image()
+
     # -------------------- UI helpers --------------------
 
     def _center_window(self, win):
@@ -21743,6 +22472,17 @@ class Stay_AwakeTrayApp:
             return False
         return True
 
+    def run_on_tk(self, fn) -> bool:
+        """Queue fn() on the Tk loop from any thread; False if there is no window (yet, or --no-gui)."""
+        window = self.main_window
+        if window is None:
+            return False
+        try:
+            window.after(0, fn)
+            return True
+        except (RuntimeError, tk.TclError):
+            return False
+
     # -------------------- Windows --------------------
 
     def create_main_window(self):
@@ -21758,12 +22498,17 @@ class Stay_AwakeTrayApp:
         self.main_window.bind("<Unmap>", self._on_window_unmap)
 
         # Layout
-        container = ttk.Frame(self.main_window, padding=(16, 16, 16, 16))
+        container = ttk.Frame(self.main_window, padding=(WINDOW_PADDING_PX,) * 4)
         container.pack(fill=tk.BOTH, expand=True)
 
-        # Image centered, scaled to <= 512 px
+        # Image centered, scaled to <= 512 px; later follows the window size
         self._cached_photo_main = self.get_display_image_tk(MAX_DISPLAY_PX)
-        ttk.Label(container, image=self._cached_photo_main, anchor="center").pack(side=tk.TOP, pady=(0, 8))
+        self._image_label = ttk.Label(container, image=self._cached_photo_main, anchor="center")
+        self._image_label.pack(side=tk.TOP, pady=(0, 8))
+        self._window_image_full = (self._cached_photo_main.width(), self._cached_photo_main.height())
+        self._window_photo_side = max(self._window_image_full)
+        self._window_photos[self._window_photo_side] = self._cached_photo_main
+        self.main_window.bind("<Configure>", self._on_window_configure, add="+")
 
         # Blurb text 
         ttk.Label(container, text=APP_BLURB, justify="center").pack(side=tk.TOP, pady=(0, 12))
@@ -21787,7 +22532,16 @@ class Stay_AwakeTrayApp:
             foreground="gray",
             justify="center"
         ).pack(anchor="center")
+
+        # Wake-lock health (kept current by the watchdog)
+        self._lock_state_value = ttk.Label(status_frame, text=self._lock_state_text("ok", None), foreground="gray", justify="center")
+        self._lock_state_value.pack(anchor="center")
         
+        # “Awake while: …” (only if hold conditions such as --while-pid were given)
+        if self.hold_conditions:
+            self._hold_value = ttk.Label(status_frame, text=self._hold_conditions_text(), justify="center")
+            self._hold_value.pack(anchor="center", pady=(6, 0))
+
         # ETA + countdown (only if --for was given) inside the Status frame
         if self.auto_quit_seconds and self.auto_quit_seconds > 0 and self.auto_quit_walltime:
             # Center this whole "table" within the bottom status area
@@ -21816,6 +22570,15 @@ class Stay_AwakeTrayApp:
             self._countdown_value.configure(text=self._format_dhms(rem0))
             # The tiny delay lets the window become viewable, then the tick function takes over and keeps rescheduling with the cadence
             self._countdown_after_id = self.main_window.after(250, self._schedule_countdown_tick)
+            # Diagnostics rows continue the same table
+            if self.show_diagnostics:
+                self._build_diagnostics_rows(countdown, 3)
+        elif self.show_diagnostics:
+            diagnostics = ttk.Frame(status_frame)
+            diagnostics.pack(anchor="center", pady=(6, 0))
+            self._build_diagnostics_rows(diagnostics, 0)
+        if self._diag_values:
+            self._diag_after_id = self.main_window.after(250, self._schedule_diagnostics_tick)
 
         # finally, center the window
         self._center_window(self.main_window)
@@ -21836,6 +22599,8 @@ class Stay_AwakeTrayApp:
                 self.window_visible = True
                 if self.auto_quit_deadline:     # if counting down, reschedule
                     self._schedule_countdown_tick()
+                if self._diag_values and self._diag_after_id is None:
+                    self._diag_after_id = self.main_window.after(250, self._schedule_diagnostics_tick)
         if not self._call_on_main(_impl):
             return
         _impl()
@@ -21855,10 +22620,12 @@ class Stay_AwakeTrayApp:
 
     def start_Stay_Awake(self):
         try:
-            self.keep_awake_context = keep.running()
-            self.keep_awake_context.__enter__()
+            self.wake_lock = WakeLock(self.wake_backend)
+            self.wake_lock.acquire()
             self.running = True
-            print("Stay_Awake activated", flush=True)
+            self._held_since = time.monotonic()
+            st = self.wake_lock.stats()
+            log.info("Stay_Awake activated (mode: %s, %.1f ms)", st['mode'] or 'NOT in effect', st['last_acquire_secs'] * 1000)
         except Exception as e:
             if self.main_window:
                 messagebox.showerror("Error", f"Failed to activate Stay_Awake: {e}")
@@ -21869,6 +22636,13 @@ class Stay_AwakeTrayApp:
         if getattr(self, "_cleanup_done", False):
             return
         self._cleanup_done = True
+        # 0) stop the watchdog first (a re-acquire still in flight after its join timeout is
+        #    refused by wake_lock.close() below)
+        if self._watchdog is not None:
+            try:
+                self._watchdog.stop()
+            except Exception:
+                pass
         # 1) cancel the auto-quit timer so it can't fire during shutdown
         t = getattr(self, "_auto_quit_timer", None)
         if t:
@@ -21878,19 +22652,43 @@ class Stay_AwakeTrayApp:
                 pass
             finally:
                 self._auto_quit_timer = None
+        # 1b) an upper bound (--for/--until) fired before the --run child finished: leave it running
+        proc = getattr(self, "_child_proc", None)
+        if proc is not None and proc.poll() is None:
+            log.warning("--run: leaving child PID %s running.", proc.pid)
         # 2) restore normal power management (wakepy context exit)
-        if self.running and self.keep_awake_context:
-            print("Cleaning up - restoring normal power management.", flush=True)
+        if self.running and self.wake_lock:
+            log.info("Cleaning up - restoring normal power management.")
             try:
-                self.keep_awake_context.__exit__(None, None, None)
-                print("Normal power management restored", flush=True)
+                self.wake_lock.close()
+                log.info("Normal power management restored (%.1f ms)", self.wake_lock.last_release_secs * 1000)
             except Exception as e:
-                print(f"Error during cleanup: {e}", flush=True)
+                log.error("Error during cleanup: %s", e)
             finally:
                 self.running = False
-                self.keep_awake_context = None
+        # 2a) metrics: one last write so the file shows the lock as released
+        if self._metrics_exporter is not None:
+            try:
+                self._metrics_exporter.stop()
+            except Exception:
+                pass
+            self._metrics_exporter = None
+        # 2b) clean exit: nothing for --resume to pick up
+        if self.journal is not None:
+            try:
+                self.journal.clear()
+            except OSError:
+                pass
         # 3) Belt-and-braces UI teardown (usually already handled)
         #    As a last-resort fallback (normally handled in quit/signal paths)
+        if self.dpi_source is not None:
+            try:
+                self.dpi_source.stop()
+            except Exception:
+                pass
+        if self._icon_watcher is not None:
+            self._icon_watcher.stop()
+        self.rendition_cache.close()                  # whatever no image still uses (no lock: signal path)
         try:
             if self.icon:
                 self.icon.visible = False
@@ -21913,7 +22711,7 @@ class Stay_AwakeTrayApp:
                 self._countdown_after_id = None
 
     def signal_handler(self, signum, frame):
-        print(f"Received signal {signum}, cleaning up.", flush=True)
+        log.info("Received signal %s, cleaning up.", signum)
         self.cleanup()
         if self.icon:
             try:
@@ -21925,7 +22723,7 @@ class Stay_AwakeTrayApp:
 
     def quit_application(self, icon, item):
         def _impl():
-            print("User requested quit", flush=True)
+            log.info("User requested quit")
             self.cleanup()
             if self.main_window:
                 try:
@@ -21940,7 +22738,9 @@ class Stay_AwakeTrayApp:
                 except Exception:
                     pass
             time.sleep(0.1)
-            sys.exit(0)
+            # Wakes the --no-gui main thread (which then exits with the same code)
+            self._quit_event.set()
+            sys.exit(self.exit_code)
         if not self._call_on_main(_impl):
             return
         _impl()
@@ -21970,6 +22770,7 @@ class Stay_AwakeTrayApp:
             return
         # For countdown math (robust against system clock changes)
         self.auto_quit_deadline = time.monotonic() + seconds
+        self._auto_quit_total_secs = seconds
         # For user-visible ETA label
         if self.auto_quit_target_epoch is not None:
             # Use the exact target epoch computed during CLI parsing
@@ -21987,33 +22788,280 @@ class Stay_AwakeTrayApp:
                 self._auto_quit_timer = None
         def _on_timeout():
             # This runs in the timer thread.
-            print(f"Auto-quit timer expired after {int(seconds)}s; quitting…", flush=True)
+            self._request_auto_quit(f"Auto-quit timer expired after {int(seconds)}s")
+        t = threading.Timer(seconds, _on_timeout)
+        # Setting daemon True so the timer thread won't block interpreter shutdown in edge cases
+        t.daemon = True
+        self._auto_quit_timer = t
+        t.start()
+
+    def _request_auto_quit(self, reason: str) -> None:
+        """
+        Quit from a background thread (auto-quit timer, hold-condition watchers).
+        Shutdown is marshalled onto the Tk main thread whenever the window exists.
+        """
+        log.info("%s; quitting…", reason)
+        try:
+            if self.main_window and self.main_window.winfo_exists():
+                # Marshal shutdown onto the Tk main thread; safest for any UI work. (schedule quit on the Tk thread)
+                self.main_window.after(0, lambda: self.quit_application(None, None))
+            else:
+                self.quit_application(None, None)
+        except Exception:
+            # As a last resort, avoid hanging forever if the GUI/thread state is odd.
             try:
-                if self.main_window and self.main_window.winfo_exists():
-                    # Marshal shutdown onto the Tk main thread; safest for any UI work. (schedule quit on the Tk thread)
-                    self.main_window.after(0, lambda: self.quit_application(None, None))
-                else:
-                    self.quit_application(None, None)
+                os._exit(0)
             except Exception:
-                # As a last resort, avoid hanging forever if the GUI/thread state is odd.
+                pass
+
+    # -------------------- Hold conditions (--while-pid, ...) --------------------
+
+    def _hold_conditions_text(self) -> str:
+        with self._hold_lock:
+            pending = list(self._hold_pending.values()) if self._hold_pending else [d for d, _ in self.hold_conditions]
+        return "Awake while: " + "; ".join(pending)
+
+    def _start_hold_conditions(self) -> None:
+        """
+        Start one daemon watcher thread per hold condition. Each watcher blocks inside its
+        wait callable (no polling here); when the LAST one returns we quit through the same
+        path as the auto-quit timer. A --for/--until timer, if armed, stays an upper bound.
+        """
+        if not self.hold_conditions:
+            return
+        with self._hold_lock:
+            self._hold_pending = {i: desc for i, (desc, _) in enumerate(self.hold_conditions)}
+        for i, (desc, wait_fn) in enumerate(self.hold_conditions):
+            t = threading.Thread(target=self._watch_hold_condition, args=(i, desc, wait_fn), name=f"Stay_Awake-hold-{i}", daemon=True)
+            t.start()
+
+    def _watch_hold_condition(self, index: int, desc: str, wait_fn) -> None:
+        # This runs in a watcher thread.
+        try:
+            wait_fn()
+        except Exception as e:
+            # Fail open: a broken watcher must not keep the machine awake forever.
+            log.warning("Hold condition failed (%s): %s; treating it as cleared.", desc, e)
+        with self._hold_lock:
+            self._hold_pending.pop(index, None)
+            remaining = len(self._hold_pending)
+        log.info("Hold condition cleared: %s", desc)
+        if remaining:
+            if self._hold_value is not None and self.main_window:
                 try:
-                    os._exit(0)
+                    self.main_window.after(0, lambda: self._hold_value.configure(text=self._hold_conditions_text()))
                 except Exception:
                     pass
-        t = threading.Timer(seconds, _on_timeout)
-        # Setting daemon True so the timer thread won't block interpreter shutdown in edge cases
-        t.daemon = True
-        self._auto_quit_timer = t
+            return
+        self._request_auto_quit("All hold conditions cleared")
+
+    # -------------------- Heartbeat (--heartbeat-file) --------------------
+
+    def _start_heartbeat(self) -> None:
+        if not self.heartbeat:
+            return
+        t = threading.Thread(target=self._watch_heartbeat, name="Stay_Awake-heartbeat", daemon=True)
         t.start()
 
+    def _watch_heartbeat(self) -> None:
+        # This runs in the heartbeat thread; one stat() per timeout period.
+        path, timeout_secs = self.heartbeat
+        if wait_for_missed_heartbeat(path, timeout_secs, self._quit_event):
+            # Client died (or forgot us): give the lock back now, not at the --for/--until bound
+            self._request_auto_quit(f"No heartbeat on {path} for {timeout_secs}s")
+
+    # -------------------- Deadline journal (--journal / --resume) --------------------
+
+    def _journal_state(self) -> dict:
+        return {
+            "kind": "app",
+            "target_epoch": self.auto_quit_target_epoch,
+            "auto_quit_seconds": self.auto_quit_seconds,
+            "mode": self.wake_lock.mode if self.wake_lock else None,
+            "show_gui": self.show_gui,
+            "icon": self.icon_override_path,
+            # Informational: these can't outlive this process, so --resume won't restore them
+            "holds": [desc for desc, _ in self.hold_conditions] + (["--run"] if self.run_command else []),
+        }
+
+    def _record_journal(self) -> None:
+        # Writes only when the state actually changed (DeadlineJournal.record compares)
+        if self.journal is None or not self.running:
+            return
+        try:
+            self.journal.record(self._journal_state())
+        except OSError as e:
+            log.error("--journal: cannot write %s: %s", self.journal.path, e)
+
+    # -------------------- Metrics (--metrics-file / --metrics-port) --------------------
+
+    def _start_metrics(self) -> None:
+        if not self.metrics or self._metrics_exporter is not None:
+            return
+        file_path, port, interval_secs = self.metrics
+        exporter = MetricsExporter(self._collect_metrics, file_path, port, interval_secs)
+        try:
+            exporter.start()
+        except OSError as e:
+            log.error("--metrics-port: cannot listen on 127.0.0.1:%s: %s", port, e)
+            exporter.port = None
+            exporter.start()   # the file (if any) still gets written
+        self._metrics_exporter = exporter
+        if exporter.port is not None:
+            log.info("Metrics: http://127.0.0.1:%s/metrics", exporter.port)
+        if file_path:
+            log.info("Metrics: writing %s every %ss", file_path, interval_secs)
+
+    def _collect_metrics(self) -> list:
+        # Runs on the metrics thread(s): reads counters only, no Tk calls and no extra timers
+        st = self.wake_lock.stats() if self.wake_lock is not None else {}
+        held = bool(self.running and st.get("active"))
+        watchdog = self._watchdog
+        checks = watchdog.checks if watchdog else 0
+        wakeups = self._timer_wakeups()
+        metrics = [
+            Metric("stay_awake_lock_active", "gauge", "1 while the wake lock is held.", int(held), {"mode": st.get("mode") or ""}),
+            Metric("stay_awake_held_seconds", "gauge", "Seconds the wake lock has been held.",
+                   round(time.monotonic() - self._held_since, 3) if held and self._held_since else 0),
+            Metric("stay_awake_countdown_ticks_total", "counter", "Countdown display updates.", self.countdown_ticks),
+            Metric("stay_awake_watchdog_checks_total", "counter", "Watchdog lock checks.", checks),
+            Metric("stay_awake_timer_wakeups_total", "counter", "Periodic timer wakeups (countdown ticks, diagnostics refreshes, watchdog checks, metrics file writes).", wakeups),
+            Metric("stay_awake_lock_acquire_failures_total", "counter", "Wake-lock acquires that failed or were not in effect.", st.get("acquire_failures", 0)),
+            Metric("stay_awake_lock_release_failures_total", "counter", "Wake-lock releases that failed.", st.get("release_failures", 0)),
+            Metric("stay_awake_lock_verify_failures_total", "counter", "Watchdog checks that found the wake lock dropped.", st.get("verify_failures", 0)),
+            Metric("stay_awake_lock_reacquires_total", "counter", "Successful watchdog re-acquires.", watchdog.reacquires if watchdog else 0),
+            Metric("stay_awake_threads", "gauge", "Python threads (Tk, tray, timers, watchers).", threading.active_count()),
+            Metric("process_start_time_seconds", "gauge", "Start time of the process since unix epoch in seconds.", round(self._started_epoch, 3)),
+            Metric("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.", process_rss_bytes()),
+            Metric("process_cpu_seconds_total", "counter", "Total user and system CPU time spent in seconds.", round(process_cpu_seconds(), 3)),
+        ]
+        if held and self.auto_quit_walltime is not None:
+            metrics.append(Metric("stay_awake_auto_quit_time_seconds", "gauge", "When Stay_Awake will auto-quit, since unix epoch in seconds.", self.auto_quit_walltime))
+            metrics.append(Metric("stay_awake_auto_quit_remaining_seconds", "gauge", "Seconds until auto-quit.", max(0, round(self.auto_quit_walltime - time.time(), 3))))
+        return metrics
+
+    def _timer_wakeups(self) -> int:
+        """Periodic timer wakeups so far: every Tk after() tick and background-thread interval."""
+        watchdog = self._watchdog
+        exporter = self._metrics_exporter
+        return (self.countdown_ticks + self.diagnostics_refreshes + self.tray_progress_ticks
+                + (watchdog.checks if watchdog else 0) + (exporter.writes if exporter else 0))
+
+    # -------------------- Diagnostics rows (--diagnostics) --------------------
+
+    def _build_diagnostics_rows(self, table, first_row: int) -> None:
+        for i, (key, text) in enumerate((
+            ("cpu", "CPU time:"),
+            ("rss", "Memory (RSS):"),
+            ("threads", "Threads:"),
+            ("wakeups", "Timer wakeups / hour:"),
+        )):
+            row = first_row + i
+            ttk.Label(table, text=text, justify="right", foreground="gray").grid(row=row, column=0, sticky="e", padx=(0, 8))
+            self._diag_values[key] = ttk.Label(table, text="—", justify="left", foreground="gray")
+            self._diag_values[key].grid(row=row, column=1, sticky="w")
+
+    def _diagnostics_text(self) -> dict[str, str]:
+        now = time.monotonic()
+        cpu = process_cpu_seconds()
+        rss = process_rss_bytes()
+        threads = threading.enumerate()
+        names = sorted({t.name.split("-", 1)[-1] if t.name.startswith("Stay_Awake-") else t.name for t in threads})
+        # CPU share and wakeup rate over the last DIAGNOSTICS_RATE_WINDOW_SECS (since the first sample, until then)
+        wakeups = self._timer_wakeups()
+        samples = self._diag_samples
+        samples.append((now, cpu, wakeups))
+        while len(samples) > 2 and now - samples[1][0] >= DIAGNOSTICS_RATE_WINDOW_SECS:
+            samples.popleft()
+        t0, cpu0, wakeups0 = samples[0]
+        span = now - t0
+        return {
+            "cpu": f"{cpu:.2f} s  ({100 * (cpu - cpu0) / span:.3f}% recently)" if span >= 1 else f"{cpu:.2f} s",
+            "rss": f"{rss / 1_048_576:.1f} MB" if rss is not None else "n/a",
+            "threads": f"{len(threads)}  ({', '.join(names)})",
+            "wakeups": f"{(wakeups - wakeups0) * 3600 / span:.0f}  ({wakeups} total)" if span >= 1 else f"—  ({wakeups} total)",
+        }
+
+    def _schedule_diagnostics_tick(self):
+        self._diag_after_id = None
+        if not self._diag_values or not (self.main_window and self.main_window.winfo_exists()):
+            return
+        try:
+            visible = bool(self.main_window.winfo_viewable())
+        except Exception:
+            visible = True
+        if not visible:
+            return   # show_main_window() restarts it; nothing runs while hidden
+        self.diagnostics_refreshes += 1
+        for key, text in self._diagnostics_text().items():
+            self._diag_values[key].configure(text=text)
+        self._diag_after_id = self.main_window.after(DIAGNOSTICS_REFRESH_MS, self._schedule_diagnostics_tick)
+
+    # -------------------- Wake-lock watchdog --------------------
+
+    def _start_watchdog(self) -> None:
+        if self.wake_lock is None or self._watchdog is not None:
+            return
+        self._watchdog = WakeLockWatchdog(self.wake_lock, on_state=self._on_wake_lock_state)
+        self._watchdog.start()
+
+    def _lock_state_text(self, state: str, detail: str | None) -> str:
+        if state == "ok":
+            mode = self.wake_lock.mode if self.wake_lock else None
+            return f"Wake lock: active ({mode})" if mode else "Wake lock: active"
+        if state == "lost":
+            return "Wake lock: LOST - re-acquiring…"
+        return f"Wake lock: NOT in effect - retrying ({detail})"
+
+    def _on_wake_lock_state(self, state: str, detail: str) -> None:
+        # This runs in the watchdog thread.
+        log.log(logging.INFO if state == "ok" else logging.WARNING, "Wake lock %s: %s", state, detail)
+        if state == "ok":
+            self._record_journal()   # a re-acquire may have landed on a different mode
+        if self.icon is not None:
+            try:
+                self.icon.title = "Stay_Awake - System Awake" if state == "ok" else "Stay_Awake - wake lock NOT in effect"
+            except Exception:
+                pass
+        if self._lock_state_value is not None and self.main_window:
+            text = self._lock_state_text(state, detail)
+            colour = "gray" if state == "ok" else "red"
+            try:
+                self.main_window.after(0, lambda: self._lock_state_value.configure(text=text, foreground=colour))
+            except Exception:
+                pass
+
+    # -------------------- --run child command --------------------
+
+    def _start_run_command(self) -> None:
+        """
+        Spawn the --run child. It inherits our stdin/stdout/stderr, so its output streams
+        straight through with no buffering on our side. Waiting for it is just another hold
+        condition, so the lock is released through the normal quit path when it exits.
+        """
+        if not self.run_command:
+            return
+        try:
+            self._child_proc = subprocess.Popen(self.run_command)
+        except (OSError, ValueError) as e:
+            log.error("--run: failed to start %r: %s", self.run_command[0], e)
+            self.exit_code = 2
+            self.cleanup()
+            sys.exit(2)
+        log.info("--run: started PID %s: %s", self._child_proc.pid, subprocess.list2cmdline(self.run_command))
+        desc = f"{Path(self.run_command[0]).name} (PID {self._child_proc.pid}) running"
+        self.hold_conditions.append((desc, self._wait_run_command))
+
+    def _wait_run_command(self) -> None:
+        # This runs in a hold-condition watcher thread; Popen.wait() blocks in the OS (no polling).
+        rc = self._child_proc.wait()
+        # POSIX reports death-by-signal as -N; exit with the shell convention 128+N instead
+        self.exit_code = 128 - rc if rc < 0 else rc
+        log.info("--run: child exited with code %s", rc)
+
     def _format_dhms(self, total_seconds: int) -> str:
         # DDDd hh:mm:ss (omit days if 0)
-        if total_seconds < 0:
-            total_seconds = 0
-        d, r = divmod(total_seconds, 86400)
-        h, r = divmod(r, 3600)
-        m, s = divmod(r, 60)
-        return (f"{d}d {h:02d}:{m:02d}:{s:02d}") if d else (f"{h:02d}:{m:02d}:{s:02d}")
+        return format_dhms(total_seconds)
 
     def _schedule_countdown_tick(self):
         # If countdown isn’t active or window doesn’t exist, cancel any pending tick and bail
@@ -22026,6 +23074,7 @@ class Stay_AwakeTrayApp:
                 finally:
                     self._countdown_after_id = None
             return
+        self.countdown_ticks += 1
         # If the window isn't visible, throttle updates (saves even more CPU)
         # Determine visibility (use Tk’s truth)
         try:
@@ -22086,10 +23135,11 @@ class Stay_AwakeTrayApp:
 
     def _pad_to_square_edge_stretch(self, im: Image.Image) -> Image.Image:
         # Pad an image to a square by replicating outermost edge pixels (no subject stretch).
-        im = im.convert("RGBA")
+        if im.mode != "RGBA":
+            im = im.convert("RGBA")
         w, h = im.size
         if w == h:
-            return im
+            return im.copy()
         side = max(w, h)
         lp = (side - w) // 2
         rp = side - w - lp
@@ -22108,43 +23158,176 @@ class Stay_AwakeTrayApp:
         if rp:
             strip = im.crop((w - 1, 0, w, h)).resize((rp, h), Image.NEAREST)
             sq.paste(strip, (lp + w, tp))
-        sq.paste(im, (lp, tp), im)
+        sq.paste(self._over_transparent(im), (lp, tp))
         return sq
 
-    def create_tray_icon_image(self):
-        """Create tray icon image (down-sized from loaded Eye image) using replicated out edge for squaring."""
-        # Determine a DPI-aware tray glyph size (approx: 16@100%, 20@125%, 24@150%, 32@200%).
-        default_DPI = 96 
+    @staticmethod
+    def _over_transparent(im: Image.Image) -> Image.Image:
+        # The subject as it looks alpha-pasted onto a transparent canvas (that blend scales
+        # semi-transparent pixels, alpha included). A fully opaque image is unchanged, so it
+        # skips the per-pixel blend: checking the alpha range is ~2.5x cheaper than blending.
+        if im.getchannel("A").getextrema()[0] == 255:
+            return im
+        out = Image.new("RGBA", im.size, (0, 0, 0, 0))
+        out.paste(im, (0, 0), im)
+        return out
+
+    def _square_icon_image(self, im: Image.Image, max_px: int) -> Image.Image:
+        """
+        Same pixels as _resize_keep_aspect(_pad_to_square_edge_stretch(im), max_px), without
+        building the full-resolution square when the source is landscape.
+        PIL's LANCZOS resize is separable (horizontal pass, rounded to 8 bits, then vertical
+        pass) on premultiplied "RGBa", and the top/bottom pads are copies of the edge rows, so
+        their horizontal pass is just the edge row's, repeated. We run the horizontal pass on
+        the subject and the two edge rows, pad the max_px-wide result, and run the vertical
+        pass on that. Portrait sources pad left/right, which the horizontal pass mixes with
+        the subject, so they keep the full-size route.
+        """
+        if im.mode != "RGBA":
+            im = im.convert("RGBA")
+        w, h = im.size
+        side = max(w, h)
+        size = max(1, int(side * min(max_px / side, 1.0)))   # as _resize_keep_aspect()
+        if w <= h or size == side:
+            return self._resize_keep_aspect(self._pad_to_square_edge_stretch(im), max_px)
+        tp = (side - h) // 2
+        bp = side - h - tp
+        tall = Image.new("RGBa", (size, side))
+        tall.paste(self._over_transparent(im).convert("RGBa").resize((size, h), Image.LANCZOS), (0, tp))
+        if tp:
+            row = im.crop((0, 0, w, 1)).convert("RGBa").resize((size, 1), Image.LANCZOS)
+            tall.paste(row.resize((size, tp), Image.NEAREST), (0, 0))
+        if bp:
+            row = im.crop((0, h - 1, w, h)).convert("RGBa").resize((size, 1), Image.LANCZOS)
+            tall.paste(row.resize((size, bp), Image.NEAREST), (0, tp + h))
+        return tall.resize((size, size), Image.LANCZOS).convert("RGBA")
+
+    def _tray_icon_size(self) -> int:
+        """Tray rendition for the taskbar monitor's DPI (approx: 16@100%, 20@125%, 24@150%, 32@200%)."""
         default_system_tray_icon_size = 64
-        windows_baseline_DPI = 96.0 # 96 is Windows baseline DPI = “100%”. All DPI scaling on Windows is defined relative to 96.
+        dpi = None
+        if self.dpi_source is not None:
+            try:
+                dpi = self.dpi_source.dpi()
+            except Exception:
+                dpi = None
+        if not dpi:
+            log.warning("Unable to determine Display Monitor DPI, defaulting the tray icon to %spx", default_system_tray_icon_size)
+            return default_system_tray_icon_size
+        return tray_icon_size(dpi)
+
+    def _tray_icon_rendition(self, size: int) -> Image.Image:
+        # One square, edge-padded rendition per TRAY_ICON_SIZES entry, all from the one decoded
+        # source (_load_eye_image() caches it) or the rendition cache: a DPI change never
+        # re-decodes or re-pads
+        with self._renditions_lock:
+            self._load_cached_renditions()
+            icon_pil = self._tray_icons.get(size)
+            if icon_pil is None:
+                icon_pil = self._square_icon_image(self._load_eye_image(), size)
+                self._tray_icons[size] = icon_pil
+            return icon_pil
+
+    def _build_tray_icon_set(self) -> None:
+        # Background thread, after the tray is up: the remaining renditions, ready for a DPI
+        # change, then (first run for this source) into the rendition cache
+        for size in TRAY_ICON_SIZES:
+            if self._quit_event.is_set():
+                return
+            self._tray_icon_rendition(size)
         try:
-            dpi = 0
-            #try:
-            #    dpi = ctypes.windll.user32.GetDpiForSystem()  # Win10/11
-            #except Exception:
-            #    # Fallback for older systems
-            #    LOGPIXELSX = 88
-            #    hdc = ctypes.windll.user32.GetDC(0)
-            #    dpi = ctypes.windll.gdi32.GetDeviceCaps(hdc, LOGPIXELSX)
-            #    ctypes.windll.user32.ReleaseDC(0, hdc)
-            dpi = ctypes.windll.user32.GetDpiForSystem()  # Win10/11 ... let it crash if can't get the DPI
-            if not dpi:
-                dpi = default_DPI
-                print(f"Unable to determine Display Monitor DPI, defaulting to {default_DPI}", flush=True)
-            system_tray_icon_size = max(16, min(64, int(round(16 * dpi / windows_baseline_DPI)))) 
-        except Exception:
-            system_tray_icon_size = default_system_tray_icon_size
-            print(f"Unable to set system tray icon size based on Display Monitor DPI, defaulting to {default_system_tray_icon_size}", flush=True)
+            self._save_renditions()
+        except Exception as e:
+            log.warning("Could not save the rendition cache: %s", e)
+
+    def create_tray_icon_image(self):
+        """Create tray icon image (down-sized from loaded Eye image) using replicated out edge for squaring."""
         if self._tray_icon_image is None:
-            pil = self._load_eye_image()
-            # Make the tray source square using edge-replication stretch pads (no subject distortion)
-            pil = self._pad_to_square_edge_stretch(pil)
-            icon_pil = self._resize_keep_aspect(pil, system_tray_icon_size)
-            self._tray_icon_image = icon_pil
+            # Make the tray source square using edge-replication stretch pads (no subject distortion),
+            # padded and downscaled in one step
+            self._tray_icon_image = self._tray_icon_rendition(self._tray_icon_size())
         return self._tray_icon_image
 
+    def _on_dpi_change(self, dpi: int) -> None:
+        # This runs in the DPI source's thread. pystray pushes the new image to the shell.
+        size = tray_icon_size(dpi)
+        icon_pil = self._tray_icon_rendition(size)
+        if icon_pil is self._tray_icon_image:
+            return
+        self._tray_icon_image = icon_pil
+        log.info("Tray DPI changed to %s: switching to the %spx icon", dpi, size)
+        if self.icon is not None:
+            try:
+                self.icon.icon = self._tray_icon_shown(icon_pil)
+            except Exception as e:
+                log.warning("Could not update the tray icon: %s", e)
+
+    # ---- progress ring (--tray-progress) ----
+    # The padded/downscaled base is the cached tray rendition; the ring is drawn at 4x and
+    # LANCZOS-reduced (smooth at 16px), then alpha-composited over it. The composite is kept
+    # until the run crosses the next 1/TRAY_PROGRESS_STEPS step or the base changes (DPI
+    # change, image reload), and the next recompose is scheduled for exactly that crossing.
+
+    def _tray_progress_step(self) -> int | None:
+        total = self._auto_quit_total_secs
+        if not self.tray_progress or self.auto_quit_deadline is None or not total:
+            return None
+        elapsed = total - (self.auto_quit_deadline - time.monotonic())
+        return min(TRAY_PROGRESS_STEPS, max(0, int(elapsed * TRAY_PROGRESS_STEPS / total)))
+
+    @staticmethod
+    def _progress_ring_layer(size: int, fraction: float) -> Image.Image:
+        ss = 4
+        big = size * ss
+        width = max(2, round(size / 8)) * ss
+        inset = width // 2
+        box = [inset, inset, big - 1 - inset, big - 1 - inset]
+        layer = Image.new("RGBA", (big, big), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        draw.ellipse(box, outline=TRAY_PROGRESS_TRACK_RGBA, width=width)
+        if fraction > 0:
+            # clockwise from 12 o'clock
+            draw.arc(box, start=-90, end=-90 + 360 * fraction, fill=TRAY_PROGRESS_FILL_RGBA, width=width)
+        return layer.resize((size, size), Image.LANCZOS)
+
+    def _tray_icon_shown(self, base: Image.Image) -> Image.Image:
+        """What the tray shows for rendition 'base': base itself, or base + progress ring."""
+        step = self._tray_progress_step()
+        if step is None:
+            return base
+        with self._renditions_lock:
+            cached = self._tray_progress_composite
+            if cached is not None and cached[0] is base and cached[1] == step:
+                return cached[2]
+            composed = Image.alpha_composite(base, self._progress_ring_layer(base.size[0], step / TRAY_PROGRESS_STEPS))
+            self._tray_progress_composite = (base, step, composed)
+            self.tray_progress_updates += 1
+            return composed
+
+    def _schedule_tray_progress(self) -> None:
+        # Tk thread: one wakeup per step boundary (at most TRAY_PROGRESS_STEPS per run)
+        self._tray_progress_after_id = None
+        step = self._tray_progress_step()
+        if step is None or not (self.main_window and self.main_window.winfo_exists()):
+            return
+        self.tray_progress_ticks += 1
+        base = self._tray_icon_image
+        if base is not None and self.icon is not None:
+            composed = self._tray_icon_shown(base)
+            try:
+                if self.icon.icon is not composed:
+                    self.icon.icon = composed
+            except Exception as e:
+                log.warning("Could not update the tray icon: %s", e)
+        if step >= TRAY_PROGRESS_STEPS - 1:
+            return    # the last crossing is the deadline itself: the app quits then, no full ring
+        total = self._auto_quit_total_secs
+        crossing = self.auto_quit_deadline - total + (step + 1) * total / TRAY_PROGRESS_STEPS
+        delay_ms = max(1, math.ceil((crossing - time.monotonic()) * 1000))
+        self._tray_progress_after_id = self.main_window.after(min(delay_ms, 2**31 - 1), self._schedule_tray_progress)
+
     def create_tray_icon(self):
-        image = self.create_tray_icon_image()
+        image = self._tray_icon_shown(self.create_tray_icon_image())
         menu = pystray.Menu(
             item("Show Window", self.show_main_window, default=True),
                                            
@@ -22153,6 +23336,12 @@ class Stay_AwakeTrayApp:
         )
         self.icon = pystray.Icon("Stay_Awake", image, "Stay_Awake - System Awake", menu)
         self.icon.default_action = self.show_main_window
+        threading.Thread(target=self._build_tray_icon_set, name="Stay_Awake-tray-icons", daemon=True).start()
+        if self.dpi_source is not None:
+            try:
+                self.dpi_source.start(self._on_dpi_change)
+            except Exception as e:
+                log.warning("Tray icon won't follow DPI changes: %s", e)
         self.icon.run()
 
     def run(self):
@@ -22164,127 +23353,286 @@ class Stay_AwakeTrayApp:
         in sync with the console print.
         """
         self.start_Stay_Awake()
+        # Verify the lock at a low, adaptive interval and re-acquire it if it gets dropped
+        self._start_watchdog()
         # Determine seconds to run (final re-ceil right before arming the timer)
         secs_to_run = self.auto_quit_seconds
         if self.auto_quit_target_epoch is not None:
             # Use ceil on the difference so we never fire early
             secs_to_run = int(math.ceil(self.auto_quit_target_epoch - time.time()))
             if secs_to_run <= 0:
-                print("Auto-quit reached during startup; quitting…", flush=True)
+                log.info("Auto-quit reached during startup; quitting…")
                 self.quit_application(None, None)
                 return
         # Arm the one-shot auto-quit timer if requested (do this BEFORE building the window)
         # so auto_quit_walltime/deadline are set in time for the ETA/countdown labels.
         if secs_to_run and secs_to_run > 0:
             self._start_auto_quit_timer(secs_to_run)
+        # Deadline and lock are known: make them crash-safe before anything else can go wrong
+        self._record_journal()
+        self._start_metrics()
+        # Lock is held: start the --run child now so lock time matches the real work
+        self._start_run_command()
+        if not self.show_gui:
+            self._run_headless()
+            return
         # Build the window after timing is known (so ETA/countdown/cadence labels appear immediately)
         self.create_main_window()
+        # Image file in use is known now: reload it when it is rewritten
+        self._start_icon_watch()
+        # Hold-condition watchers (--while-pid, --run, ...) start once the window exists, so an
+        # already-satisfied condition marshals its quit onto the Tk loop like the timer does.
+        self._start_hold_conditions()
+        self._start_heartbeat()
         # Tray icon in a background thread; Tk loop in main thread
         tray_thread = threading.Thread(target=self.create_tray_icon, daemon=True)
         tray_thread.start()
+        if self.tray_progress:
+            self.main_window.after(0, self._schedule_tray_progress)
         self.main_window.mainloop()
 
-# -------------------- CLI: duration parsing --------------------
+    def _run_headless(self):
+        """--no-gui: no window or tray; block the main thread until quit_application() has run."""
+        self._start_hold_conditions()
+        self._start_heartbeat()
+        # POSIX: a plain wait is interrupted by SIGINT/SIGTERM (our handlers exit).
+        # Windows: waits aren't interruptible by Ctrl+C, so wake once a second to let the handler run.
+        wait_slice = 1.0 if os.name == "nt" else None
+        while not self._quit_event.wait(wait_slice):
+            pass
+        sys.exit(self.exit_code)
 
-def parse_duration_to_seconds(text: str) -> int:
-    """
-    Parse '3d4h5s', '2h', '90m', '3600s', or composites with spaces (case-insensitive).
-    Bare numbers are minutes. Returns total seconds (int).
-    """
-    if not text or not str(text).strip():
-        raise ValueError("Empty duration")
-    s = str(text).strip()
-    total = 0
-    last_end = 0
-    any_match = False
-    for m in _RE_DURATION_TOKEN.finditer(s):
-        # Disallow non-space junk between tokens
-        if m.start() != last_end and s[last_end:m.start()].strip():
-            raise ValueError(f"Invalid duration syntax near: {s[last_end:m.start()]!r}")
-        val = int(m.group(1))
-        unit = (m.group(2) or '').lower()
-        if unit == 'd':
-            total += val * 86400
-        elif unit == 'h':
-            total += val * 3600
-        elif unit == 'm' or unit == '':
-            total += val * 60
-        elif unit == 's':
-            total += val
+# -------------------- Lease server / client --------------------
+
+def _lease_table(backend=None, on_change=None) -> LeaseTable:
+    """LeaseTable that logs lease and wake-lock events to the console (and calls on_change())."""
+    def on_event(kind, name):
+        if on_change is not None:
+            on_change()
+        if kind in ("lock", "unlock"):
+            log.info("Leases: wake lock %s", 'acquired (' + name + ')' if kind == 'lock' else 'released')
         else:
-            # Shouldn't occur due to the regex, but keep it defensive
-            raise ValueError(f"Unknown unit: {unit!r}")
-        last_end = m.end()
-        any_match = True
-    # Must have matched at least one token and consumed the string (whitespace allowed at the end)
-    if not any_match or s[last_end:].strip():
-        raise ValueError(f"Invalid duration: {text!r}")
-    if total < 0:
-        raise ValueError("Duration must be >= 0")
-    return total
+            log.info("Leases: %s %s (%s open)", kind, name, len(table))
+    table = LeaseTable(WakeLock(backend), on_event=on_event)
+    return table
 
-def parse_until_to_epoch(text: str) -> float:
-    """
-    Parse a relaxed local timestamp like '2025-01-02 23:22:21', '2025- 1- 2 03:02:01',
-    or '2025-1-2 3:2:1' into a *local* epoch seconds (float), with robust DST handling.
+def _start_profile(args) -> SessionProfiler:
+    """--profile: profile from here until startup + DURATION (or exit, if sooner)."""
+    secs = PROFILE_DEFAULT_SECS
+    if args.profile_duration:
+        try:
+            secs = parse_duration_to_seconds(args.profile_duration)
+        except ValueError as e:
+            log.error("Invalid --profile value: %s", e)
+            sys.exit(2)
+        if secs <= 0 or secs > MAX_AUTO_QUIT_SECS:
+            log.error("--profile must be between 1 second and %s days.", MAX_AUTO_QUIT_SECS // 86400)
+            sys.exit(2)
+    path = os.path.abspath(args.profile_file) if args.profile_file else default_profile_path()
+    if not os.path.isdir(os.path.dirname(path)):
+        log.error("--profile-file: folder does not exist: %s", os.path.dirname(path))
+        sys.exit(2)
+    profiler = SessionProfiler(path, secs, trace_memory=args.profile_memory)
+    profiler.on_done = lambda p: log.info("--profile: wrote %s and %s", p.path, p.summary_path)
+    profiler.start()
+    # Exit before DURATION is up: stop and write from atexit (LIFO: after the app's cleanup(),
+    # which registers later, and before the log writer stops, which registered earlier)
+    atexit.register(profiler.stop)
+    log.info("--profile: profiling startup + %s%s.", format_dhms(secs), " with tracemalloc" if profiler.trace_memory else "")
+    return profiler
 
-    Strategy:
-      1) Regex-parse numbers and build a naive datetime (calendar validation happens here).
-      2) Two-pass mktime round-trip with tm_isdst=0 and tm_isdst=1:
-         - If neither round-trip reproduces the same wall time -> NONEXISTENT local time (spring-forward gap) -> error.
-         - If exactly one round-trips correctly            -> valid; use that epoch.
-         - If both round-trip and epochs differ            -> AMBIGUOUS local time (fall-back overlap) -> error.
-         - If both round-trip and epochs equal             -> normal time; use epoch.
+def _serve_leases(port: int, backend=None, journal=None, resume: bool = False) -> int:
+    """--serve: hold one wake lock while any client lease is open; Ctrl+C to stop."""
+    def journal_state():
+        return {"kind": "serve", "port": port, "mode": table.wake_lock.mode, "leases": table.snapshot()}
+    # Lease churn is coalesced: at most one journal write per JOURNAL_COALESCE_SECS
+    on_change = (lambda: journal.record_later(journal_state)) if journal is not None else None
+    table = _lease_table(backend, on_change)
+    try:
+        server = LeaseServer(table, port)
+    except OSError as e:
+        log.error("--serve: cannot listen on %s:%s: %s", LEASE_SERVER_HOST, port, e)
+        return 2
+    if resume:
+        state = journal.load()
+        if state and state.get("kind") == "serve":
+            restored = table.restore(state.get("leases") or [])
+            log.info("--resume: restored %s lease(s) from %s", restored, journal.path)
+        else:
+            log.info("--resume: no lease-server journal at %s; starting empty.", journal.path)
+    table.start()
+    # SIGTERM: stop serve_forever() from another thread (shutdown() blocks until it returns)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+    log.info("Lease server listening on %s:%s (Ctrl+C to stop).", LEASE_SERVER_HOST, port)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        log.info("Interrupted by user")
+    finally:
+        server.server_close()
+        table.stop()   # drops every lease and releases the lock
+        if journal is not None:
+            journal.clear()
+        log.info("Lease server stopped.")
+    return 0
 
-    Raises:
-        ValueError on invalid format, invalid calendar date, out-of-range epoch,
-        or DST edge cases (nonexistent/ambiguous local time).
+def _watch_lease_dir(directory: str, node: str | None, backend=None) -> int:
+    """--lease-dir: hold the wake lock while any unexpired lease file there targets this node."""
+    table = _lease_table(backend)
+    watcher = LeaseDirWatcher(directory, table, node)
+    watcher.on_error = lambda where, msg: log.warning("--lease-dir: %s: %s", where, msg)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    table.start()
+    watcher.start()
+    log.info("Watching lease directory %s as node %r (Ctrl+C to stop).", directory, watcher.node)
+    try:
+        # Windows: Event.wait isn't interruptible by Ctrl+C, so wake once a second (as in --no-gui)
+        while not stop.wait(1.0 if os.name == "nt" else None):
+            pass
+    except KeyboardInterrupt:
+        log.info("Interrupted by user")
+    finally:
+        watcher.stop()
+        table.stop()   # releases the lock
+        log.info("Lease directory watcher stopped.")
+    return 0
+
+def _lease_dir_client(args, target_epoch: float | None) -> int:
+    """--lease-dir with --lease / --release / --leases: edit or list the shared lease directory."""
+    directory = args.lease_dir
+    try:
+        if args.lease_name:
+            if target_epoch is None:
+                log.error("--lease-dir --lease needs --for or --until (lease files always expire).")
+                return 2
+            nodes = [n for text in (args.lease_nodes or []) for n in text.replace(" ", "").split(",") if n]
+            path = write_lease_file(directory, args.lease_name, target_epoch, nodes)
+            until = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(target_epoch))
+            print(f"Lease {args.lease_name}: until {until} for {', '.join(nodes) or 'all nodes'} ({path})", flush=True)
+        elif args.release_name:
+            removed = remove_lease_file(directory, args.release_name)
+            print(f"Lease {args.release_name}: {'released' if removed else 'was not open'}", flush=True)
+        else:
+            names = sorted(n for n in os.listdir(directory) if n.endswith(LEASE_FILE_SUFFIX))
+            print(f"{len(names)} lease file(s)", flush=True)
+            for file_name in names:
+                try:
+                    with open(os.path.join(directory, file_name), "r", encoding="utf-8") as f:
+                        epoch, nodes = parse_lease_text(f.read(4096))
+                    state = "expired" if epoch <= time.time() else "until " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+                    print(f"  {file_name[:-len(LEASE_FILE_SUFFIX)]}: {state} for {', '.join(nodes) if nodes else 'all nodes'}", flush=True)
+                except (OSError, ValueError) as e:
+                    print(f"  {file_name}: unreadable ({e})", flush=True)
+    except (OSError, ValueError) as e:
+        log.error("--lease-dir: %s", e)
+        return 2
+    return 0
+
+def _lease_client(args, target_epoch: float | None, heartbeat_secs: int | None = None) -> int:
     """
-    if not text or not str(text).strip():
-        raise ValueError("Empty --until value")
-    m = _RE_UNTIL_TOKEN.match(text)
-    if not m:
-        raise ValueError(
-            "Invalid --until format. Use: YYYY-MM-DD HH:MM:SS (24h), "
-            "with optional extra spaces and 1–2 digit M/D/h/m/s."
-        )
-    y, mon, d, hh, mm, ss = (int(m.group(i)) for i in range(1, 7))
-    # Calendar validation (e.g., rejects 2025-02-31). This *does not* apply a timezone yet.
+    --lease / --beat / --release / --leases: one request to the running lease server. The key
+    "open" hands back is kept in a per-user file, so later --lease/--beat/--release calls for
+    the same NAME (from the same user) can prove they own it.
+    """
+    port = args.lease_port
     try:
-        dt = datetime(year=y, month=mon, day=d, hour=hh, minute=mm, second=ss)
-    except ValueError as e:
-        raise ValueError(f"Invalid calendar date/time in --until: {e}") from e
-    # Two-pass mktime round-trip:
-    # Build tm tuples with tm_isdst fixed to 0 or 1 (wday/yday=-1 lets C lib compute them).
-    def _epoch_if_roundtrips(isdst_flag: int) -> float | None:
-        tup = (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, -1, -1, isdst_flag)
+        if args.lease_name:
+            fields = {"name": args.lease_name, "key": load_lease_key(port, args.lease_name)}
+            if target_epoch is not None:
+                fields["until"] = target_epoch
+            if heartbeat_secs is not None:
+                fields["heartbeat"] = heartbeat_secs
+                if args.heartbeat_file:
+                    fields["heartbeat_file"] = os.path.abspath(args.heartbeat_file)
+            reply = lease_request("open", port, **fields)
+        elif args.beat_name:
+            reply = lease_request("beat", port, name=args.beat_name, key=load_lease_key(port, args.beat_name))
+        elif args.release_name:
+            reply = lease_request("close", port, name=args.release_name, key=load_lease_key(port, args.release_name))
+        else:
+            reply = lease_request("list", port)
+    except OSError as e:
+        log.error("No lease server on %s:%s (%s); start one with --serve.", LEASE_SERVER_HOST, args.lease_port, e)
+        return 1
+    if not reply.get("ok"):
+        log.error("Lease server: %s", reply.get('error'))
+        return 2
+    def describe(lease):
+        deadline = lease.get("deadline")
+        until = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(deadline)) if deadline else "released"
+        beat = f", heartbeat {lease['heartbeat']}s" if lease.get("heartbeat") else ""
+        return f"{lease['name']}: until {until}{beat}"
+    if args.lease_name:
         try:
-            epoch = time.mktime(tup)  # interpret as *local* time with explicit DST hint
-        except (OverflowError, OSError):
-            return None
-        lt = time.localtime(epoch)
-        # Only accept if the wall time truly round-trips to the same civil components.
-        if (lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour, lt.tm_min, lt.tm_sec) == (
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second
-        ):
-            return float(epoch)
-        return None
-    epoch_std = _epoch_if_roundtrips(0)  # prefer "standard" interpretation
-    epoch_dst = _epoch_if_roundtrips(1)  # prefer "daylight" interpretation
-    if epoch_std is None and epoch_dst is None:
-        # e.g., "spring forward" gap
-        raise ValueError("--until is not a valid local wall-clock time on this system (nonexistent due to DST transition).")
-    if epoch_std is not None and epoch_dst is not None:
-        # Both interpretations are valid but map to *different* instants -> ambiguous fall-back hour
-        if abs(epoch_std - epoch_dst) >= 1.0:
-            raise ValueError("--until is ambiguous (falls in the repeated DST hour). Please choose a different time.")
-        # If they’re somehow equal (rare/no-DST zones), accept either
-        return epoch_std
-    # Exactly one pass valid -> use it
-    return epoch_std if epoch_std is not None else epoch_dst
+            save_lease_key(port, args.lease_name, reply["key"])
+        except OSError as e:
+            log.warning("Lease %s: could not save its key (%s); --beat/--release will be refused.", args.lease_name, e)
+        print(f"Lease {describe(reply['lease'])}", flush=True)
+    elif args.beat_name:
+        if not reply.get("renewed"):
+            log.error("Lease %s: no such heartbeat lease (re-open it with --lease --heartbeat)", args.beat_name)
+            return 2
+    elif args.release_name:
+        forget_lease_key(port, args.release_name)
+        print(f"Lease {args.release_name}: {'released' if reply.get('closed') else 'was not open'}", flush=True)
+    else:
+        leases = reply.get("leases") or []
+        print(f"{len(leases)} open lease(s)", flush=True)
+        for lease in sorted(leases, key=lambda l: l["name"]):
+            print(f"  {describe(lease)}", flush=True)
+    return 0
+
+def _resume_app(journal) -> None:
+    """--resume: re-acquire and re-arm straight from the journal (no argument parsing or re-validation)."""
+    state = journal.load()
+    if not state or state.get("kind") != "app":
+        log.info("--resume: nothing to resume (%s not found).", journal.path)
+        sys.exit(0)
+    target_epoch = state.get("target_epoch")
+    if target_epoch is not None and target_epoch <= time.time():
+        log.info('--resume: the deadline (%s) has already passed.', time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(target_epoch)))
+        journal.clear()
+        sys.exit(0)
+    if target_epoch is None and state.get("holds"):
+        # "awake while <pid/command>" can't be resumed: those belonged to the crashed instance
+        log.info("--resume: nothing to resume (it was held by %s, with no deadline).", ', '.join(state['holds']))
+        journal.clear()
+        sys.exit(0)
+    until = "no deadline" if target_epoch is None else time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(target_epoch))
+    log.info("--resume: resuming from %s (until %s, was PID %s, mode %s).", journal.path, until, state.get('pid'), state.get('mode'))
+    app = None
+    try:
+        app = Stay_AwakeTrayApp(
+            icon_override_path=state.get("icon"),
+            auto_quit_seconds=state.get("auto_quit_seconds"),
+            auto_quit_target_epoch=target_epoch,
+            show_gui=bool(state.get("show_gui", True)),
+            journal=journal,
+        )
+        app.run()
+    except KeyboardInterrupt:
+        log.info("Interrupted by user")
+    finally:
+        if app is not None:
+            app.cleanup()
 
 # -------------------- CLI: main --------------------
 
+def _split_run_argv(argv: list[str]) -> tuple[list[str], list[str] | None]:
+    """
+    (options, command after --run or None). Only a token argparse would parse as the --run
+    option counts: a bare "--run" before any standalone "--" (after "--" everything is an
+    argument). An option's value is never a bare "--run" to argparse (values can't look like
+    options), and "--opt=--run" is a single token, so neither is split.
+    """
+    for i, tok in enumerate(argv):
+        if tok == "--":
+            break
+        if tok == "--run":
+            return argv[:i], argv[i + 1:]
+    return argv, None
+
 def main():
     # ---------- CLI parsing ----------
     parser = argparse.ArgumentParser(description="Stay_Awake system tray tool")
@@ -22294,8 +23642,75 @@ def main():
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--for", dest="for_duration", metavar="DURATION", help="Auto-quit after duration (e.g., 45m, 2h, 1h30m, 3600s, 3d4h5s). Bare number = minutes. Use 0 to disable.")
     group.add_argument("--until", dest="until_timestamp", metavar='"YYYY-MM-DD HH:MM:SS"', help='Local wall-time to auto-quit (24h). Example: "2025-01-02 23:22:21". Relaxed spacing and 1–2 digit M/D/h/m/s allowed.')
+    # Repeatable hold condition, combines with --for/--until (which then act as an upper bound)
+    parser.add_argument("--while-pid", dest="while_pids", metavar="PID", type=int, action="append", help="Stay awake while this process is running; quit once every listed PID has exited (repeatable). Combines with --for/--until as an upper bound.")
+    parser.add_argument("--while-dir-nonempty", dest="while_dirs", metavar="PATH", action="append", help="Stay awake while this directory has any entries; clears once it has stayed empty for --settle (repeatable).")
+    parser.add_argument("--while-file-growing", dest="while_files", metavar="PATH", action="append", help="Stay awake while this file keeps changing; clears once it has been unchanged for --settle (repeatable).")
+    parser.add_argument("--while-connections", dest="while_connections", metavar="PORT[,PORT]", action="append", help="Stay awake while established TCP sessions exist on these local ports (e.g. 22,3389); clears after --settle with none (repeatable).")
+    parser.add_argument("--settle", dest="settle_duration", metavar="DURATION", default=None, help=f"Quiet/grace time before a --while-dir-nonempty/--while-file-growing/--while-connections condition clears (default {FS_SETTLE_DEFAULT_SECS}s; same syntax as --for).")
+    parser.add_argument("--no-gui", dest="no_gui", action="store_true", help="No window and no tray icon (console only).")
+    parser.add_argument("--diagnostics", dest="diagnostics", action="store_true", help="Show CPU time, memory (RSS), threads and timer wakeups per hour in the window (refreshed only while it is visible).")
+    parser.add_argument("--tray-progress", dest="tray_progress", action="store_true", help=f"With --for/--until: draw a ring around the tray icon that fills as the run passes (updated in {TRAY_PROGRESS_STEPS} steps).")
+    # Lease server: one process, one wake lock, many named leases (stay_awake/leases.py)
+    lease_group = parser.add_mutually_exclusive_group()
+    lease_group.add_argument("--serve", dest="serve", action="store_true", help="Run the lease server (console only): stay awake exactly while any client lease is open.")
+    lease_group.add_argument("--lease", dest="lease_name", metavar="NAME", help="Open (or renew) lease NAME on the running lease server for --for/--until (none = until released), then exit.")
+    lease_group.add_argument("--beat", dest="beat_name", metavar="NAME", help="Send a heartbeat for lease NAME to the running lease server, then exit.")
+    lease_group.add_argument("--release", dest="release_name", metavar="NAME", help="Release lease NAME on the running lease server, then exit.")
+    lease_group.add_argument("--leases", dest="list_leases", action="store_true", help="List the running lease server's open leases, then exit.")
+    parser.add_argument("--heartbeat", dest="heartbeat_duration", metavar="DURATION", help="Release the claim once the client has not sent a heartbeat for DURATION (same syntax as --for): touch --heartbeat-file, or --beat a --lease.")
+    parser.add_argument("--heartbeat-file", dest="heartbeat_file", metavar="PATH", help="File whose modification time is the client's heartbeat (the client touches it periodically).")
+    parser.add_argument("--lease-dir", dest="lease_dir", metavar="PATH", help="Shared lease directory: alone, stay awake while any unexpired lease file there targets this node; with --lease/--release/--leases, edit/list it instead of a lease server.")
+    parser.add_argument("--node", dest="node_name", metavar="NAME", help="This machine's node name for --lease-dir (default: the host name).")
+    parser.add_argument("--nodes", dest="lease_nodes", metavar="NAME[,NAME]", action="append", help="Nodes a --lease-dir --lease targets (default: all).")
+    parser.add_argument("--journal", dest="journal_path", metavar="PATH", nargs="?", const="", help="Keep a crash-safe journal of the deadline, wake mode and leases (default: in the per-user state folder) for --resume.")
+    parser.add_argument("--resume", dest="resume", action="store_true", help="Resume a killed/crashed instance from its journal (--journal PATH if it wasn't the default): re-acquire and re-arm from the stored deadline. With --serve, restore its leases.")
+    parser.add_argument("--metrics-file", dest="metrics_file", metavar="PATH", help="Write Prometheus text-format metrics to PATH, atomically rewritten every --metrics-interval (e.g. into a node_exporter/windows_exporter textfile collector folder).")
+    parser.add_argument("--metrics-port", dest="metrics_port", metavar="PORT", type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics (localhost only; rendered per scrape).")
+    parser.add_argument("--metrics-interval", dest="metrics_interval", metavar="DURATION", help=f"How often --metrics-file is rewritten (default {METRICS_INTERVAL_DEFAULT_SECS // 60}m, minimum {METRICS_INTERVAL_MIN_SECS}s; same syntax as --for).")
+    parser.add_argument("--log-level", dest="log_level", metavar="LEVEL", default="INFO", type=str.upper, choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Console/log-file verbosity: DEBUG, INFO (default), WARNING or ERROR.")
+    parser.add_argument("--log-file", dest="log_file", metavar="PATH", help=f"Also log to PATH (with timestamps; rotated at {LOG_FILE_MAX_BYTES // 1_000_000} MB, {LOG_FILE_BACKUPS} backups). Handy under pythonw / the windowed EXE, which have no console.")
+    parser.add_argument("--profile", dest="profile_duration", metavar="DURATION", nargs="?", const="", help=f"Profile startup plus DURATION of steady state (default {PROFILE_DEFAULT_SECS // 60}m; same syntax as --for), then write a .prof file and a .prof.txt summary of the top functions.")
+    parser.add_argument("--profile-file", dest="profile_file", metavar="PATH", help="Where --profile writes its pstats file (PATH.txt gets the summary). Default: Stay_Awake-<time>-<pid>.prof in the temp folder.")
+    parser.add_argument("--profile-memory", dest="profile_memory", action="store_true", help="With --profile: also trace allocations (tracemalloc) and report the peak and top allocation sites. Slower.")
+    parser.add_argument("--port", dest="lease_port", metavar="PORT", type=int, default=LEASE_SERVER_PORT, help=f"Localhost port of the lease server (default {LEASE_SERVER_PORT}).")
+    # --run takes the REST of the command line verbatim, so split it off before argparse sees it
+    parser.add_argument("--run", dest="run_command", metavar="-- CMD [ARGS...]", nargs="?", help="Run CMD (must be the last option) and stay awake exactly while it runs; exit with its exit code.")
+    argv, run_command = _split_run_argv(sys.argv[1:])
+    if run_command is not None:
+        if run_command[:1] == ["--"]:
+            run_command = run_command[1:]
+        if not run_command:
+            parser.error("--run needs a command, e.g.: --run -- robocopy C:\\src D:\\dst /MIR")
     # grab the commandline and parse it
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    #
+    # ----- Logging (first, so every message below goes through the queue) -----
+    start_logging(args.log_level, args.log_file)
+    #
+    # ----- Handle --profile (next, so startup is inside the profile) -----
+    profiler = None
+    if args.profile_duration is not None:
+        profiler = _start_profile(args)
+    elif args.profile_file or args.profile_memory:
+        log.error("--profile-file / --profile-memory need --profile.")
+        sys.exit(2)
+    #
+    # ----- Handle --journal / --resume -----
+    journal = None
+    if args.journal_path is not None or args.resume:
+        kind = f"serve-{args.lease_port}" if args.serve else "app"
+        journal = DeadlineJournal(args.journal_path or default_journal_path(kind))
+        owner = journal.live_owner()
+        if owner is not None:
+            if args.resume:
+                log.error("--resume: %s belongs to a Stay_Awake that is still running (PID %s); nothing to resume.", journal.path, owner)
+            else:
+                log.error("--journal: %s is in use by a running Stay_Awake (PID %s); give this instance its own --journal PATH.", journal.path, owner)
+            sys.exit(2)
+    if args.resume and not args.serve:
+        _resume_app(journal)   # skips all other argument handling by design
+        return
     #
     auto_secs: int | None = None
     auto_target_epoch: float | None = None
@@ -22305,50 +23720,172 @@ def main():
         try:
             target_epoch = parse_until_to_epoch(args.until_timestamp)
         except ValueError as e:
-            print(f"Invalid --until value: {e}", flush=True)
+            log.error("Invalid --until value: %s", e)
             sys.exit(2)
-        now_ceil = math.ceil(time.time())
-        secs = int(target_epoch - now_ceil)
-        if secs < MIN_AUTO_QUIT_SECS:
-            print(f"--until must be at least {MIN_AUTO_QUIT_SECS} seconds in the future (got {secs}s).", flush=True)
-            sys.exit(2)
-        if secs > MAX_AUTO_QUIT_SECS:
-            days = MAX_AUTO_QUIT_SECS // 86400
-            print(f"--until must be within {days} days from now.", flush=True)
+        try:
+            secs = check_until_epoch(target_epoch)
+        except ValueError as e:
+            log.error("%s", e)
             sys.exit(2)
         auto_secs = secs
         auto_target_epoch = target_epoch
-        d, r = divmod(secs, 86400); h, r = divmod(r, 3600); m, s = divmod(r, 60)
-        pretty = (f"{d}d {h:02d}:{m:02d}:{s:02d}") if d else (f"{h:02d}:{m:02d}:{s:02d}")
-        print(f'--until: will auto-quit at {time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(target_epoch))} ({pretty} from now).', flush=True)
+        pretty = format_dhms(secs)
+        if not args.lease_name:   # with --lease the deadline is the lease's, reported by the client below
+            log.info('--until: will auto-quit at %s (%s from now).', time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(target_epoch)), pretty)
     # ----- Handle --for -----
     elif args.for_duration:
         try:
             secs = parse_duration_to_seconds(args.for_duration)
         except ValueError as e:
-            print(f"Invalid --for value: {e}", flush=True)
+            log.error("Invalid --for value: %s", e)
             sys.exit(2)
         if secs == 0:
             # Zero 0 disables auto-quit
-            print("--for: 0 seconds specified, auto-quit is disabled", flush=True)
+            log.info("--for: 0 seconds specified, auto-quit is disabled")
             auto_secs = None
         else:
             # Enforce bounds
-            if secs < MIN_AUTO_QUIT_SECS:
-                print(f"--for must be at least {MIN_AUTO_QUIT_SECS} seconds (got {secs}s).", flush=True)
-                sys.exit(2)
-            if secs > MAX_AUTO_QUIT_SECS:
-                days = MAX_AUTO_QUIT_SECS // 86400
-                print(f"--for cannot exceed {days} days (got ~{secs/86400:.1f} days).", flush=True)
+            try:
+                check_for_seconds(secs)
+            except ValueError as e:
+                log.error("%s", e)
                 sys.exit(2)
             # Record the original seconds and compute a target epoch from NOW (rounded up),
             # so run() can re-ceil precisely just before arming the timer—same as --until.
             now_ceil = math.ceil(time.time())
             auto_target_epoch = float(now_ceil + secs)
             auto_secs = secs
-            d, r = divmod(secs, 86400); h, r = divmod(r, 3600); m, s = divmod(r, 60)
-            pretty = (f"{d}d {h:02d}:{m:02d}:{s:02d}") if d else (f"{h:02d}:{m:02d}:{s:02d}")
-            print(f"--for: will auto-quit after {secs} seconds ({pretty}).", flush=True)
+            pretty = format_dhms(secs)
+            if not args.lease_name:
+                log.info("--for: will auto-quit after %s seconds (%s).", secs, pretty)
+    # ----- Handle --serve / --lease / --release / --leases -----
+    if args.serve:
+        if auto_secs is not None or run_command or args.heartbeat_duration or args.lease_dir or args.while_pids or args.while_dirs or args.while_files or args.while_connections:
+            log.error("--serve takes no --for/--until, --heartbeat, --lease-dir, --while-* or --run: each lease carries its own.")
+            sys.exit(2)
+        sys.exit(_serve_leases(args.lease_port, journal=journal, resume=args.resume))
+    # ----- Handle --heartbeat / --heartbeat-file -----
+    heartbeat_secs: int | None = None
+    if args.heartbeat_duration is not None:
+        try:
+            heartbeat_secs = parse_duration_to_seconds(args.heartbeat_duration)
+        except ValueError as e:
+            log.error("Invalid --heartbeat value: %s", e)
+            sys.exit(2)
+        try:
+            check_heartbeat_secs(heartbeat_secs)
+        except ValueError as e:
+            log.error("%s", e)
+            sys.exit(2)
+    elif args.heartbeat_file:
+        log.error("--heartbeat-file needs --heartbeat DURATION (the missed-heartbeat timeout).")
+        sys.exit(2)
+    if heartbeat_secs is not None and not args.lease_name and not args.heartbeat_file:
+        log.error("--heartbeat needs --heartbeat-file PATH (or --lease NAME on a lease server).")
+        sys.exit(2)
+    # ----- Handle --lease-dir (shared lease directory) -----
+    if args.lease_dir:
+        if not os.path.isdir(args.lease_dir):
+            log.error("--lease-dir: not a directory: %s", args.lease_dir)
+            sys.exit(2)
+        if args.beat_name or heartbeat_secs is not None:
+            log.error("--lease-dir leases are plain files: no --beat or --heartbeat.")
+            sys.exit(2)
+        if args.lease_name or args.release_name or args.list_leases:
+            sys.exit(_lease_dir_client(args, auto_target_epoch))
+        if auto_secs is not None or run_command or args.while_pids or args.while_dirs or args.while_files or args.while_connections:
+            log.error("--lease-dir (watching) takes no --for/--until, --while-* or --run: each lease file carries its own deadline.")
+            sys.exit(2)
+        sys.exit(_watch_lease_dir(args.lease_dir, args.node_name))
+    if args.lease_name or args.beat_name or args.release_name or args.list_leases:
+        sys.exit(_lease_client(args, auto_target_epoch, heartbeat_secs))
+    heartbeat = None
+    if heartbeat_secs is not None:
+        heartbeat = (os.path.abspath(args.heartbeat_file), heartbeat_secs)
+        log.info("--heartbeat: will quit if %s goes %ss without being touched.", args.heartbeat_file, heartbeat_secs)
+    # ----- Handle --while-pid -----
+    hold_conditions: list[tuple[str, Callable[[], None]]] = []
+    if args.while_pids:
+        pids = sorted(set(args.while_pids))
+        for pid in pids:
+            if pid == os.getpid():
+                log.error("--while-pid cannot be Stay_Awake's own PID (%s).", pid)
+                sys.exit(2)
+            if not pid_exists(pid):
+                log.error("--while-pid: no running process with PID %s.", pid)
+                sys.exit(2)
+        pid_list = ", ".join(str(pid) for pid in pids)
+        hold_conditions.append((f"PID {pid_list} running", lambda: wait_for_pids_exit(pids)))
+        log.info("--while-pid: will stay awake until PID(s) %s have exited.", pid_list)
+    # ----- Handle --while-dir-nonempty / --while-file-growing / --settle -----
+    settle_secs = FS_SETTLE_DEFAULT_SECS
+    if args.settle_duration is not None:
+        try:
+            settle_secs = parse_duration_to_seconds(args.settle_duration)
+        except ValueError as e:
+            log.error("Invalid --settle value: %s", e)
+            sys.exit(2)
+        if settle_secs < 1 or settle_secs > MAX_AUTO_QUIT_SECS:
+            log.error("--settle must be between 1 second and %s days (got %ss).", MAX_AUTO_QUIT_SECS // 86400, settle_secs)
+            sys.exit(2)
+    for path in args.while_dirs or []:
+        if not os.path.isdir(path):
+            log.error("--while-dir-nonempty: not a directory: %s", path)
+            sys.exit(2)
+        hold_conditions.append((f"{path} not empty", lambda p=path: wait_while_dir_nonempty(p, settle_secs)))
+        log.info("--while-dir-nonempty: will stay awake until %s has been empty for %ss.", path, settle_secs)
+    for path in args.while_files or []:
+        if not os.path.isfile(path):
+            log.error("--while-file-growing: not a file: %s", path)
+            sys.exit(2)
+        hold_conditions.append((f"{Path(path).name} growing", lambda p=path: wait_while_file_growing(p, settle_secs)))
+        log.info("--while-file-growing: will stay awake until %s has been unchanged for %ss.", path, settle_secs)
+    # ----- Handle --while-connections -----
+    if args.while_connections:
+        try:
+            ports = sorted({p for text in args.while_connections for p in parse_port_list(text)})
+        except ValueError as e:
+            log.error("Invalid --while-connections value: %s", e)
+            sys.exit(2)
+        if default_tcp_connection_source() is None:
+            log.error("--while-connections is only supported on Windows and Linux.")
+            sys.exit(2)
+        port_list = ", ".join(str(p) for p in ports)
+        hold_conditions.append((f"TCP sessions on port {port_list}", lambda: wait_while_connections(ports, settle_secs)))
+        log.info("--while-connections: will stay awake until port(s) %s have had no sessions for %ss.", port_list, settle_secs)
+    # ----- Handle --metrics-file / --metrics-port / --metrics-interval -----
+    metrics = None
+    if args.metrics_file or args.metrics_port is not None:
+        interval = METRICS_INTERVAL_DEFAULT_SECS
+        if args.metrics_interval is not None:
+            try:
+                interval = parse_duration_to_seconds(args.metrics_interval)
+            except ValueError as e:
+                log.error("Invalid --metrics-interval value: %s", e)
+                sys.exit(2)
+            if interval < METRICS_INTERVAL_MIN_SECS:
+                log.error("--metrics-interval must be at least %s seconds (got %ss).", METRICS_INTERVAL_MIN_SECS, interval)
+                sys.exit(2)
+        if args.metrics_port is not None and not 1 <= args.metrics_port <= 65535:
+            log.error("--metrics-port must be between 1 and 65535 (got %s).", args.metrics_port)
+            sys.exit(2)
+        metrics_file = os.path.abspath(args.metrics_file) if args.metrics_file else None
+        if metrics_file and not os.path.isdir(os.path.dirname(metrics_file)):
+            log.error("--metrics-file: folder does not exist: %s", os.path.dirname(metrics_file))
+            sys.exit(2)
+        metrics = (metrics_file, args.metrics_port, interval)
+    elif args.metrics_interval is not None:
+        log.error("--metrics-interval needs --metrics-file or --metrics-port.")
+        sys.exit(2)
+    if args.diagnostics and args.no_gui:
+        log.error("--diagnostics shows its figures in the window; it can't be combined with --no-gui (use --metrics-file / --metrics-port).")
+        sys.exit(2)
+    if args.tray_progress and args.no_gui:
+        log.error("--tray-progress draws on the tray icon; it can't be combined with --no-gui.")
+        sys.exit(2)
+    if args.tray_progress and auto_secs is None:
+        log.error("--tray-progress needs --for or --until (a run with an end to show progress towards).")
+        sys.exit(2)
     # ----- Launch app -----
     # define app = None BEFORE  the try: so finally can safely reference it even if construction failed early.
     app = None
@@ -22358,21 +23895,30 @@ def main():
             icon_override_path=args.icon_path,
             auto_quit_seconds=auto_secs,
             auto_quit_target_epoch=auto_target_epoch,
+            hold_conditions=hold_conditions,
+            run_command=run_command,
+            show_gui=not args.no_gui,
+            show_diagnostics=args.diagnostics,
+            tray_progress=args.tray_progress,
+            heartbeat=heartbeat,
+            journal=journal,
+            metrics=metrics,
         )
+        if profiler is not None:
+            # Python < 3.12: only the main (Tk) thread can switch its profiler off
+            profiler.run_on_owner = app.run_on_tk
         app.run()
     except KeyboardInterrupt:
         # In practice, your SIGINT handler already calls quit; this is a nice message if Ctrl+C occurs pre-GUI.
-        print("\nInterrupted by user", flush=True)
+        log.info("Interrupted by user")
     except SystemExit:
         # Let explicit sys.exit() propagate (e.g., CLI validation exits)
         raise
     except Exception as e:
-        # SHOW traceback if you prefer:
-        traceback.print_exc()
-        print(f"Unexpected error: {e}", flush=True)
+        log.exception("Unexpected error: %s", e)
     finally:
         # Best-effort, idempotent cleanup (safe even if atexit will also run).
-        print("Final cleanup...", flush=True)
+        log.info("Final cleanup...")
         try:
             if app is not None:
                 app.cleanup()
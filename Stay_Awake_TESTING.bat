@@ -105,5 +105,22 @@ echo !TIME!
 echo python .\Stay_Awake.py --for 01s
 python .\Stay_Awake.py --for 09s
 
+pause
+
+echo TEST 8.1 --run: stays awake exactly while the child runs, then exits with ITS exit code
+REM expect: child output streams through, lock released right after "child exited with code 3", ERRORLEVEL 3
+echo !TIME!
+echo python .\Stay_Awake.py --run -- cmd /c "ping -n 15 127.0.0.1 & exit /b 3"
+python .\Stay_Awake.py --run -- cmd /c "ping -n 15 127.0.0.1 & exit /b 3"
+echo ERRORLEVEL=!ERRORLEVEL!
+
+pause
+
+echo TEST 8.2 --run with --no-gui and an upper bound (child left running after ~10s)
+echo !TIME!
+echo python .\Stay_Awake.py --no-gui --for 10s --run -- cmd /c "ping -n 30 127.0.0.1"
+python .\Stay_Awake.py --no-gui --for 10s --run -- cmd /c "ping -n 30 127.0.0.1"
+echo ERRORLEVEL=!ERRORLEVEL!
+
 pause
 exit
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# =============================================================================
+# benchmarks/bench_asynchold_loop_latency.py — event-loop lag: AsyncHold vs Hold.
+#
+# Runs n concurrent "hold the lock for 10 ms" tasks on one event loop while a probe task
+# measures how late its 1 ms sleeps wake up. The backend is a FakeBackend whose acquire and
+# release each cost 'latency' seconds (default 5 ms, about one D-Bus round-trip), so no
+# wakepy or OS calls are involved. AsyncHold runs those calls in the executor; the
+# synchronous Hold runs them on the loop and stalls everything else.
+#
+#   python benchmarks/bench_asynchold_loop_latency.py [--latency 0.005] [--tasks 100 1000]
+# =============================================================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stay_awake import AsyncHold
+from stay_awake.backends import FakeBackend
+from stay_awake.core import Hold
+
+async def _probe(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - t - 0.001)
+
+async def _one_async(latency: float) -> None:
+    async with AsyncHold(for_="1h", backend=FakeBackend(latency_secs=latency)):
+        await asyncio.sleep(0.01)
+
+async def _one_sync(latency: float) -> None:
+    with Hold(for_="1h", backend=FakeBackend(latency_secs=latency)):
+        await asyncio.sleep(0.01)
+
+async def _run(name: str, fn, n: int, latency: float) -> None:
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(fn(latency) for _ in range(n)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await probe
+    lags.sort()
+    print(f"  {name:10s} n={n:5d}  wall {wall:6.2f}s  loop lag p50 {statistics.median(lags) * 1000:6.2f} ms"
+          f"  p99 {lags[int(len(lags) * 0.99)] * 1000:7.2f} ms  max {lags[-1] * 1000:7.2f} ms")
+
+async def _main(args) -> None:
+    print(f"Loop lag with a {args.latency * 1000:g} ms backend call:")
+    for n in args.tasks:
+        await _run("AsyncHold", _one_async, n, args.latency)
+        await _run("Hold", _one_sync, n, args.latency)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Event-loop lag while many AsyncHold / Hold blocks run.")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per backend acquire/release")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100, 1000])
+    asyncio.run(_main(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
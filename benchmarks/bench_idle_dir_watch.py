@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# =============================================================================
+# benchmarks/bench_idle_dir_watch.py — idle CPU of --while-dir-nonempty.
+#
+# Fills a temp folder with N entries, then measures how much CPU the process burns in
+# 'secs' seconds while nothing in the folder changes, for:
+#   event   wait_while_dir_nonempty() as shipped (inotify / change notifications)
+#   stat    the same wait forced onto the stat-sampling fallback
+#   naive   os.listdir() every second (reference: what the event path replaces)
+# Each mode runs in its own child process so one can't skew another.
+#
+#   python benchmarks/bench_idle_dir_watch.py [--entries 200000] [--secs 10]
+# =============================================================================
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ("event", "stat", "naive")
+
+def _naive_wait(path: str, stop: threading.Event) -> None:
+    while not stop.is_set():
+        os.listdir(path)
+        stop.wait(1.0)
+
+def _measure(mode: str, path: str, secs: float) -> float:
+    """CPU milliseconds the process used in 'secs' seconds of watching 'path'."""
+    from stay_awake import conditions
+    if mode == "stat":
+        conditions._fs_change_waiter = lambda p, is_dir: conditions._StatSampleWaiter(p)
+    stop = threading.Event()
+    if mode == "naive":
+        target, args = _naive_wait, (path, stop)
+    else:
+        target, args = conditions.wait_while_dir_nonempty, (path, 60.0)
+    threading.Thread(target=target, args=args, daemon=True).start()   # never clears: folder stays full
+    time.sleep(0.5)   # let the watch get set up before the window opens
+    t0 = time.process_time()
+    time.sleep(secs)
+    used = time.process_time() - t0
+    stop.set()
+    return used * 1000.0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idle CPU of --while-dir-nonempty vs stat sampling vs naive listdir().")
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--secs", type=float, default=10.0)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(f"{_measure(args.child, args.dir, args.secs):.2f}")
+        return
+
+    folder = tempfile.mkdtemp(prefix="stay_awake_bench_")
+    try:
+        for i in range(args.entries):
+            open(os.path.join(folder, f"f{i:07d}"), "wb").close()
+        print(f"Idle CPU over {args.secs:g}s watching a {args.entries:,}-entry folder:")
+        for mode in MODES:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, "--dir", folder,
+                                  "--secs", str(args.secs)], check=True, capture_output=True, text=True).stdout
+            print(f"  {mode:6s} {float(out):10.2f} ms")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
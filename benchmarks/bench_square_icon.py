@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# =============================================================================
+# benchmarks/bench_square_icon.py — tray icon pad + downscale, 256px to 8K sources.
+#
+# For each source size and mode, times Stay_AwakeTrayApp._square_icon_image() (the
+# one-step pad + LANCZOS) against the route it replaces,
+# _resize_keep_aspect(_pad_to_square_edge_stretch(im), px), at the largest tray size, and
+# checks every tray size (TRAY_ICON_SIZES) for byte-identical output.
+# Needs what Stay_Awake.py needs (Pillow, pystray, wakepy).
+#
+#   python benchmarks/bench_square_icon.py [--modes RGB RGBA ...] [--repeat 3]
+# =============================================================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Stay_Awake as sa
+from stay_awake.dpi import TRAY_ICON_SIZES
+from stay_awake.renditions import RenditionCache
+
+SIZES = [(256, 171), (171, 256), (1024, 683), (1024, 857), (1920, 1080), (1080, 1920),
+         (4000, 3000), (3000, 4000), (7680, 4320), (4320, 7680)]
+MODES = ["RGB", "RGBA", "RGBA-partial", "L", "LA", "P", "1", "I;16", "CMYK"]
+
+def make_source(w: int, h: int, mode: str):
+    Image = sa.Image
+    noise = Image.effect_noise((w, h), 60).convert("L")
+    if mode == "I;16":
+        return noise.convert("I;16")
+    im = Image.merge("RGB", (noise, noise.transpose(Image.FLIP_TOP_BOTTOM), noise.transpose(Image.FLIP_LEFT_RIGHT)))
+    if mode == "RGBA-partial":
+        im = im.convert("RGBA")
+        im.putalpha(Image.linear_gradient("L").resize((w, h)))
+        return im
+    return im.convert(mode)
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tray icon pad + downscale: one-step shortcut vs pad-then-resize.")
+    parser.add_argument("--modes", nargs="+", default=["RGB", "RGBA", "RGBA-partial"], choices=MODES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sa._import_pil()
+    app = sa.Stay_AwakeTrayApp(show_gui=False, rendition_cache=RenditionCache(tempfile.mkdtemp()))
+    px = max(TRAY_ICON_SIZES)
+    print(f"{'source':>14} {'mode':13} {'pad+resize':>11} {'one step':>9}  identical")
+    for w, h in SIZES:
+        for mode in args.modes:
+            im = make_source(w, h, mode)
+            same = all(app._square_icon_image(im, s).tobytes()
+                       == app._resize_keep_aspect(app._pad_to_square_edge_stretch(im), s).tobytes()
+                       for s in TRAY_ICON_SIZES)
+            before = best_ms(lambda: app._resize_keep_aspect(app._pad_to_square_edge_stretch(im), px), args.repeat)
+            after = best_ms(lambda: app._square_icon_image(im, px), args.repeat)
+            print(f"{w:>6}x{h:<7} {mode:13} {before:9.1f}ms {after:7.1f}ms  {'yes' if same else 'NO'}", flush=True)
+            if not same:
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# =============================================================================
+# benchmarks/bench_window_image_startup.py — window image: Tk-native PNG path vs Pillow.
+#
+# Times the window-image work of a cold start and the process's resident memory growth,
+# each mode in a fresh child process (so Pillow is not imported yet):
+#   tk      what _tk_native_window_image() does: read the source, check the PNG header,
+#           hand it to Tk (tk.PhotoImage) - the decode itself only with a display
+#   pillow  what the Pillow path does: import, decode + LANCZOS (_window_rendition()), and
+#           the RGBA block copy ImageTk.PhotoImage makes before handing pixels to Tk
+# The source is a pre-sized PNG (<= MAX_DISPLAY_PX): --icon PATH, or a generated 512x428 one.
+# RSS is read from /proc (Linux); elsewhere only the times are shown.
+# Needs what Stay_Awake.py needs (Pillow, pystray, wakepy).
+#
+#   python benchmarks/bench_window_image_startup.py [--icon PATH] [--runs 5]
+# =============================================================================
+
+import argparse
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _rss() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _child(mode: str, icon: str) -> None:
+    import tkinter as tk
+
+    import Stay_Awake as sa
+    from stay_awake.renditions import RenditionCache
+    try:
+        root = tk.Tk()
+        root.withdraw()
+    except tk.TclError:
+        root = None                          # no display: time up to the hand-off to Tk
+    app = sa.Stay_AwakeTrayApp(show_gui=False, icon_override_path=icon,
+                               rendition_cache=RenditionCache(os.path.join(tempfile.mkdtemp(), "rc")))
+    app.main_window = root
+    rss0, t0 = _rss(), time.perf_counter()
+    if mode == "tk":
+        if root is not None:
+            photo = app._tk_native_window_image()
+            assert photo is not None
+        else:
+            _kind, path = app._first_source()
+            with open(path, "rb") as f:
+                head = f.read(33)
+                assert app._is_presized_png(head)
+                payload = head + f.read()
+            base64.b64encode(payload).decode("ascii")
+        assert "PIL" not in sys.modules
+    else:
+        pil = app._window_rendition()
+        sa._import_pil()
+        if root is not None:
+            sa.ImageTk.PhotoImage(pil)
+        else:
+            pil.load()
+            block = sa.Image.core.new_block("RGBA", pil.size)
+            pil.im.convert2(block, pil.im)
+    ms = (time.perf_counter() - t0) * 1000.0
+    rss1 = _rss()
+    grown = "" if rss0 is None or rss1 is None else f"{(rss1 - rss0) / 1e6:.1f}"
+    print(f"{ms:.2f} {grown} {'display' if root is not None else 'no-display'}")
+
+def _generated_png() -> str:
+    import Stay_Awake as sa
+    sa._import_pil()
+    Image = sa.Image
+    noise = Image.effect_noise((512, 428), 60).convert("L")
+    im = Image.merge("RGBA", (noise, noise.transpose(Image.FLIP_TOP_BOTTOM), noise.transpose(Image.FLIP_LEFT_RIGHT), noise))
+    path = os.path.join(tempfile.mkdtemp(), "presized.png")
+    im.save(path)
+    return path
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Window image at startup: Tk-native PNG path vs Pillow path.")
+    parser.add_argument("--icon", help="pre-sized PNG to load (default: a generated 512x428 RGBA PNG)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=("tk", "pillow"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.icon)
+        return
+
+    icon = os.path.abspath(args.icon) if args.icon else _generated_png()
+    print(f"Window image from {icon}, {args.runs} cold runs per mode:")
+    for mode in ("tk", "pillow"):
+        times, grown, where = [], [], ""
+        for _ in range(args.runs):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, "--icon", icon],
+                                 check=True, capture_output=True, text=True).stdout.split()
+            times.append(float(out[0]))
+            if len(out) == 3:
+                grown.append(float(out[1]))
+            where = out[-1]
+        rss = f", RSS +{min(grown):.1f}-{max(grown):.1f} MB" if grown else ""
+        print(f"  {mode:6s} {min(times):6.2f}-{max(times):6.2f} ms{rss}  ({where})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# =============================================================================
+# stay_awake — keep the machine awake from Python, without the GUI.
+#
+#   import stay_awake
+#
+#   with stay_awake.hold(for_="2h"):          # at most 2 hours (same syntax as --for)
+#       run_the_batch()
+#
+#   with stay_awake.hold_until(epoch):         # at most until a local epoch / datetime /
+#       run_the_batch()                        # "YYYY-MM-DD HH:MM:SS" (same rules as --until)
+#
+#   async with stay_awake.AsyncHold(for_="2h"):   # asyncio-native (stay_awake.aio)
+#       await run_the_batch()
+#
+# The same parsing, bounds checks and wakepy lifecycle as Stay_Awake.py, in-process.
+# Importing this package never pulls in tkinter, PIL or pystray.
+# The blocking "stay awake while ..." waits live in stay_awake.conditions; the
+# pluggable wake-lock backends (wakepy, fake, scripted failures) in stay_awake.backends;
+# the multi-client lease table/server (one lock, many named leases) in stay_awake.leases;
+# shared-directory leases for several machines in stay_awake.leasedir; the crash-safe
+# --resume journal in stay_awake.journal; Prometheus metrics export in stay_awake.metrics;
+# the --profile session profiler in stay_awake.profiling; the tray icon's DPI source in
+# stay_awake.dpi; the disk cache of window/tray image pixels in stay_awake.renditions;
+# the image file's change watcher in stay_awake.filewatch.
+# =============================================================================
+
+from .backends import (
+    FakeBackend,
+    ScriptedFailureBackend,
+    WakeBackend,
+    WakeLockError,
+    WakepyBackend,
+)
+from .core import (
+    MAX_AUTO_QUIT_SECS,
+    MIN_AUTO_QUIT_SECS,
+    Hold,
+    WakeLock,
+    check_for_seconds,
+    check_until_epoch,
+    format_dhms,
+    hold,
+    hold_until,
+    parse_duration_to_seconds,
+    parse_until_to_epoch,
+    resolve_deadline,
+)
+from .leases import LeaseKeyError, LeaseServer, LeaseTable, lease_request
+
+__all__ = [
+    "MAX_AUTO_QUIT_SECS",
+    "MIN_AUTO_QUIT_SECS",
+    "AsyncHold",
+    "FakeBackend",
+    "Hold",
+    "LeaseKeyError",
+    "LeaseServer",
+    "LeaseTable",
+    "ScriptedFailureBackend",
+    "WakeBackend",
+    "WakeLock",
+    "WakeLockError",
+    "WakepyBackend",
+    "check_for_seconds",
+    "check_until_epoch",
+    "format_dhms",
+    "hold",
+    "hold_until",
+    "lease_request",
+    "parse_duration_to_seconds",
+    "parse_until_to_epoch",
+    "resolve_deadline",
+]
+
+def __getattr__(name):
+    # AsyncHold is loaded on first use so plain `import stay_awake` doesn't import asyncio
+    if name == "AsyncHold":
+        from .aio import AsyncHold
+        return AsyncHold
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,87 @@
+# =============================================================================
+# stay_awake.aio — asyncio-native wake-lock holds.
+#
+#   import stay_awake
+#
+#   async with stay_awake.AsyncHold(for_="2h"):
+#       await run_the_batch()
+#
+# - Lock acquire/release (wakepy may talk to D-Bus / the Windows power API) run in the
+#   loop's default executor, so they never block the event loop.
+# - The --for/--until deadline is a task on the running loop (no threading.Timer).
+# - Cancellation-safe: if the awaiting task is cancelled while the lock is being
+#   acquired or released, the lock still ends up released.
+# =============================================================================
+
+import asyncio
+import time
+
+from .core import WakeLock, resolve_deadline
+
+class AsyncHold:
+    """
+    asyncio twin of stay_awake.core.Hold: a wake lock held for an ``async with`` block,
+    optionally capped by a --for/--until style deadline (the lock is released when the
+    deadline passes, even if the block is still running).
+    """
+    def __init__(self, for_=None, until=None, backend=None):
+        self.seconds, self.target_epoch = resolve_deadline(for_, until)
+        self.expired = False
+        self._lock = WakeLock(backend)
+        self._deadline_task = None
+
+    @property
+    def active(self) -> bool:
+        return self._lock.active
+
+    @property
+    def wake_lock(self) -> WakeLock:
+        return self._lock
+
+    def remaining(self) -> float | None:
+        """Seconds until the deadline (None if there is none)."""
+        if self.target_epoch is None:
+            return None
+        return max(0.0, self.target_epoch - time.time())
+
+    async def acquire(self) -> "AsyncHold":
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(None, self._lock.acquire)
+        try:
+            # shield: a cancelled caller must not abandon a half-finished acquire
+            await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # The executor job still completes; undo it once it has.
+            def _undo(f):
+                if not f.cancelled() and f.exception() is None:
+                    loop.run_in_executor(None, self._lock.release)
+            fut.add_done_callback(_undo)
+            raise
+        if self.target_epoch is not None:
+            # Re-ceil from NOW right before arming, like Stay_AwakeTrayApp.run()
+            delay = max(0.0, self.target_epoch - time.time())
+            self._deadline_task = loop.create_task(self._expire_after(delay))
+        return self
+
+    async def _expire_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self.expired = True
+        self._deadline_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self._lock.release)
+
+    async def release(self) -> None:
+        task, self._deadline_task = self._deadline_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if not self._lock.active:
+            return
+        fut = asyncio.get_running_loop().run_in_executor(None, self._lock.release)
+        # shield: cancelling the caller mid-release must not leave the lock held;
+        # the executor job runs to completion either way.
+        await asyncio.shield(fut)
+
+    async def __aenter__(self) -> "AsyncHold":
+        return await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.release()
@@ -0,0 +1,229 @@
+# =============================================================================
+# stay_awake.backends — what actually keeps the machine awake.
+#
+# WakeLock (stay_awake.core) drives a backend through three calls:
+#   acquire() -> mode name (str), or None if the OS accepted the call but the
+#                request is not actually in effect
+#   release() -> None
+#   verify()  -> bool: is the request still in effect? (cheap; polled by the watchdog)
+# and times/counts them. Backends:
+#   - WakepyBackend          the real one (wakepy keep.running()); the default
+#   - FakeBackend            in-memory, no OS calls: lifecycle/shutdown/timer code can be
+#                            exercised on any CI box in milliseconds
+#   - ScriptedFailureBackend FakeBackend whose acquires/releases fail as scripted
+# =============================================================================
+
+import abc
+import ctypes
+import os
+import sys
+import time
+
+# CallNtPowerInformation(SystemExecutionState) → EXECUTION_STATE flags of the whole system
+_WIN_SYSTEM_EXECUTION_STATE = 16
+_WIN_ES_SYSTEM_REQUIRED = 0x00000001
+# One D-Bus round trip per verify(); a hung session bus must not stall the watchdog
+DBUS_CALL_TIMEOUT_SECS = 2.0
+
+class WakeLockError(RuntimeError):
+    """A backend could not take or drop the wake lock."""
+
+class WakeBackend(abc.ABC):
+    """Interface for wake-lock backends (see module comment)."""
+    name = "base"
+
+    @abc.abstractmethod
+    def acquire(self) -> str | None:
+        ...
+
+    @abc.abstractmethod
+    def release(self) -> None:
+        ...
+
+    def verify(self) -> bool:
+        """True while the request is still in effect. Default: trust acquire()."""
+        return True
+
+_powrprof = None
+
+def _win_system_required() -> bool | None:
+    """Is ES_SYSTEM_REQUIRED currently in effect system-wide? None if it can't be queried."""
+    global _powrprof
+    try:
+        if _powrprof is None:
+            _powrprof = ctypes.WinDLL("powrprof")
+        powrprof = _powrprof
+        state = ctypes.c_ulong(0)
+        rc = powrprof.CallNtPowerInformation(_WIN_SYSTEM_EXECUTION_STATE, None, 0, ctypes.byref(state), ctypes.sizeof(state))
+    except (OSError, AttributeError):
+        return None
+    if rc != 0:
+        return None
+    return bool(state.value & _WIN_ES_SYSTEM_REQUIRED)
+
+# -------------------- Inhibitor sources (WakepyBackend.verify) --------------------
+#
+# An "inhibitor source" is a zero-arg callable returning the set of IDs of the inhibitors the
+# session currently lists, or None when it can't be asked right now. WakepyBackend diffs it
+# around wakepy's enter to learn which entry is ours, then verify() checks that entry is still
+# listed. Tests can pass e.g. lambda: set(session.cookies).
+
+def _gnome_session_inhibitors() -> set | None:
+    """Object paths from org.gnome.SessionManager.GetInhibitors() (gnome-session never reuses them)."""
+    try:
+        from jeepney import DBusAddress, new_method_call   # wakepy's own D-Bus library on Linux
+        from jeepney.io.blocking import open_dbus_connection
+        from jeepney.wrappers import unwrap_msg
+        addr = DBusAddress("/org/gnome/SessionManager", bus_name="org.gnome.SessionManager",
+                           interface="org.gnome.SessionManager")
+        with open_dbus_connection(bus="SESSION") as conn:
+            reply = conn.send_and_get_reply(new_method_call(addr, "GetInhibitors"), timeout=DBUS_CALL_TIMEOUT_SECS)
+        return set(unwrap_msg(reply)[0])
+    except Exception:   # no jeepney, no session bus, not a GNOME session, timeout: can't tell
+        return None
+
+def default_inhibitor_source():
+    """The session's inhibitor list for this platform, or None if there is none to ask."""
+    if sys.platform.startswith("linux"):
+        return _gnome_session_inhibitors
+    return None
+
+class WakepyBackend(WakeBackend):
+    """
+    wakepy keep.running(): prevents system sleep, allows display sleep.
+
+    verify() asks whether OUR request is still in effect where the platform can say:
+      - Linux (GNOME): our inhibitor object is still in the session manager's list; it goes
+        away if gnome-session restarts or drops us, even while other apps inhibit sleep.
+      - Windows: best effort. SystemExecutionState is system-wide, so another process holding
+        ES_SYSTEM_REQUIRED hides a loss of ours; Windows has no documented per-process query.
+      - Elsewhere (or no identifiable inhibitor, e.g. freedesktop PowerManagement cookies):
+        trusts wakepy's own "active" flag.
+    """
+    name = "wakepy"
+
+    def __init__(self, inhibitor_source=None, methods=None):
+        self._mode = None
+        self._inhibitor_source = inhibitor_source or default_inhibitor_source()
+        self._methods = methods     # wakepy method names to try (None = wakepy's defaults)
+        self._ours = None           # inhibitor IDs our acquire() added (None = couldn't tell)
+        self._owner = None          # the one thread that enters/exits wakepy modes
+
+    def _on_owner(self, fn):
+        # WakeLock is driven from the main, watchdog and lease threads, but a wakepy (>= 1.0)
+        # Mode must be exited on the thread, and in the context, it was entered in
+        if self._owner is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._owner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wakepy")
+        return self._owner.submit(fn).result()
+
+    def acquire(self) -> str | None:
+        return self._on_owner(self._acquire)
+
+    def release(self) -> None:
+        self._on_owner(self._release)
+
+    def _acquire(self) -> str | None:
+        from wakepy import keep   # deferred: `import stay_awake` must stay cheap
+        source = self._inhibitor_source
+        before = source() if source is not None else None
+        mode = keep.running(methods=self._methods) if self._methods else keep.running()
+        mode.__enter__()
+        self._mode = mode
+        after = source() if before is not None else None
+        # Anything another app added in the same instant is counted as ours too: if it goes
+        # away first, the watchdog re-acquires once for nothing (cheap), never misses our loss.
+        self._ours = ((after - before) or None) if after is not None else None
+        # wakepy >= 0.8 enters even when no method worked (on_fail="warn"); report that as None
+        if getattr(mode, "active", True) is False:
+            return None
+        method = getattr(mode, "active_method", None)
+        return str(getattr(method, "name", method) or self.name)
+
+    def _release(self) -> None:
+        mode, self._mode = self._mode, None
+        self._ours = None
+        if mode is not None:
+            mode.__exit__(None, None, None)
+
+    def verify(self) -> bool:
+        mode = self._mode
+        if mode is None or getattr(mode, "active", True) is False:
+            return False
+        if self._ours is not None:
+            listed = self._inhibitor_source()
+            # None = couldn't ask this time; trust wakepy rather than flap
+            return listed is None or self._ours <= listed
+        if os.name == "nt":
+            # Best effort, one syscall: does the system still see a "system required" request?
+            # (None = couldn't ask; trust wakepy rather than flap.)
+            return _win_system_required() is not False
+        return True
+
+class FakeBackend(WakeBackend):
+    """In-memory backend: records calls, never touches the OS. Optional simulated latency."""
+    name = "fake"
+
+    def __init__(self, mode: str = "fake", latency_secs: float = 0.0):
+        self.mode = mode
+        self.latency_secs = latency_secs
+        self.held = False
+        self.calls: list[str] = []
+
+    def acquire(self) -> str | None:
+        if self.latency_secs:
+            time.sleep(self.latency_secs)
+        self.calls.append("acquire")
+        self.held = True
+        return self.mode
+
+    def release(self) -> None:
+        if self.latency_secs:
+            time.sleep(self.latency_secs)
+        self.calls.append("release")
+        self.held = False
+
+    def verify(self) -> bool:
+        self.calls.append("verify")
+        return self.held
+
+    def drop(self) -> None:
+        """Simulate the OS dropping the request underneath us (e.g. a D-Bus inhibitor going away)."""
+        self.held = False
+
+class ScriptedFailureBackend(FakeBackend):
+    """
+    FakeBackend whose successive acquire()/release() calls follow a script. Each entry is
+    True (succeed), False (raise WakeLockError), None (acquire "succeeds" but is not in
+    effect) or an exception instance (raised as-is). Once a script runs out, calls succeed.
+        ScriptedFailureBackend(acquire_script=[OSError("D-Bus down"), True])
+    """
+    name = "scripted"
+
+    def __init__(self, acquire_script=(), release_script=(), mode: str = "scripted", latency_secs: float = 0.0):
+        super().__init__(mode=mode, latency_secs=latency_secs)
+        self._acquire_script = iter(acquire_script)
+        self._release_script = iter(release_script)
+
+    @staticmethod
+    def _outcome(script, what: str):
+        outcome = next(script, True)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome is False:
+            raise WakeLockError(f"scripted {what} failure")
+        return outcome
+
+    def acquire(self) -> str | None:
+        if self._outcome(self._acquire_script, "acquire") is None:
+            self.calls.append("acquire")
+            self.held = True
+            return None
+        return super().acquire()
+
+    def release(self) -> None:
+        self._outcome(self._release_script, "release")
+        super().release()
+
+def default_backend() -> WakeBackend:
+    return WakepyBackend()
@@ -0,0 +1,547 @@
+# =============================================================================
+# stay_awake.conditions — blocking "stay awake while ..." waits.
+#
+# Each wait_* function blocks the calling thread until its condition has cleared,
+# using the OS's event-driven primitives wherever they exist (no tight polling):
+#   - wait_for_pids_exit()         --while-pid
+#   - wait_while_dir_nonempty()    --while-dir-nonempty
+#   - wait_while_file_growing()    --while-file-growing
+#   - wait_while_connections()     --while-connections
+#   - wait_for_missed_heartbeat()  --heartbeat / --heartbeat-file (returns when the client stops touching a file)
+# Stay_AwakeTrayApp runs each one on a daemon thread as a "hold condition" and quits
+# once they have all returned. Nothing here imports tkinter, PIL or pystray.
+# =============================================================================
+
+import ctypes
+import logging
+import math
+import os
+import select  # for --while-pid event-driven process-exit waits (poll/kqueue)
+import socket  # for --while-connections (ntohs on Windows TCP tables)
+import struct
+import sys
+import time
+
+from .core import MAX_AUTO_QUIT_SECS
+
+log = logging.getLogger(__name__)
+
+# --while-pid: only used when no event-driven process-exit wait is available on this OS
+# (or a process can't be opened for waiting); the liveness probe then runs at this interval.
+PID_FALLBACK_POLL_SECS = 5.0
+#
+# --while-dir-nonempty / --while-file-growing:
+FS_SETTLE_DEFAULT_SECS = 60     # --settle default: condition must stay "done" this long before it clears
+FS_EVENT_COALESCE_SECS = 2.0    # after a change event, wait this long and swallow the burst (bounds wakeups while busy)
+FS_STAT_SAMPLE_SECS    = 5.0    # stat-sampling fallback interval (no inotify / change notifications)
+#
+# --while-connections: adaptive check interval bounds (doubling while sessions stay up)
+CONN_CHECK_MIN_SECS = 5.0
+CONN_CHECK_MAX_SECS = 60.0
+#
+# --heartbeat: shortest allowed missed-heartbeat timeout
+HEARTBEAT_MIN_SECS = 5
+
+# -------------------- Process exit (--while-pid) --------------------
+
+_WIN_SYNCHRONIZE = 0x00100000
+_WIN_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_WIN_ERROR_ACCESS_DENIED = 5
+_WIN_WAIT_TIMEOUT = 0x00000102
+_WIN_WAIT_FAILED = 0xFFFFFFFF
+_WIN_INFINITE = 0xFFFFFFFF
+_WIN_MAXIMUM_WAIT_OBJECTS = 64
+
+def _win_kernel32():
+    from ctypes import wintypes
+    k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    k32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    k32.OpenProcess.restype = wintypes.HANDLE
+    k32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+    k32.WaitForSingleObject.restype = wintypes.DWORD
+    k32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD]
+    k32.WaitForMultipleObjects.restype = wintypes.DWORD
+    k32.CloseHandle.argtypes = [wintypes.HANDLE]
+    k32.CloseHandle.restype = wintypes.BOOL
+    k32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+    k32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+    k32.FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+    k32.FindNextChangeNotification.restype = wintypes.BOOL
+    k32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+    k32.FindCloseChangeNotification.restype = wintypes.BOOL
+    return k32
+
+def pid_exists(pid: int) -> bool:
+    """True if a process with this PID is currently running (never signals or touches it)."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # NOTE: os.kill(pid, 0) on Windows would TerminateProcess() - never use it here.
+        k32 = _win_kernel32()
+        h = k32.OpenProcess(_WIN_SYNCHRONIZE | _WIN_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not h:
+            # Access denied means it exists but belongs to someone more privileged
+            return ctypes.get_last_error() == _WIN_ERROR_ACCESS_DENIED
+        try:
+            # A handle can still be opened on an exited process that others hold open
+            return k32.WaitForSingleObject(h, 0) == _WIN_WAIT_TIMEOUT
+        finally:
+            k32.CloseHandle(h)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _poll_pids_exit(pids) -> None:
+    """Last-resort fallback: coarse liveness probe every PID_FALLBACK_POLL_SECS."""
+    remaining = set(pids)
+    while remaining:
+        remaining = {pid for pid in remaining if pid_exists(pid)}
+        if remaining:
+            time.sleep(PID_FALLBACK_POLL_SECS)
+
+def _win_wait_pids_exit(pids) -> None:
+    from ctypes import wintypes
+    k32 = _win_kernel32()
+    handles = []
+    unopenable = []
+    for pid in pids:
+        h = k32.OpenProcess(_WIN_SYNCHRONIZE, False, pid)
+        if h:
+            handles.append(h)
+        elif ctypes.get_last_error() == _WIN_ERROR_ACCESS_DENIED:
+            unopenable.append(pid)   # exists, but we may not wait on it
+        # else: already gone
+    try:
+        # bWaitAll=TRUE: a single blocking wait per batch of (at most 64) handles.
+        for start in range(0, len(handles), _WIN_MAXIMUM_WAIT_OBJECTS):
+            batch = handles[start:start + _WIN_MAXIMUM_WAIT_OBJECTS]
+            arr = (wintypes.HANDLE * len(batch))(*batch)
+            rc = k32.WaitForMultipleObjects(len(batch), arr, True, _WIN_INFINITE)
+            if rc == _WIN_WAIT_FAILED:
+                raise ctypes.WinError(ctypes.get_last_error())
+    finally:
+        for h in handles:
+            k32.CloseHandle(h)
+    if unopenable:
+        _poll_pids_exit(unopenable)
+
+def _pidfd_wait_pids_exit(pids) -> None:
+    poller = select.poll()
+    fds: dict[int, int] = {}
+    try:
+        for pid in pids:
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue  # already gone
+            fds[fd] = pid
+            poller.register(fd, select.POLLIN)
+        # A pidfd becomes readable when its process terminates; poll() blocks with no timeout.
+        while fds:
+            for fd, _events in poller.poll():
+                poller.unregister(fd)
+                os.close(fd)
+                fds.pop(fd, None)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+def _kqueue_wait_pids_exit(pids) -> None:
+    kq = select.kqueue()
+    try:
+        remaining = set()
+        for pid in pids:
+            ev = select.kevent(pid, filter=select.KQ_FILTER_PROC,
+                               flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT, fflags=select.KQ_NOTE_EXIT)
+            try:
+                kq.control([ev], 0)
+            except ProcessLookupError:
+                continue  # already gone
+            remaining.add(pid)
+        while remaining:
+            for ev in kq.control(None, len(remaining)):
+                remaining.discard(ev.ident)
+    finally:
+        kq.close()
+
+def wait_for_pids_exit(pids) -> None:
+    """
+    Block until every process in 'pids' has exited - event-driven, no polling loop:
+      - Windows:   OpenProcess(SYNCHRONIZE) + WaitForMultipleObjects(bWaitAll=TRUE)
+      - Linux:     pidfd_open() + poll()   (kernel 5.3+, Python 3.9+)
+      - macOS/BSD: kqueue EVFILT_PROC / NOTE_EXIT
+    Falls back to a coarse liveness probe (PID_FALLBACK_POLL_SECS) only if none of those work.
+    """
+    pids = sorted(set(pids))
+    if not pids:
+        return
+    try:
+        if os.name == "nt":
+            return _win_wait_pids_exit(pids)
+        if hasattr(os, "pidfd_open"):
+            return _pidfd_wait_pids_exit(pids)
+        if hasattr(select, "kqueue"):
+            return _kqueue_wait_pids_exit(pids)
+    except OSError as e:
+        # e.g. ENOSYS from an old kernel, or a sandbox refusing pidfd/kqueue
+        log.warning("Event-driven process wait unavailable (%s); falling back to a %gs liveness probe.", e, PID_FALLBACK_POLL_SECS)
+    _poll_pids_exit(pids)
+
+# -------------------- Filesystem (--while-dir-nonempty / --while-file-growing) --------------------
+
+# inotify(7) masks
+_IN_MODIFY      = 0x00000002
+_IN_ATTRIB      = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM  = 0x00000040
+_IN_MOVED_TO    = 0x00000080
+_IN_CREATE      = 0x00000100
+_IN_DELETE      = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF   = 0x00000800
+# FindFirstChangeNotification filters
+_WIN_FILE_NOTIFY_CHANGE_FILE_NAME  = 0x00000001
+_WIN_FILE_NOTIFY_CHANGE_DIR_NAME   = 0x00000002
+_WIN_FILE_NOTIFY_CHANGE_SIZE       = 0x00000008
+_WIN_FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+_WIN_INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+class _StatSampleWaiter:
+    """Fallback change waiter: compare a cheap stat() signature every FS_STAT_SAMPLE_SECS."""
+    def __init__(self, path: str):
+        self.path = path
+        self._last = self._signature()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def wait(self, timeout: float | None) -> bool:
+        """Block until the signature changes (True) or 'timeout' seconds pass (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = FS_STAT_SAMPLE_SECS if deadline is None else min(FS_STAT_SAMPLE_SECS, deadline - time.monotonic())
+            if step <= 0:
+                return False
+            time.sleep(step)
+            sig = self._signature()
+            if sig != self._last:
+                self._last = sig
+                return True
+
+    def coalesce(self) -> None:
+        pass  # sampling is already coarse
+
+    def close(self) -> None:
+        pass
+
+class _InotifyWaiter:
+    """Linux change waiter: a single inotify watch; events are drained, not parsed (callers re-check state)."""
+    def __init__(self, path: str, mask: int):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err), path)
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+
+    def _drain(self) -> None:
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout: float | None) -> bool:
+        """Block in poll() until an event arrives (True) or 'timeout' seconds pass (False)."""
+        ms = None if timeout is None else max(0, int(math.ceil(timeout * 1000)))
+        if not self._poller.poll(ms):
+            return False
+        self._drain()
+        return True
+
+    def coalesce(self) -> None:
+        # Busy writers generate an event per write(); let the burst pile up (the kernel merges
+        # identical queued events) and swallow it in one read, bounding our wakeups.
+        time.sleep(FS_EVENT_COALESCE_SECS)
+        self._drain()
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+class _WinChangeWaiter:
+    """Windows change waiter: FindFirstChangeNotification on a directory (signals for any entry in it)."""
+    def __init__(self, folder: str, notify_filter: int):
+        self._k32 = _win_kernel32()
+        self._h = self._k32.FindFirstChangeNotificationW(folder, False, notify_filter)
+        if not self._h or self._h == _WIN_INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def wait(self, timeout: float | None) -> bool:
+        ms = _WIN_INFINITE if timeout is None else max(0, int(math.ceil(timeout * 1000)))
+        rc = self._k32.WaitForSingleObject(self._h, ms)
+        if rc == _WIN_WAIT_TIMEOUT:
+            return False
+        if rc == _WIN_WAIT_FAILED:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self._k32.FindNextChangeNotification(self._h)  # re-arm before the caller re-checks state
+        return True
+
+    def coalesce(self) -> None:
+        time.sleep(FS_EVENT_COALESCE_SECS)
+        if self._k32.WaitForSingleObject(self._h, 0) != _WIN_WAIT_TIMEOUT:
+            self._k32.FindNextChangeNotification(self._h)
+
+    def close(self) -> None:
+        self._k32.FindCloseChangeNotification(self._h)
+
+def _fs_change_waiter(path: str, is_dir: bool):
+    """Best available change waiter for 'path': inotify (Linux), change notifications (Windows), else stat sampling."""
+    try:
+        if sys.platform.startswith("linux"):
+            if is_dir:
+                mask = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+            else:
+                mask = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_DELETE_SELF | _IN_MOVE_SELF
+            return _InotifyWaiter(path, mask)
+        if os.name == "nt":
+            if is_dir:
+                return _WinChangeWaiter(path, _WIN_FILE_NOTIFY_CHANGE_FILE_NAME | _WIN_FILE_NOTIFY_CHANGE_DIR_NAME)
+            folder = os.path.dirname(os.path.abspath(path))
+            return _WinChangeWaiter(folder, _WIN_FILE_NOTIFY_CHANGE_SIZE | _WIN_FILE_NOTIFY_CHANGE_LAST_WRITE | _WIN_FILE_NOTIFY_CHANGE_FILE_NAME)
+    except (OSError, AttributeError) as e:
+        log.warning("Filesystem notifications unavailable for %s (%s); sampling every %gs instead.", path, e, FS_STAT_SAMPLE_SECS)
+    return _StatSampleWaiter(path)
+
+def saved_file_waiter(path: str):
+    """
+    Change waiter for a file that editors may save by writing a temp file and renaming it over
+    the old one (a watch on the file itself would die with the old inode): watches the folder
+    for finished writes and renames; callers compare the file's own stat signature.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    try:
+        if sys.platform.startswith("linux"):
+            return _InotifyWaiter(folder, _IN_CLOSE_WRITE | _IN_ATTRIB | _IN_CREATE | _IN_MOVED_TO | _IN_DELETE
+                                  | _IN_DELETE_SELF | _IN_MOVE_SELF)
+        if os.name == "nt":
+            return _WinChangeWaiter(folder, _WIN_FILE_NOTIFY_CHANGE_SIZE | _WIN_FILE_NOTIFY_CHANGE_LAST_WRITE | _WIN_FILE_NOTIFY_CHANGE_FILE_NAME)
+    except (OSError, AttributeError) as e:
+        log.warning("Filesystem notifications unavailable for %s (%s); sampling every %gs instead.", path, e, FS_STAT_SAMPLE_SECS)
+    return _StatSampleWaiter(path)
+
+def _dir_has_entries(path: str) -> bool:
+    # Reads at most one entry, so a directory with 1M files costs the same as one with 1.
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except OSError:
+        return False  # vanished/unreadable directory counts as empty
+
+def wait_while_dir_nonempty(path: str, settle_secs: float) -> None:
+    """Block until 'path' has been empty for 'settle_secs' continuous seconds."""
+    waiter = _fs_change_waiter(path, is_dir=True)   # watch BEFORE the first check, so no change is missed
+    try:
+        empty_since = None
+        while True:
+            if _dir_has_entries(path):
+                empty_since = None
+                waiter.wait(None)
+                waiter.coalesce()
+                continue
+            if empty_since is None:
+                empty_since = time.monotonic()
+            remaining = settle_secs - (time.monotonic() - empty_since)
+            if remaining <= 0:
+                return
+            waiter.wait(remaining)
+    finally:
+        waiter.close()
+
+def wait_while_file_growing(path: str, settle_secs: float) -> None:
+    """Block until 'path' (size, mtime) has not changed for 'settle_secs' continuous seconds."""
+    def _signature():
+        try:
+            st = os.stat(path)
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+    waiter = _fs_change_waiter(path, is_dir=False)
+    try:
+        last = _signature()
+        quiet_since = time.monotonic()
+        while True:
+            remaining = settle_secs - (time.monotonic() - quiet_since)
+            if remaining <= 0:
+                return
+            if not waiter.wait(remaining):
+                continue
+            # Windows signals for any file in the folder: only OUR file's signature counts as activity
+            sig = _signature()
+            if sig != last:
+                last = sig
+                waiter.coalesce()
+                quiet_since = time.monotonic()
+    finally:
+        waiter.close()
+
+# -------------------- TCP sessions (--while-connections) --------------------
+#
+# A "connection source" is a zero-arg callable returning an iterable of (local_port, is_established)
+# rows. The real ones below read the OS tables; tests can pass e.g. lambda: [(22, True), (80, False)].
+
+_LINUX_TCP_ESTABLISHED = "01"
+_WIN_MIB_TCP_STATE_ESTAB = 5
+_WIN_TCP_TABLE_OWNER_PID_ALL = 5
+_WIN_ERROR_INSUFFICIENT_BUFFER = 122
+
+def _parse_proc_net_tcp(lines):
+    """Rows from /proc/net/tcp{,6} text: a header, then 'sl local_addr:PORT rem_addr:PORT st ...' (hex) per socket."""
+    lines = iter(lines)
+    next(lines, None)  # header
+    for line in lines:
+        parts = line.split(None, 4)
+        if len(parts) < 4 or ":" not in parts[1]:
+            continue
+        try:
+            port = int(parts[1].rsplit(":", 1)[1], 16)
+        except ValueError:
+            continue
+        yield port, parts[3] == _LINUX_TCP_ESTABLISHED
+
+def _linux_tcp_rows(paths=("/proc/net/tcp", "/proc/net/tcp6")):
+    for path in paths:
+        try:
+            f = open(path, "r", encoding="ascii", errors="replace")
+        except OSError:
+            continue
+        with f:
+            yield from _parse_proc_net_tcp(f)
+
+def _win_tcp_rows():
+    """Rows from GetExtendedTcpTable (TCP_TABLE_OWNER_PID_ALL) for IPv4 and IPv6."""
+    from ctypes import wintypes
+    iphlpapi = ctypes.WinDLL("iphlpapi")
+    get_table = iphlpapi.GetExtendedTcpTable
+    get_table.argtypes = [ctypes.c_void_p, ctypes.POINTER(wintypes.DWORD), wintypes.BOOL, wintypes.ULONG, ctypes.c_int, wintypes.ULONG]
+    get_table.restype = wintypes.DWORD
+    # (address family, row size, offset of dwLocalPort in row, offset of dwState in row)
+    #   MIB_TCPROW_OWNER_PID:  state, localAddr, localPort, remoteAddr, remotePort, pid
+    #   MIB_TCP6ROW_OWNER_PID: localAddr[16], scope, localPort, remoteAddr[16], scope, remotePort, state, pid
+    for family, row_size, port_off, state_off in ((socket.AF_INET, 24, 8, 0), (socket.AF_INET6, 56, 20, 48)):
+        size = wintypes.DWORD(0)
+        buf = None
+        for _ in range(3):  # the table can grow between the sizing call and the real one
+            rc = get_table(buf, ctypes.byref(size), False, family, _WIN_TCP_TABLE_OWNER_PID_ALL, 0)
+            if rc != _WIN_ERROR_INSUFFICIENT_BUFFER:
+                break
+            buf = ctypes.create_string_buffer(size.value)
+        if rc != 0 or buf is None:
+            continue
+        raw = buf.raw
+        (count,) = struct.unpack_from("<I", raw, 0)
+        for i in range(count):
+            base = 4 + i * row_size
+            (port_dw,) = struct.unpack_from("<I", raw, base + port_off)
+            (state,) = struct.unpack_from("<I", raw, base + state_off)
+            yield socket.ntohs(port_dw & 0xFFFF), state == _WIN_MIB_TCP_STATE_ESTAB
+
+def default_tcp_connection_source():
+    """The OS connection source, or None if this platform has none."""
+    if os.name == "nt":
+        return _win_tcp_rows
+    if sys.platform.startswith("linux"):
+        return _linux_tcp_rows
+    return None
+
+def has_established_connections(ports, source) -> bool:
+    # Stops reading at the first match (the generators above close their files on early exit).
+    for port, established in source():
+        if established and port in ports:
+            return True
+    return False
+
+def wait_while_connections(ports, grace_secs: float, source=None) -> None:
+    """
+    Block until no ESTABLISHED TCP session has existed on any of 'ports' (local side) for
+    'grace_secs' continuous seconds. Checks back off from CONN_CHECK_MIN_SECS up to
+    CONN_CHECK_MAX_SECS while sessions stay up, and run at the minimum during the grace period.
+    """
+    ports = frozenset(ports)
+    source = source or default_tcp_connection_source()
+    if source is None:
+        raise OSError("no TCP connection table available on this platform")
+    interval = CONN_CHECK_MIN_SECS
+    idle_since = None
+    while True:
+        if has_established_connections(ports, source):
+            idle_since = None
+            time.sleep(interval)
+            interval = min(CONN_CHECK_MAX_SECS, interval * 2)
+            continue
+        interval = CONN_CHECK_MIN_SECS
+        now = time.monotonic()
+        if idle_since is None:
+            idle_since = now
+        remaining = grace_secs - (now - idle_since)
+        if remaining <= 0:
+            return
+        time.sleep(min(interval, remaining))
+
+def parse_port_list(text: str) -> list[int]:
+    """Parse '22' or '22,3389' (spaces allowed) into a list of TCP ports."""
+    ports = []
+    for tok in str(text or "").split(","):
+        tok = tok.strip()
+        if not tok.isdigit() or not 1 <= int(tok) <= 65535:
+            raise ValueError(f"not a TCP port (1..65535): {tok!r}")
+        ports.append(int(tok))
+    return ports
+
+# -------------------- Heartbeats (--heartbeat / --heartbeat-file) --------------------
+
+def check_heartbeat_secs(secs: int, name: str = "--heartbeat") -> int:
+    if secs < HEARTBEAT_MIN_SECS or secs > MAX_AUTO_QUIT_SECS:
+        raise ValueError(f"{name} must be between {HEARTBEAT_MIN_SECS} seconds and {MAX_AUTO_QUIT_SECS // 86400} days (got {secs}s).")
+    return secs
+
+def heartbeat_epoch(path: str) -> float | None:
+    """Last heartbeat = the file's modification time (None if it doesn't exist)."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def wait_for_missed_heartbeat(path: str, timeout_secs: float, stop_event=None) -> bool:
+    """
+    Block until 'path' has not been touched for 'timeout_secs' (True), or until stop_event
+    is set (False). Costs one stat() per timeout period, not per heartbeat: the thread sleeps
+    until the last beat + timeout, and only then looks again. Startup counts as a beat, so a
+    client gets one full timeout to create the file.
+    """
+    last = max(time.time(), heartbeat_epoch(path) or 0.0)
+    while True:
+        delay = last + timeout_secs - time.time()
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+            continue
+        beat = heartbeat_epoch(path)
+        if beat is None or beat <= last:
+            return True
+        last = beat
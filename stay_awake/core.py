@@ -0,0 +1,405 @@
+# =============================================================================
+# stay_awake.core — the GUI-free heart of Stay_Awake.
+#
+# - Duration / local-time parsing used by --for and --until.
+# - The MIN_AUTO_QUIT_SECS / MAX_AUTO_QUIT_SECS bounds checks.
+# - WakeLock: the acquire/release lifecycle (used by Stay_AwakeTrayApp too), over a
+#   pluggable backend (stay_awake.backends; wakepy by default), with latency/failure metrics.
+# - Hold: a wake lock with an optional --for/--until style deadline, usable as a
+#   context manager from any Python program:
+#
+#       import stay_awake
+#       with stay_awake.hold(for_="2h"):
+#           run_the_batch()
+#
+# Nothing here imports tkinter, PIL or pystray; wakepy itself is only imported on
+# the first acquire().
+# =============================================================================
+
+import math
+import re  # for --for and --until duration parsing
+import threading
+import time
+from datetime import datetime
+
+from .backends import WakeLockError, default_backend
+
+# Bounds applied to BOTH --for and --until:
+# - must be at least MIN_AUTO_QUIT_SECS seconds in the future
+# - must be no more than MAX_AUTO_QUIT_SECS seconds in the future
+MIN_AUTO_QUIT_SECS = 10                     # at least 10s
+MAX_AUTO_QUIT_SECS = 366 * 24 * 60 * 60     # ≤ 366 days
+
+# For decoding --for days minutes, seconds:
+_RE_DURATION_TOKEN = re.compile(r'\s*(\d+)\s*([dhmsDHMS]?)')
+
+# For decoding --until relaxed local timestamp:
+# Accepts: "YYYY-MM-DD HH:MM:SS" with optional spaces and 1–2 digit M/D/h/m/s.
+# Examples:
+#   2025-01-02 23:22:21
+#   2025- 1- 2 03:02:01
+#   2025-1-2 3:2:1
+_RE_UNTIL_TOKEN = re.compile(
+    r"""^\s*
+        (\d{4})\s*-\s*       # year
+        (\d{1,2})\s*-\s*     # month (1..12)
+        (\d{1,2})\s+         # day   (1..31; validated later)
+        (\d{1,2})\s*:\s*     # hour  (0..23)
+        (\d{1,2})\s*:\s*     # min   (0..59)
+        (\d{1,2})\s*         # sec   (0..59)
+        $""",
+    re.VERBOSE,
+)
+
+# -------------------- Duration / local-time parsing --------------------
+
+def parse_duration_to_seconds(text: str) -> int:
+    """
+    Parse '3d4h5s', '2h', '90m', '3600s', or composites with spaces (case-insensitive).
+    Bare numbers are minutes. Returns total seconds (int).
+    """
+    if not text or not str(text).strip():
+        raise ValueError("Empty duration")
+    s = str(text).strip()
+    total = 0
+    last_end = 0
+    any_match = False
+    for m in _RE_DURATION_TOKEN.finditer(s):
+        # Disallow non-space junk between tokens
+        if m.start() != last_end and s[last_end:m.start()].strip():
+            raise ValueError(f"Invalid duration syntax near: {s[last_end:m.start()]!r}")
+        val = int(m.group(1))
+        unit = (m.group(2) or '').lower()
+        if unit == 'd':
+            total += val * 86400
+        elif unit == 'h':
+            total += val * 3600
+        elif unit == 'm' or unit == '':
+            total += val * 60
+        elif unit == 's':
+            total += val
+        else:
+            # Shouldn't occur due to the regex, but keep it defensive
+            raise ValueError(f"Unknown unit: {unit!r}")
+        last_end = m.end()
+        any_match = True
+    # Must have matched at least one token and consumed the string (whitespace allowed at the end)
+    if not any_match or s[last_end:].strip():
+        raise ValueError(f"Invalid duration: {text!r}")
+    if total < 0:
+        raise ValueError("Duration must be >= 0")
+    return total
+
+def parse_until_to_epoch(text: str) -> float:
+    """
+    Parse a relaxed local timestamp like '2025-01-02 23:22:21', '2025- 1- 2 03:02:01',
+    or '2025-1-2 3:2:1' into a *local* epoch seconds (float), with robust DST handling.
+
+    Strategy:
+      1) Regex-parse numbers and build a naive datetime (calendar validation happens here).
+      2) Two-pass mktime round-trip with tm_isdst=0 and tm_isdst=1:
+         - If neither round-trip reproduces the same wall time -> NONEXISTENT local time (spring-forward gap) -> error.
+         - If exactly one round-trips correctly            -> valid; use that epoch.
+         - If both round-trip and epochs differ            -> AMBIGUOUS local time (fall-back overlap) -> error.
+         - If both round-trip and epochs equal             -> normal time; use epoch.
+
+    Raises:
+        ValueError on invalid format, invalid calendar date, out-of-range epoch,
+        or DST edge cases (nonexistent/ambiguous local time).
+    """
+    if not text or not str(text).strip():
+        raise ValueError("Empty --until value")
+    m = _RE_UNTIL_TOKEN.match(text)
+    if not m:
+        raise ValueError(
+            "Invalid --until format. Use: YYYY-MM-DD HH:MM:SS (24h), "
+            "with optional extra spaces and 1–2 digit M/D/h/m/s."
+        )
+    y, mon, d, hh, mm, ss = (int(m.group(i)) for i in range(1, 7))
+    # Calendar validation (e.g., rejects 2025-02-31). This *does not* apply a timezone yet.
+    try:
+        dt = datetime(year=y, month=mon, day=d, hour=hh, minute=mm, second=ss)
+    except ValueError as e:
+        raise ValueError(f"Invalid calendar date/time in --until: {e}") from e
+    # Two-pass mktime round-trip:
+    # Build tm tuples with tm_isdst fixed to 0 or 1 (wday/yday=-1 lets C lib compute them).
+    def _epoch_if_roundtrips(isdst_flag: int) -> float | None:
+        tup = (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, -1, -1, isdst_flag)
+        try:
+            epoch = time.mktime(tup)  # interpret as *local* time with explicit DST hint
+        except (OverflowError, OSError):
+            return None
+        lt = time.localtime(epoch)
+        # Only accept if the wall time truly round-trips to the same civil components.
+        if (lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour, lt.tm_min, lt.tm_sec) == (
+            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second
+        ):
+            return float(epoch)
+        return None
+    epoch_std = _epoch_if_roundtrips(0)  # prefer "standard" interpretation
+    epoch_dst = _epoch_if_roundtrips(1)  # prefer "daylight" interpretation
+    if epoch_std is None and epoch_dst is None:
+        # e.g., "spring forward" gap
+        raise ValueError("--until is not a valid local wall-clock time on this system (nonexistent due to DST transition).")
+    if epoch_std is not None and epoch_dst is not None:
+        # Both interpretations are valid but map to *different* instants -> ambiguous fall-back hour
+        if abs(epoch_std - epoch_dst) >= 1.0:
+            raise ValueError("--until is ambiguous (falls in the repeated DST hour). Please choose a different time.")
+        # If they’re somehow equal (rare/no-DST zones), accept either
+        return epoch_std
+    # Exactly one pass valid -> use it
+    return epoch_std if epoch_std is not None else epoch_dst
+
+# -------------------- Bounds checks --------------------
+
+def check_for_seconds(secs: int, name: str = "--for") -> int:
+    """Validate a --for duration (seconds) against MIN/MAX_AUTO_QUIT_SECS; returns it unchanged."""
+    if secs < MIN_AUTO_QUIT_SECS:
+        raise ValueError(f"{name} must be at least {MIN_AUTO_QUIT_SECS} seconds (got {secs}s).")
+    if secs > MAX_AUTO_QUIT_SECS:
+        days = MAX_AUTO_QUIT_SECS // 86400
+        raise ValueError(f"{name} cannot exceed {days} days (got ~{secs/86400:.1f} days).")
+    return secs
+
+def check_until_epoch(target_epoch: float, name: str = "--until") -> int:
+    """
+    Validate a --until target epoch against MIN/MAX_AUTO_QUIT_SECS.
+    Returns the whole seconds from now (rounded up to the next second) to the target.
+    """
+    secs = int(target_epoch - math.ceil(time.time()))
+    if secs < MIN_AUTO_QUIT_SECS:
+        raise ValueError(f"{name} must be at least {MIN_AUTO_QUIT_SECS} seconds in the future (got {secs}s).")
+    if secs > MAX_AUTO_QUIT_SECS:
+        days = MAX_AUTO_QUIT_SECS // 86400
+        raise ValueError(f"{name} must be within {days} days from now.")
+    return secs
+
+def resolve_deadline(for_=None, until=None) -> tuple[int | None, float | None]:
+    """
+    Turn library-style for_/until arguments into (seconds, target_epoch), bounds-checked
+    exactly like --for/--until. Returns (None, None) when neither is set (or for_ is 0).
+      for_:  '2h' / '1h30m' / '45' (minutes) like --for, or a number of seconds
+      until: 'YYYY-MM-DD HH:MM:SS' like --until, a local epoch (float), or a datetime
+    """
+    if for_ is not None and until is not None:
+        raise ValueError("for_ and until are mutually exclusive")
+    if until is not None:
+        if isinstance(until, str):
+            target_epoch = parse_until_to_epoch(until)
+        elif isinstance(until, datetime):
+            target_epoch = until.timestamp()
+        else:
+            target_epoch = float(until)
+        return check_until_epoch(target_epoch, "until"), target_epoch
+    if for_ is not None:
+        secs = parse_duration_to_seconds(for_) if isinstance(for_, str) else int(math.ceil(for_))
+        if secs == 0:
+            return None, None
+        check_for_seconds(secs, "for_")
+        # Same as --for: target from NOW rounded up to the next whole second
+        return secs, float(math.ceil(time.time()) + secs)
+    return None, None
+
+def format_dhms(total_seconds: int) -> str:
+    # DDDd hh:mm:ss (omit days if 0)
+    if total_seconds < 0:
+        total_seconds = 0
+    d, r = divmod(total_seconds, 86400)
+    h, r = divmod(r, 3600)
+    m, s = divmod(r, 60)
+    return (f"{d}d {h:02d}:{m:02d}:{s:02d}") if d else (f"{h:02d}:{m:02d}:{s:02d}")
+
+# -------------------- Wake lock lifecycle --------------------
+
+class WakeLock:
+    """
+    The lifecycle behind start_Stay_Awake()/cleanup(): backend.acquire() once, backend.release()
+    once. Both are idempotent and thread-safe (a deadline timer and the main thread may race to
+    release). close() releases for good: any later acquire() (e.g. a watchdog re-acquire still
+    in flight at shutdown) raises instead of taking the lock again. Every call is timed and
+    counted; see stats().
+    """
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else default_backend()
+        self._held = False
+        self._closed = False
+        self._mutex = threading.Lock()
+        # Metrics
+        self.mode = None                 # backend's mode name while held (None if not in effect)
+        self.acquire_count = 0
+        self.release_count = 0
+        self.acquire_failures = 0        # raised, or returned "not in effect"
+        self.release_failures = 0
+        self.acquire_attempts = 0        # backend calls made (successful or not), for the mean latencies
+        self.release_attempts = 0
+        self.last_acquire_secs = None
+        self.last_release_secs = None
+        self.total_acquire_secs = 0.0
+        self.total_release_secs = 0.0
+        self.verify_count = 0
+        self.verify_failures = 0         # verify() said "not in effect" (or raised)
+        self.last_verify_secs = None
+        self.total_verify_secs = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._held
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def acquire(self) -> None:
+        with self._mutex:
+            if self._closed:
+                raise WakeLockError("wake lock is closed")
+            if self._held:
+                return
+            t0 = time.perf_counter()
+            try:
+                mode = self.backend.acquire()
+            except Exception:
+                self.acquire_failures += 1
+                raise
+            finally:
+                self.last_acquire_secs = time.perf_counter() - t0
+                self.total_acquire_secs += self.last_acquire_secs
+                self.acquire_attempts += 1
+            self._held = True
+            self.mode = mode
+            self.acquire_count += 1
+            if mode is None:
+                self.acquire_failures += 1
+
+    def release(self) -> None:
+        with self._mutex:
+            if not self._held:
+                return
+            self._held = False
+            self.mode = None
+            t0 = time.perf_counter()
+            try:
+                self.backend.release()
+            except Exception:
+                self.release_failures += 1
+                raise
+            finally:
+                self.last_release_secs = time.perf_counter() - t0
+                self.total_release_secs += self.last_release_secs
+                self.release_attempts += 1
+            self.release_count += 1
+
+    def close(self) -> None:
+        """Release (if held) and refuse every later acquire(). Idempotent."""
+        with self._mutex:
+            self._closed = True
+        self.release()
+
+    def verify(self) -> bool:
+        """Ask the backend whether the held request is still in effect (timed and counted)."""
+        with self._mutex:
+            if not self._held:
+                return False
+            t0 = time.perf_counter()
+            try:
+                ok = bool(self.backend.verify())
+            except Exception:
+                ok = False
+            self.last_verify_secs = time.perf_counter() - t0
+            self.total_verify_secs += self.last_verify_secs
+            self.verify_count += 1
+            if not ok:
+                self.verify_failures += 1
+            return ok
+
+    def reacquire(self) -> None:
+        """Drop (best effort) and take the lock again; raises if the new acquire fails."""
+        try:
+            self.release()
+        except Exception:
+            pass
+        self.acquire()
+
+    def stats(self) -> dict:
+        """Snapshot of the lock's metrics (latencies in seconds)."""
+        return {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "active": self._held,
+            "mode": self.mode,
+            "acquires": self.acquire_count,
+            "releases": self.release_count,
+            "acquire_failures": self.acquire_failures,
+            "release_failures": self.release_failures,
+            "last_acquire_secs": self.last_acquire_secs,
+            "last_release_secs": self.last_release_secs,
+            "mean_acquire_secs": self.total_acquire_secs / self.acquire_attempts if self.acquire_attempts else None,
+            "mean_release_secs": self.total_release_secs / self.release_attempts if self.release_attempts else None,
+            "verifies": self.verify_count,
+            "verify_failures": self.verify_failures,
+            "last_verify_secs": self.last_verify_secs,
+            "mean_verify_secs": self.total_verify_secs / self.verify_count if self.verify_count else None,
+        }
+
+class Hold:
+    """
+    A wake lock held for a with-block (or between acquire()/release()), optionally capped
+    by a --for/--until style deadline: when the deadline passes the lock is released even if
+    the block is still running, just like the app's auto-quit timer.
+    """
+    def __init__(self, for_=None, until=None, backend=None):
+        self.seconds, self.target_epoch = resolve_deadline(for_, until)
+        self.expired = False
+        self._lock = WakeLock(backend)
+        self._timer = None
+
+    @property
+    def active(self) -> bool:
+        return self._lock.active
+
+    @property
+    def wake_lock(self) -> WakeLock:
+        return self._lock
+
+    def remaining(self) -> float | None:
+        """Seconds until the deadline (None if there is none)."""
+        if self.target_epoch is None:
+            return None
+        return max(0.0, self.target_epoch - time.time())
+
+    def acquire(self) -> "Hold":
+        self._lock.acquire()
+        if self.target_epoch is not None:
+            # Re-ceil from NOW right before arming, like Stay_AwakeTrayApp.run()
+            secs = math.ceil(self.target_epoch - time.time())
+            if secs <= 0:
+                self._on_deadline()
+                return self
+            t = threading.Timer(secs, self._on_deadline)
+            t.daemon = True
+            self._timer = t
+            t.start()
+        return self
+
+    def _on_deadline(self) -> None:
+        self.expired = True
+        self._lock.release()
+
+    def release(self) -> None:
+        t, self._timer = self._timer, None
+        if t is not None:
+            t.cancel()
+        self._lock.release()
+
+    def __enter__(self) -> "Hold":
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+def hold(for_=None, until=None, backend=None) -> Hold:
+    """Context manager: keep the machine awake for the with-block, at most for_ / until."""
+    return Hold(for_=for_, until=until, backend=backend)
+
+def hold_until(epoch, backend=None) -> Hold:
+    """Context manager: keep the machine awake for the with-block, at most until 'epoch' (local epoch / datetime / --until string)."""
+    return Hold(until=epoch, backend=backend)
@@ -0,0 +1,192 @@
+# =============================================================================
+# stay_awake.dpi — which DPI the tray icon is shown at, and when that changes.
+#
+# The tray icon lives on the taskbar's monitor, so that is the DPI that matters (not the
+# system DPI read once at startup). A DPI source answers dpi() and, once start()ed, calls
+# on_change(dpi) from its own thread when the value changes. Sources:
+#   - WindowsDpiSource  the taskbar window's DPI (GetDpiForWindow; falls back to the
+#                       system DPI). Changes are NOTIFIED, not polled: a hidden top-level
+#                       window receives WM_DPICHANGED / WM_DISPLAYCHANGE / WM_SETTINGCHANGE
+#                       (scale changed, monitors re-arranged, taskbar moved) and only
+#                       then re-reads the DPI
+#   - FakeDpiSource     set_dpi() by hand: exercises the icon swap on any OS / CI box
+# =============================================================================
+
+import abc
+import ctypes
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+BASELINE_DPI = 96                               # Windows "100%"
+TRAY_ICON_SIZES = (16, 20, 24, 32, 40, 48, 64)  # 100% .. 400%, precomputed once
+
+def tray_icon_size(dpi: int | None) -> int:
+    """Rendition for 'dpi': the smallest size >= 16px * scale (the shell only ever scales down)."""
+    want = round(16 * (dpi or BASELINE_DPI) / BASELINE_DPI)
+    for size in TRAY_ICON_SIZES:
+        if size >= want:
+            return size
+    return TRAY_ICON_SIZES[-1]
+
+class DpiSource(abc.ABC):
+    """Interface for DPI sources (see module comment)."""
+    name = "base"
+
+    def __init__(self):
+        self.on_change = None        # on_change(dpi), called from the source's thread
+
+    @abc.abstractmethod
+    def dpi(self) -> int | None:
+        ...
+
+    def start(self, on_change) -> None:
+        self.on_change = on_change
+
+    def stop(self) -> None:
+        self.on_change = None
+
+class FakeDpiSource(DpiSource):
+    """In-memory DPI: set_dpi() notifies synchronously, like a WM_DPICHANGED would."""
+    name = "fake"
+
+    def __init__(self, dpi: int = BASELINE_DPI):
+        super().__init__()
+        self._dpi = dpi
+        self.reads = 0
+
+    def dpi(self) -> int:
+        self.reads += 1
+        return self._dpi
+
+    def set_dpi(self, dpi: int) -> None:
+        changed = dpi != self._dpi
+        self._dpi = dpi
+        if changed and self.on_change is not None:
+            self.on_change(dpi)
+
+# WM_* that can mean "the taskbar's DPI may be different now"
+_WM_DESTROY = 0x0002
+_WM_CLOSE = 0x0010
+_WM_SETTINGCHANGE = 0x001A
+_WM_DISPLAYCHANGE = 0x007E
+_WM_DPICHANGED = 0x02E0
+_DPI_MESSAGES = (_WM_SETTINGCHANGE, _WM_DISPLAYCHANGE, _WM_DPICHANGED)
+
+class WindowsDpiSource(DpiSource):
+    name = "windows"
+
+    def __init__(self):
+        super().__init__()
+        from ctypes import wintypes   # Windows-only on older Pythons
+        self._wt = wintypes
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._user32.FindWindowW.restype = wintypes.HWND
+        self._user32.FindWindowW.argtypes = (wintypes.LPCWSTR, wintypes.LPCWSTR)
+        self._user32.GetDpiForWindow.restype = wintypes.UINT
+        self._user32.GetDpiForWindow.argtypes = (wintypes.HWND,)
+        self._last = None
+        self._hwnd = None
+        self._thread = None
+        self._wndproc = None     # keep the ctypes callback alive as long as the window
+
+    def dpi(self) -> int | None:
+        try:
+            taskbar = self._user32.FindWindowW("Shell_TrayWnd", None)
+            if taskbar:
+                dpi = self._user32.GetDpiForWindow(taskbar)
+                if dpi:
+                    return int(dpi)
+            return int(self._user32.GetDpiForSystem()) or None
+        except (OSError, AttributeError):   # pre-Windows 10 1607
+            return None
+
+    def start(self, on_change) -> None:
+        super().start(on_change)
+        self._last = self.dpi()
+        if self._thread is None:
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="Stay_Awake-dpi", daemon=True)
+            self._thread.start()
+            ready.wait(2.0)
+
+    def stop(self) -> None:
+        super().stop()
+        if self._hwnd:
+            self._user32.PostMessageW(self._hwnd, _WM_CLOSE, 0, 0)
+
+    def _run(self, ready: threading.Event) -> None:
+        wt = self._wt
+        user32 = self._user32
+        LRESULT = ctypes.c_ssize_t
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wt.HWND, wt.UINT, wt.WPARAM, wt.LPARAM)
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [("style", wt.UINT), ("lpfnWndProc", WNDPROC), ("cbClsExtra", ctypes.c_int),
+                        ("cbWndExtra", ctypes.c_int), ("hInstance", wt.HINSTANCE), ("hIcon", wt.HICON),
+                        ("hCursor", wt.HANDLE), ("hbrBackground", wt.HBRUSH), ("lpszMenuName", wt.LPCWSTR),
+                        ("lpszClassName", wt.LPCWSTR)]
+
+        user32.DefWindowProcW.restype = LRESULT
+        user32.DefWindowProcW.argtypes = (wt.HWND, wt.UINT, wt.WPARAM, wt.LPARAM)
+        user32.PostMessageW.argtypes = (wt.HWND, wt.UINT, wt.WPARAM, wt.LPARAM)
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.GetModuleHandleW.restype = wt.HMODULE
+        kernel32.GetModuleHandleW.argtypes = (wt.LPCWSTR,)
+        user32.CreateWindowExW.restype = wt.HWND
+        user32.CreateWindowExW.argtypes = (wt.DWORD, wt.LPCWSTR, wt.LPCWSTR, wt.DWORD, ctypes.c_int, ctypes.c_int,
+                                           ctypes.c_int, ctypes.c_int, wt.HWND, wt.HMENU, wt.HINSTANCE, wt.LPVOID)
+
+        def wndproc(hwnd, msg, wparam, lparam):
+            if msg in _DPI_MESSAGES:
+                self._check()
+            elif msg == _WM_CLOSE:
+                user32.DestroyWindow(hwnd)
+                return 0
+            elif msg == _WM_DESTROY:
+                user32.PostQuitMessage(0)
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        self._wndproc = WNDPROC(wndproc)
+        hinstance = kernel32.GetModuleHandleW(None)
+        wc = WNDCLASSW(lpfnWndProc=self._wndproc, hInstance=hinstance,
+                       lpszClassName=f"Stay_Awake_DPI_{os.getpid()}")
+        try:
+            if not user32.RegisterClassW(ctypes.byref(wc)):
+                return
+            # A hidden top-level window (message-only windows don't get these broadcasts)
+            self._hwnd = user32.CreateWindowExW(0, wc.lpszClassName, "Stay_Awake DPI", 0, 0, 0, 0, 0,
+                                                None, None, hinstance, None)
+        finally:
+            ready.set()
+        if not self._hwnd:
+            return
+        msg = wt.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        self._hwnd = None
+
+    def _check(self) -> None:
+        dpi = self.dpi()
+        if dpi and dpi != self._last:
+            self._last = dpi
+            callback = self.on_change
+            if callback is not None:
+                try:
+                    callback(dpi)
+                except Exception:
+                    # never let a callback exception unwind into the window procedure
+                    log.exception("DPI change handler failed")
+
+def default_dpi_source() -> DpiSource | None:
+    """WindowsDpiSource on Windows; None elsewhere (the tray icon then uses its fixed size)."""
+    if os.name != "nt":
+        return None
+    try:
+        return WindowsDpiSource()
+    except (OSError, AttributeError, ImportError, ValueError):
+        return None
@@ -0,0 +1,73 @@
+# =============================================================================
+# stay_awake.filewatch — call back when a file is rewritten (the window/tray image source).
+#
+# FileChangeWatcher blocks a daemon thread on the OS's change notifications (inotify on
+# Linux, FindFirstChangeNotification on Windows; see conditions.saved_file_waiter), so
+# an unchanged file costs no wakeups at all. Only where neither exists does it fall back to
+# comparing the file's (size, mtime) every FS_STAT_SAMPLE_SECS. After a change it waits
+# FS_EVENT_COALESCE_SECS for the save to finish, then calls on_change(path) once if the
+# file's signature really changed (other files in the same folder are ignored).
+# =============================================================================
+
+import logging
+import os
+import threading
+
+from .conditions import saved_file_waiter
+
+log = logging.getLogger(__name__)
+
+class FileChangeWatcher:
+    def __init__(self, path: str, on_change):
+        self.path = path
+        self.on_change = on_change      # on_change(path), called from the watcher thread
+        self.wakeups = 0                # notifications received (each one is a thread wakeup)
+        self.changes = 0                # on_change() calls
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        if self._thread is None:
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="Stay_Awake-file-watch", daemon=True)
+            self._thread.start()
+            ready.wait(2.0)
+
+    def stop(self) -> None:
+        # The thread may be blocked in the OS wait; it is a daemon and exits on its next wakeup
+        self._stop.set()
+
+    def _run(self, ready: threading.Event) -> None:
+        try:
+            waiter = saved_file_waiter(self.path)   # watch BEFORE the first signature, so no save is missed
+            last = self._signature()
+        finally:
+            ready.set()
+        try:
+            while not self._stop.is_set():
+                if not waiter.wait(None):
+                    continue
+                self.wakeups += 1
+                if self._stop.is_set() or self._signature() == last:
+                    continue
+                waiter.coalesce()             # let the editor finish writing
+                sig = self._signature()
+                if sig == last or self._stop.is_set():
+                    continue
+                last = sig
+                if sig is None:
+                    continue                  # deleted (or mid-rename): wait for it to come back
+                self.changes += 1
+                try:
+                    self.on_change(self.path)
+                except Exception:
+                    log.exception("File change handler failed for %s", self.path)
+        finally:
+            waiter.close()
@@ -0,0 +1,119 @@
+# =============================================================================
+# stay_awake.journal — crash-safe record of what Stay_Awake is holding, for --resume.
+#
+# A small JSON file holding the active deadline (local epoch), wake mode and, for the lease
+# server, the open leases. It is:
+#   - written atomically (temp file + fsync + rename): a crash mid-write leaves the
+#     previous journal intact, never a torn one
+#   - written at most once per state change: record() skips identical states, and the
+#     lease server coalesces bursts with record_later()
+#   - removed on a clean exit, so only a killed/crashed instance leaves one behind
+#   - owned by the PID that wrote it: while that process is alive, live_owner() reports it
+#     (a second instance must not take over, or --resume a journal that isn't dead) and
+#     another instance's clear() leaves the file alone
+# "Stay_Awake.py --resume" then re-acquires the lock and re-arms from the stored epoch
+# directly: no argument parsing, recomputing or re-validation.
+# =============================================================================
+
+import json
+import os
+import threading
+import time
+
+from .conditions import pid_exists
+
+JOURNAL_VERSION = 1
+JOURNAL_COALESCE_SECS = 1.0    # record_later(): at most one write per this many seconds of churn
+
+def default_journal_path(kind: str = "app") -> str:
+    """Per-user state folder (survives reboots, unlike the temp folder)."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        folder = os.path.join(base, "Stay_Awake")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+        folder = os.path.join(base, "stay_awake")
+    return os.path.join(folder, f"Stay_Awake-{kind}.journal.json")
+
+class DeadlineJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.writes = 0
+        self._last = None          # last state written (without the bookkeeping fields)
+        self._mutex = threading.Lock()
+        self._pending = None       # threading.Timer from record_later()
+        self._cleared = False      # after clear(), late writes (a pending record_later) are dropped
+
+    def load(self) -> dict | None:
+        """The stored state, or None if there is no (readable) journal."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != JOURNAL_VERSION:
+            return None
+        return state
+
+    def live_owner(self) -> int | None:
+        """PID of another, still running process that wrote this journal; None if it's free."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                pid = json.load(f).get("pid")
+        except (OSError, ValueError, AttributeError):
+            return None
+        if not isinstance(pid, int) or pid == os.getpid() or not pid_exists(pid):
+            return None
+        return pid
+
+    def record(self, state: dict) -> bool:
+        """Write 'state' if it differs from the last one written; True if it wrote."""
+        with self._mutex:
+            if self._cleared or state == self._last:
+                return False
+            doc = dict(state, version=JOURNAL_VERSION, pid=os.getpid(), written=time.time())
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._last = dict(state)
+            self.writes += 1
+            return True
+
+    def record_later(self, state_fn, delay_secs: float = JOURNAL_COALESCE_SECS) -> None:
+        """Record state_fn() after 'delay_secs'; further calls until then fold into that one write."""
+        with self._mutex:
+            if self._pending is not None:
+                return
+            t = threading.Timer(delay_secs, self._flush_pending, args=(state_fn,))
+            t.daemon = True
+            self._pending = t
+        t.start()
+
+    def _flush_pending(self, state_fn) -> None:
+        with self._mutex:
+            self._pending = None
+        try:
+            self.record(state_fn())
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Clean exit: nothing to resume. Cancels a pending record_later()."""
+        with self._mutex:
+            if self._pending is not None:
+                self._pending.cancel()
+                self._pending = None
+            self._last = None
+            self._cleared = True
+            if self.live_owner() is not None:
+                return   # another running instance's journal: not ours to clear
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
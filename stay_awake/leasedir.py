@@ -0,0 +1,223 @@
+# =============================================================================
+# stay_awake.leasedir — keep several machines awake from one shared lease directory.
+#
+# Any machine (or job) drops a small text file NAME.lease into a directory on a shared
+# mount (SMB/NFS); every node running --lease-dir watches it and holds its wake lock while
+# any unexpired lease targets that node:
+#     # Stay_Awake lease
+#     until = 2026-01-02 23:22:21        (local wall time, same rules as --until)
+#     epoch = 1767390141                 (written alongside; wins if present: zone-proof)
+#     nodes = render01, render02         (optional; absent or "*" = every node)
+#
+# Scanning is incremental so thousands of lease files stay cheap:
+#   - each interval costs ONE stat() of the directory; it is only listed again when its
+#     modification time has changed (create / delete / rename of a lease file)
+#   - a listing stats the entries but only re-reads files whose (mtime, size) changed,
+#     using an index of parsed leases kept in a local file, so a restarted node does
+#     not re-parse the whole directory either
+#   - in-place rewrites don't touch the directory mtime, so write_lease_file() always
+#     writes a temp file + rename; a full re-stat every LEASE_DIR_FULL_SCAN_SECS (and on the
+#     first scan) catches hand edits anyway
+#   - the index only saves re-parsing: nothing from it reaches the table until a scan has
+#     confirmed it against the directory (a stale index must not hold the machine awake
+#     while the share is unreachable)
+# Expiry itself needs no scanning at all: the parsed deadlines feed a LeaseTable (one heap,
+# one timer, one reference-counted WakeLock).
+# =============================================================================
+
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from .core import parse_until_to_epoch
+
+LEASE_FILE_SUFFIX = ".lease"
+LEASE_DIR_SCAN_SECS = 15.0          # directory mtime check interval
+LEASE_DIR_FULL_SCAN_SECS = 600.0    # re-stat every lease file at least this often
+
+def default_node_name() -> str:
+    return socket.gethostname().split(".")[0].lower()
+
+def _lease_file_path(directory: str, name: str) -> str:
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        raise ValueError(f"invalid lease name: {name!r}")
+    return os.path.join(directory, name + LEASE_FILE_SUFFIX)
+
+def _atomic_write_text(path: str, text: str) -> None:
+    # temp file in the same directory + rename: readers never see a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def write_lease_file(directory: str, name: str, target_epoch: float, nodes=None) -> str:
+    """Create/replace NAME.lease in 'directory' (atomically); returns its path."""
+    path = _lease_file_path(directory, name)
+    lines = [
+        "# Stay_Awake lease",
+        f"until = {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(target_epoch))}",
+        f"epoch = {int(target_epoch)}",
+    ]
+    if nodes:
+        lines.append("nodes = " + ", ".join(nodes))
+    _atomic_write_text(path, "\n".join(lines) + "\n")
+    return path
+
+def remove_lease_file(directory: str, name: str) -> bool:
+    try:
+        os.remove(_lease_file_path(directory, name))
+        return True
+    except FileNotFoundError:
+        return False
+
+def parse_lease_text(text: str) -> tuple[float, list[str] | None]:
+    """(expiry epoch, target nodes or None for all) from a lease file's contents."""
+    fields = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        fields[key.strip().lower()] = value.strip()
+    if "epoch" in fields:
+        epoch = float(fields["epoch"])
+    elif "until" in fields:
+        epoch = parse_until_to_epoch(fields["until"])
+    else:
+        raise ValueError("lease file has neither 'until' nor 'epoch'")
+    nodes = [n.strip().lower() for n in fields.get("nodes", "").split(",") if n.strip()]
+    return epoch, (None if not nodes or "*" in nodes else nodes)
+
+def default_index_path(directory: str, node: str) -> str:
+    # Local (never on the share: writing there would bump the directory mtime for every node)
+    key = hashlib.sha1(os.path.abspath(directory).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"Stay_Awake-leasedir-{node}-{key}.json")
+
+class LeaseDirWatcher:
+    """Mirror the shared lease directory's leases that target 'node' into a LeaseTable."""
+    def __init__(self, directory: str, table, node: str | None = None, index_path: str | None = None,
+                 interval_secs: float = LEASE_DIR_SCAN_SECS, full_scan_secs: float = LEASE_DIR_FULL_SCAN_SECS):
+        self.directory = directory
+        self.table = table
+        self.node = (node or default_node_name()).lower()
+        self.index_path = index_path or default_index_path(directory, self.node)
+        self.interval_secs = interval_secs
+        self.full_scan_secs = full_scan_secs
+        self.on_error = None                 # on_error(file_name, message) for unreadable lease files
+        self._dir_mtime_ns = None
+        self._last_full_scan = None          # monotonic time of the last listing; None = never (due now)
+        # file name -> [mtime_ns, size, epoch | None, nodes | None]  (epoch None = unparseable)
+        self._index: dict[str, list] = {}
+        self._applied: dict[str, float] = {}   # lease name -> deadline handed to the table
+        self.listings = 0                    # directory listings (vs. cheap mtime checks)
+        self.parses = 0                      # lease files actually read
+        self._stop = threading.Event()
+        self._thread = None
+        self._load_index()
+
+    # ---- index persistence ----
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._index = {k: list(v) for k, v in data.get("files", {}).items()}
+            self._dir_mtime_ns = data.get("dir_mtime_ns")
+        except (OSError, ValueError, AttributeError):
+            self._index, self._dir_mtime_ns = {}, None
+
+    def _save_index(self) -> None:
+        try:
+            _atomic_write_text(self.index_path, json.dumps({"dir_mtime_ns": self._dir_mtime_ns, "files": self._index}))
+        except OSError:
+            pass   # the index is only a cache
+
+    # ---- scanning ----
+
+    def scan(self, force: bool = False) -> bool:
+        """One incremental pass; returns True if the directory was listed."""
+        st = os.stat(self.directory)
+        now = time.monotonic()
+        full_due = self._last_full_scan is None or now - self._last_full_scan >= self.full_scan_secs
+        if not force and not full_due and st.st_mtime_ns == self._dir_mtime_ns:
+            return False
+        self.listings += 1
+        self._last_full_scan = now
+        index, changed = {}, False
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(LEASE_FILE_SUFFIX):
+                    continue
+                try:
+                    est = entry.stat()
+                except OSError:
+                    continue
+                old = self._index.get(entry.name)
+                if old is not None and old[0] == est.st_mtime_ns and old[1] == est.st_size:
+                    index[entry.name] = old
+                    continue
+                index[entry.name] = [est.st_mtime_ns, est.st_size] + self._parse(entry.path, entry.name)
+                changed = True
+        changed = changed or index.keys() != self._index.keys()
+        self._index = index
+        if changed or st.st_mtime_ns != self._dir_mtime_ns:
+            self._dir_mtime_ns = st.st_mtime_ns
+            self._save_index()
+        self._apply()
+        return True
+
+    def _parse(self, path: str, file_name: str) -> list:
+        self.parses += 1
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                epoch, nodes = parse_lease_text(f.read(4096))
+            return [epoch, nodes]
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            if self.on_error is not None:
+                self.on_error(file_name, str(e))
+            return [None, None]
+
+    def _apply(self) -> None:
+        """Push the index's leases that target this node into the table (only the differences)."""
+        wanted = {}
+        now = time.time()
+        for file_name, (_mtime, _size, epoch, nodes) in self._index.items():
+            if epoch is None or epoch <= now or (nodes is not None and self.node not in nodes):
+                continue
+            wanted[file_name[: -len(LEASE_FILE_SUFFIX)]] = epoch
+        for name in list(self._applied):
+            if name not in wanted:
+                del self._applied[name]
+                self.table.close(name)
+        for name, epoch in wanted.items():
+            if self._applied.get(name) != epoch:
+                self._applied[name] = epoch
+                self.table.put(name, epoch)
+
+    # ---- background thread ----
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Stay_Awake-leasedir", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.scan()
+            except OSError as e:
+                # Share unreachable: keep what we know (the table still expires it on time)
+                if self.on_error is not None:
+                    self.on_error(self.directory, str(e))
+            if self._stop.wait(self.interval_secs):
+                return
@@ -0,0 +1,421 @@
+# =============================================================================
+# stay_awake.leases — many clients, one wake lock.
+#
+# LeaseTable keeps named leases, each with its own --for/--until deadline (or none),
+# and holds ONE WakeLock while any lease is live (reference counted by lease count).
+# Deadlines sit in a min-heap driven by a single expiry thread that sleeps until the
+# earliest one, so opening/renewing/expiring a lease costs O(log n) and there is one
+# timer however many leases exist (instead of one Stay_Awake process + timer per job).
+#
+# LeaseServer puts a LeaseTable behind a localhost-only TCP socket speaking one JSON
+# object per line:
+#   {"op": "open",  "name": "render-1", "for": "2h"}          -> {"ok": true, "lease": {...}, "key": "..."}
+#   {"op": "open",  "name": "render-1", "until": 1767390141}  (epoch or "YYYY-MM-DD HH:MM:SS")
+#   {"op": "close", "name": "render-1", "key": "..."}         -> {"ok": true, "closed": true}
+#   {"op": "list"}                                            -> {"ok": true, "leases": [...]}
+#   {"op": "beat",  "name": "render-1", "key": "..."}         -> {"ok": true, "renewed": true}
+# "open" returns a per-lease secret key; renewing, beating or closing that lease needs it, so
+# on a shared workstation one local user can't end (or hijack) another user's lease. The CLI
+# keeps each key in a per-user file (save_lease_key()). Re-opening an existing name (with its
+# key) replaces its deadline. Idle connections are dropped after LEASE_CONNECTION_IDLE_SECS.
+# lease_request() is the client side.
+#
+# Heartbeat leases ({"op": "open", ..., "heartbeat": "2m"[, "heartbeat_file": PATH]}) expire
+# when the client stops renewing them ("beat" requests, or touching heartbeat_file), so a
+# crashed job releases its claim without waiting out its --for/--until. A beat only stamps
+# the lease (O(1), no heap traffic); the heap entry is re-armed lazily when it comes due, and
+# heartbeat due times are rounded up to HEARTBEAT_BATCH_SECS so one wakeup checks a whole batch.
+#
+# The wake lock is switched outside the table's condition lock (a slow wakepy / D-Bus call
+# must not stall opens, beats or the expiry thread): each change decides under the lock,
+# then _sync_lock() re-reads "any leases?" under a separate mutex and calls the backend.
+# =============================================================================
+
+import hashlib
+import heapq
+import hmac
+import itertools
+import json
+import math
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+
+from .conditions import check_heartbeat_secs, heartbeat_epoch
+from .core import WakeLock, parse_duration_to_seconds, resolve_deadline
+from .journal import default_journal_path
+
+LEASE_SERVER_HOST = "127.0.0.1"   # never listen beyond this machine
+LEASE_SERVER_PORT = 47733
+LEASE_REQUEST_TIMEOUT_SECS = 5.0
+LEASE_CONNECTION_IDLE_SECS = 30.0 # server side: drop a connection that sends nothing for this long
+LEASE_MAX_REQUEST_BYTES = 64 * 1024
+HEARTBEAT_BATCH_SECS = 1.0        # heartbeat expiries are checked in batches on this grid
+
+class LeaseKeyError(PermissionError):
+    """The request's key does not match the lease's (it belongs to another client)."""
+
+class Lease:
+    __slots__ = ("name", "deadline", "opened_at", "token", "heartbeat", "heartbeat_file", "last_beat", "due", "key")
+
+    def __init__(self, name: str, deadline: float | None, token: int,
+                 heartbeat: int | None = None, heartbeat_file: str | None = None, key: str | None = None):
+        self.name = name
+        self.deadline = deadline        # local epoch seconds, or None (until closed)
+        self.opened_at = time.time()
+        self.token = token              # matches the live heap entry; stale entries are skipped
+        self.heartbeat = heartbeat      # missed-heartbeat timeout (seconds), or None
+        self.heartbeat_file = heartbeat_file
+        self.last_beat = self.opened_at
+        self.due = None                 # when the heap entry fires (deadline, or next heartbeat check)
+        self.key = key or secrets.token_urlsafe(16)   # secret: renew / beat / close need it
+
+    def expiry(self) -> float | None:
+        """When this lease expires given what is known now (stats heartbeat_file, if any)."""
+        expires = self.deadline
+        if self.heartbeat is not None:
+            last = self.last_beat
+            if self.heartbeat_file:
+                last = max(last, heartbeat_epoch(self.heartbeat_file) or 0.0)
+            beat_expiry = last + self.heartbeat
+            expires = beat_expiry if expires is None else min(expires, beat_expiry)
+        return expires
+
+    def as_dict(self, with_key: bool = False) -> dict:
+        """Public view of the lease (what "list" shows); with_key adds the secret (journal only)."""
+        d = {"name": self.name, "deadline": self.deadline, "opened_at": self.opened_at}
+        if self.heartbeat is not None:
+            d.update(heartbeat=self.heartbeat, heartbeat_file=self.heartbeat_file, last_beat=self.last_beat)
+        if with_key:
+            d["key"] = self.key
+        return d
+
+    def check_key(self, key: str | None) -> None:
+        """key=None: trusted in-process caller. Otherwise it must match (constant-time compare)."""
+        if key is not None and not hmac.compare_digest(str(key).encode("utf-8"), self.key.encode("utf-8")):
+            raise LeaseKeyError(f"lease {self.name!r} belongs to another client (wrong or missing key)")
+
+    def due_for(self, expires: float) -> float:
+        # Hard deadlines fire exactly; heartbeat checks snap up to the batch grid
+        if expires == self.deadline:
+            return expires
+        return math.ceil(expires / HEARTBEAT_BATCH_SECS) * HEARTBEAT_BATCH_SECS
+
+class LeaseTable:
+    """Named leases + one reference-counted WakeLock + a deadline min-heap with a single expiry thread."""
+    def __init__(self, wake_lock=None, on_event=None):
+        self.wake_lock = wake_lock if wake_lock is not None else WakeLock()
+        self.on_event = on_event          # on_event(kind, name): "open", "renew", "close", "expire", "lock", "unlock", "lock-error"
+        self._leases: dict[str, Lease] = {}
+        self._heap: list[tuple[float, int, str]] = []   # (due, token, name), lazily invalidated
+        self._tokens = itertools.count(1)
+        self._cond = threading.Condition()
+        self._lock_mutex = threading.Lock()   # serialises wake-lock switches (taken WITHOUT _cond)
+        self._stopped = False
+        self._thread = None
+        self.expired_count = 0
+        self.wakeups = 0                  # expiry-thread wakeups (one per distinct due time, not per lease)
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    # ---- lease operations (all O(log n)) ----
+
+    def open(self, name: str, for_=None, until=None, heartbeat=None, heartbeat_file: str | None = None,
+             key: str | None = None) -> Lease:
+        """
+        Open (or renew) lease 'name' with --for/--until semantics; returns it (lease.key is its
+        secret). With heartbeat (seconds, or a --for style duration) it also expires once
+        beat() / heartbeat_file have gone quiet for that long. Renewing a lease opened
+        elsewhere needs its key (None skips the check: trusted in-process callers).
+        """
+        if not name:
+            raise ValueError("lease name must not be empty")
+        _secs, deadline = resolve_deadline(for_, until)
+        if heartbeat is not None:
+            heartbeat = check_heartbeat_secs(parse_duration_to_seconds(heartbeat) if isinstance(heartbeat, str) else int(math.ceil(heartbeat)), "heartbeat")
+        elif heartbeat_file:
+            raise ValueError("heartbeat_file needs a heartbeat timeout")
+        return self._set(Lease(name, deadline, next(self._tokens), heartbeat, heartbeat_file or None), key)
+
+    def put(self, name: str, deadline: float | None) -> Lease:
+        """
+        Open (or replace) lease 'name' with an already-computed local-epoch deadline, without
+        the --for/--until bounds checks (for deadlines read from elsewhere, e.g. lease files).
+        A deadline in the past expires on the next expiry pass.
+        """
+        if not name:
+            raise ValueError("lease name must not be empty")
+        return self._set(Lease(name, deadline, next(self._tokens)))
+
+    def _set(self, lease: Lease, key: str | None = None) -> Lease:
+        name = lease.name
+        with self._cond:
+            old = self._leases.get(name)
+            renew = old is not None
+            if renew:
+                old.check_key(key)
+                lease.opened_at = old.opened_at
+                lease.key = old.key
+            self._leases[name] = lease
+            expires = lease.expiry()
+            if expires is not None:
+                lease.due = lease.due_for(expires)
+                heapq.heappush(self._heap, (lease.due, lease.token, name))
+                self._compact_locked()
+            self._cond.notify()   # the earliest deadline may have moved
+        self._sync_lock()
+        self._emit("renew" if renew else "open", name)
+        return lease
+
+    def beat(self, name: str, key: str | None = None) -> bool:
+        """Heartbeat for lease 'name' (O(1): just a timestamp). False if no such heartbeat lease."""
+        with self._cond:
+            lease = self._leases.get(name)
+            if lease is None or lease.heartbeat is None:
+                return False
+            lease.check_key(key)
+            lease.last_beat = time.time()
+            return True
+
+    def close(self, name: str, key: str | None = None) -> bool:
+        with self._cond:
+            lease = self._leases.get(name)
+            if lease is not None:
+                lease.check_key(key)
+                del self._leases[name]
+                self._cond.notify()
+        if lease is not None:
+            self._sync_lock()
+            self._emit("close", name)
+        return lease is not None
+
+    def leases(self) -> list[Lease]:
+        with self._cond:
+            return list(self._leases.values())
+
+    def snapshot(self) -> list[dict]:
+        with self._cond:
+            return [l.as_dict(with_key=True) for l in self._leases.values()]
+
+    def restore(self, records) -> int:
+        """
+        Re-open leases from snapshot() records (e.g. a --resume journal) as they were: no
+        bounds checks, past deadlines expire on the next pass, and heartbeat leases get a
+        fresh heartbeat period from now. Keys are kept, so clients can still renew and close
+        their leases. Returns how many were restored.
+        """
+        count = 0
+        for r in records:
+            lease = Lease(r["name"], r.get("deadline"), next(self._tokens), r.get("heartbeat"), r.get("heartbeat_file"), r.get("key"))
+            lease.opened_at = r.get("opened_at", lease.opened_at)
+            self._set(lease)
+            count += 1
+        return count
+
+    def next_deadline(self) -> float | None:
+        with self._cond:
+            self._drop_stale_locked()
+            return self._heap[0][0] if self._heap else None
+
+    def expire_due(self, now: float | None = None) -> list[str]:
+        """Expire every lease whose deadline is <= now; returns their names."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _due, token, name = heapq.heappop(self._heap)
+                lease = self._leases.get(name)
+                if lease is None or lease.token != token:
+                    continue
+                if lease.heartbeat is not None:
+                    expires = lease.expiry()
+                    if expires > now:
+                        # Beaten since this entry was armed: re-arm at the next check (one push per period)
+                        lease.due = lease.due_for(expires)
+                        heapq.heappush(self._heap, (lease.due, token, name))
+                        continue
+                del self._leases[name]
+                expired.append(name)
+            if expired:
+                self.expired_count += len(expired)
+        if expired:
+            self._sync_lock()
+        for name in expired:
+            self._emit("expire", name)
+        return expired
+
+    # ---- single expiry timer ----
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._expiry_loop, name="Stay_Awake-leases", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the expiry thread and drop every lease (releasing the wake lock)."""
+        with self._cond:
+            self._stopped = True
+            self._leases.clear()
+            self._heap.clear()
+            self._cond.notify()
+        self._sync_lock()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=2.0)
+
+    def _expiry_loop(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                self._drop_stale_locked()
+                timeout = None if not self._heap else max(0.0, self._heap[0][0] - time.time())
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+                    if self._stopped:
+                        return
+                self.wakeups += 1
+            self.expire_due()
+
+    # ---- internals (call with self._cond held) ----
+
+    def _drop_stale_locked(self) -> None:
+        heap, leases = self._heap, self._leases
+        while heap:
+            _deadline, token, name = heap[0]
+            lease = leases.get(name)
+            if lease is not None and lease.token == token:
+                return
+            heapq.heappop(heap)
+
+    def _compact_locked(self) -> None:
+        # Renewals leave stale entries behind; rebuild once they dominate (amortised O(1))
+        if len(self._heap) > 2 * len(self._leases) + 64:
+            self._heap = [(l.due, l.token, l.name) for l in self._leases.values() if l.due is not None]
+            heapq.heapify(self._heap)
+
+    # ---- wake lock (call WITHOUT self._cond held) ----
+
+    def _sync_lock(self) -> None:
+        # Called after every change. Switches are serialised and each one re-reads the table,
+        # so whichever call runs last leaves the lock matching the final state even when an
+        # open and a close race. A failed acquire leaves the table intact; the next lease
+        # operation retries.
+        with self._lock_mutex:
+            with self._cond:
+                want = bool(self._leases)
+            if want == self.wake_lock.active:
+                return
+            try:
+                if want:
+                    self.wake_lock.acquire()
+                    self._emit("lock", f"mode: {self.wake_lock.mode}")
+                else:
+                    self.wake_lock.release()
+                    self._emit("unlock", "")
+            except Exception as e:
+                self._emit("lock-error", str(e) or type(e).__name__)
+
+    def _emit(self, kind: str, name: str) -> None:
+        if self.on_event is not None:
+            try:
+                self.on_event(kind, name)
+            except Exception:
+                pass
+
+class _LeaseRequestHandler(socketserver.StreamRequestHandler):
+    def setup(self) -> None:
+        self.timeout = self.server.idle_timeout   # StreamRequestHandler.setup() applies it to the socket
+        super().setup()
+
+    def handle(self) -> None:
+        try:
+            while True:
+                raw = self.rfile.readline(LEASE_MAX_REQUEST_BYTES + 1)
+                if not raw:
+                    return
+                if len(raw) > LEASE_MAX_REQUEST_BYTES:
+                    reply = {"ok": False, "error": "request too long"}
+                else:
+                    try:
+                        reply = self.server.dispatch(json.loads(raw))
+                    except Exception as e:
+                        reply = {"ok": False, "error": str(e) or type(e).__name__}
+                self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                if len(raw) > LEASE_MAX_REQUEST_BYTES:
+                    return
+        except OSError:   # idle timeout, or the client went away
+            return
+
+class LeaseServer(socketserver.ThreadingTCPServer):
+    """LeaseTable behind a localhost-only, line-delimited JSON socket (see module comment)."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, table: LeaseTable, port: int = LEASE_SERVER_PORT, host: str = LEASE_SERVER_HOST,
+                 idle_timeout: float = LEASE_CONNECTION_IDLE_SECS):
+        self.table = table
+        self.idle_timeout = idle_timeout
+        super().__init__((host, port), _LeaseRequestHandler)
+
+    def dispatch(self, req: dict) -> dict:
+        op = req.get("op")
+        name = str(req.get("name") or "")
+        key = str(req.get("key") or "")   # never None here: a remote client is never trusted
+        if op == "open":
+            lease = self.table.open(name, for_=req.get("for"), until=req.get("until"),
+                                    heartbeat=req.get("heartbeat"), heartbeat_file=req.get("heartbeat_file"), key=key)
+            return {"ok": True, "lease": lease.as_dict(), "key": lease.key}
+        if op == "beat":
+            return {"ok": True, "renewed": self.table.beat(name, key)}
+        if op == "close":
+            return {"ok": True, "closed": self.table.close(name, key)}
+        if op == "list":
+            return {"ok": True, "leases": [l.as_dict() for l in self.table.leases()]}
+        raise ValueError(f"unknown op: {op!r}")
+
+def lease_request(op: str, port: int = LEASE_SERVER_PORT, host: str = LEASE_SERVER_HOST, **fields) -> dict:
+    """Client side: send one request to a LeaseServer and return its reply (raises OSError if none is running)."""
+    req = dict(fields, op=op)
+    with socket.create_connection((host, port), timeout=LEASE_REQUEST_TIMEOUT_SECS) as sock:
+        sock.sendall(json.dumps(req).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise OSError("lease server closed the connection without replying")
+    return json.loads(line)
+
+# -------------------- Client-side key store --------------------
+
+def _lease_key_path(port: int, name: str) -> str:
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=12).hexdigest()
+    return os.path.join(os.path.dirname(default_journal_path()), f"Stay_Awake-lease-{port}-{digest}.key")
+
+def load_lease_key(port: int, name: str) -> str | None:
+    """The key saved by save_lease_key() for lease 'name' on 'port', or None."""
+    try:
+        with open(_lease_key_path(port, name), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def save_lease_key(port: int, name: str, key: str) -> None:
+    """Keep a lease's key in the per-user state folder (owner-only file, atomic write)."""
+    path = _lease_key_path(port, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(key)
+    os.replace(tmp, path)
+
+def forget_lease_key(port: int, name: str) -> None:
+    try:
+        os.remove(_lease_key_path(port, name))
+    except OSError:
+        pass
@@ -0,0 +1,60 @@
+# =============================================================================
+# stay_awake.logsetup — non-blocking logging for Stay_Awake.
+#
+# Every module logs through logging.getLogger("stay_awake...."). start_logging() hangs
+# ONE handler off the "stay_awake" logger: a QueueHandler that only enqueues the record.
+# A QueueListener thread does the formatting and the (possibly slow) writes:
+#   - console (stdout) with the bare message, exactly like the old print(..., flush=True)
+#     output; skipped when there is no console (pythonw / PyInstaller --noconsole)
+#   - optional rotating log file with time, level and thread
+# So a blocked or slow stdout stalls the writer thread, never the Tk thread, the countdown
+# tick, quit_application() or cleanup(). Messages are formatted lazily (%-style args are
+# only interpolated by the writer, and only if the record passes the level check).
+# =============================================================================
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOGGER_NAME = "stay_awake"
+LOG_FILE_MAX_BYTES = 1_000_000
+LOG_FILE_BACKUPS = 3
+LOG_FILE_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(message)s"
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Stock QueueHandler.prepare() formats in the CALLING thread; hand the record
+        # over untouched so formatting happens on the writer thread instead.
+        return record
+
+def get_logger(name: str | None = None) -> logging.Logger:
+    return logging.getLogger(LOGGER_NAME if not name else f"{LOGGER_NAME}.{name}")
+
+def start_logging(level: str | int = "INFO", log_file: str | None = None):
+    """Route the stay_awake loggers through a queue to a background writer; returns the listener."""
+    handlers = []
+    stream = sys.stdout
+    if stream is not None:
+        console = logging.StreamHandler(stream)
+        console.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(console)
+    if log_file:
+        rotating = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8", delay=True)
+        rotating.setFormatter(logging.Formatter(LOG_FILE_FORMAT))
+        handlers.append(rotating)
+    q = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    logger.addHandler(_DeferredQueueHandler(q))
+    logger.propagate = False
+    listener.start()
+    # Drain whatever is still queued at interpreter exit (atexit is LIFO: this runs after
+    # the app's own atexit cleanup, which was registered later)
+    atexit.register(listener.stop)
+    return listener
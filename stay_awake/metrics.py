@@ -0,0 +1,177 @@
+# =============================================================================
+# stay_awake.metrics — Prometheus-style metrics for fleet monitoring.
+#
+# A collect() callable returns Metric tuples (taken from counters the app already keeps);
+# MetricsExporter publishes them in the Prometheus text format:
+#   - file:     rewritten atomically (temp file + rename) every interval_secs, e.g. into the
+#               node_exporter / windows_exporter "textfile collector" folder. One timer
+#               wakeup per interval (default 2 minutes) and a final write on stop().
+#   - endpoint: GET http://127.0.0.1:PORT/metrics, rendered on demand, so it costs no timer
+#               wakeups at all between scrapes. Localhost only.
+# Process figures (RSS, CPU time) are read cheaply: /proc/self/statm on Linux,
+# GetProcessMemoryInfo on Windows, os.times() everywhere.
+# =============================================================================
+
+import ctypes
+import http.server
+import os
+import threading
+import time
+from collections import namedtuple
+
+METRICS_INTERVAL_DEFAULT_SECS = 120
+METRICS_INTERVAL_MIN_SECS = 60      # keep collection below one timer wakeup per minute
+METRICS_HOST = "127.0.0.1"
+
+# kind: "gauge" or "counter"; labels: dict or None
+Metric = namedtuple("Metric", "name kind help value labels", defaults=(None,))
+
+# -------------------- Process figures --------------------
+
+class _WinProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process (Windows: working set); None if unknown."""
+    if os.name == "nt":
+        try:
+            counters = _WinProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            psapi = ctypes.WinDLL("psapi")
+            kernel32 = ctypes.WinDLL("kernel32")
+            kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+            if psapi.GetProcessMemoryInfo(ctypes.c_void_p(kernel32.GetCurrentProcess()), ctypes.byref(counters), counters.cb):
+                return int(counters.WorkingSetSize)
+        except (OSError, AttributeError):
+            pass
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource   # macOS/BSD: peak RSS is the best cheap figure available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, OSError, AttributeError):
+        return None
+
+def process_cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system
+
+# -------------------- Text format --------------------
+
+def _escape_help(text) -> str:
+    return str(text).replace("\\", "\\\\").replace("\n", "\\n")
+
+def _escape_label(value) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+def render_prometheus(metrics) -> str:
+    lines = []
+    seen = set()
+    for m in metrics:
+        if m.value is None:
+            continue
+        if m.name not in seen:
+            seen.add(m.name)
+            lines.append(f"# HELP {m.name} {_escape_help(m.help)}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+        labels = ""
+        if m.labels:
+            labels = "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in m.labels.items()) + "}"
+        value = float(m.value)
+        lines.append(f"{m.name}{labels} {int(value) if value.is_integer() else repr(value)}")
+    return "\n".join(lines) + "\n"
+
+# -------------------- Exporter --------------------
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.exporter.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # no per-scrape console noise
+
+class MetricsExporter:
+    """Publish collect() as a Prometheus text file and/or a localhost endpoint (see module comment)."""
+    def __init__(self, collect, file_path: str | None = None, port: int | None = None,
+                 interval_secs: float = METRICS_INTERVAL_DEFAULT_SECS):
+        self.collect = collect
+        self.file_path = file_path
+        self.port = port
+        self.interval_secs = interval_secs
+        self.writes = 0          # file rewrites (each one is a timer wakeup)
+        self.scrapes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def render(self) -> str:
+        self.scrapes += 1
+        return render_prometheus(self.collect())
+
+    def write_file(self) -> None:
+        text = render_prometheus(self.collect())
+        tmp = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        os.replace(tmp, self.file_path)
+        self.writes += 1
+
+    def start(self) -> None:
+        """Start the file writer and/or endpoint (raises OSError if the port can't be bound)."""
+        if self.port is not None and self._server is None:
+            self._server = http.server.ThreadingHTTPServer((METRICS_HOST, self.port), _MetricsRequestHandler)
+            self._server.daemon_threads = True
+            self._server.exporter = self
+            threading.Thread(target=self._server.serve_forever, name="Stay_Awake-metrics-http", daemon=True).start()
+        if self.file_path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Stay_Awake-metrics", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop both; the file gets one last write so it shows the final (released) state."""
+        self._stop.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=2.0)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.file_path:
+            try:
+                self.write_file()
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.write_file()
+            except OSError:
+                pass   # e.g. collector folder briefly unavailable; try again next interval
+            if self._stop.wait(self.interval_secs):
+                return
@@ -0,0 +1,146 @@
+# =============================================================================
+# stay_awake.profiling — --profile: profile startup plus N minutes of steady state.
+#
+# SessionProfiler runs cProfile (deterministic, stdlib only) from start() until stop(),
+# which is called by a timer after 'duration_secs' or at exit, whichever comes first; the
+# app keeps running unprofiled after that.
+#   - Python 3.12+: cProfile sits on sys.monitoring, which sees every thread and can be
+#     switched off from any of them
+#   - older: a profiler only sees the thread that enabled it, and only that thread can
+#     disable it, so just the starting (main) thread is profiled and stop() has to run
+#     there: the timer hands it to run_on_owner (the app queues it on the Tk loop). With
+#     no way to get there (--no-gui, --serve, no window yet) profiling lasts until the
+#     atexit stop(), which runs on the main thread
+# stop() writes:
+#   - PATH        pstats file (python -m pstats PATH, snakeviz, ...)
+#   - PATH.txt    summary: top functions by own and by cumulative time, the functions we
+#                 expect to be hot (PROFILE_WATCH), and, with tracemalloc, the peak and
+#                 the top allocation sites
+# =============================================================================
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+PROFILE_DEFAULT_SECS = 600          # startup + 10 minutes
+PROFILE_TOP_N = 25
+PROFILE_TRACEMALLOC_FRAMES = 10
+PROFILE_TRACEMALLOC_TOP_N = 15
+
+# Functions worth a line in the summary even when they are not in the top N
+PROFILE_WATCH = (
+    "_load_eye_image",
+    "_pad_to_square_edge_stretch",
+    "_resize_keep_aspect",
+    "create_tray_icon_image",
+    "create_main_window",
+    "_schedule_countdown_tick",
+    "show_main_window",           # pystray menu callbacks
+    "minimize_to_tray",
+    "quit_application",
+    "cleanup",
+)
+
+def default_profile_path() -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(tempfile.gettempdir(), f"Stay_Awake-{stamp}-{os.getpid()}.prof")
+
+class SessionProfiler:
+    def __init__(self, path: str, duration_secs: float = PROFILE_DEFAULT_SECS, trace_memory: bool = False):
+        self.path = path
+        self.summary_path = path + ".txt"
+        self.duration_secs = duration_secs
+        self.trace_memory = trace_memory
+        self.on_done = None               # on_done(profiler) after the files are written
+        self.run_on_owner = None          # run_on_owner(fn) -> bool: queue fn on the thread that called start()
+        self._profiler = None
+        self._owner = None                # thread that called start()
+        self._mutex = threading.Lock()
+        self._started = None              # (wall epoch, perf_counter, process_time)
+        self._stopped = False
+        self._timer = None
+
+    def start(self) -> None:
+        if tracemalloc.is_tracing():
+            self.trace_memory = False     # somebody else owns it (python -X tracemalloc)
+        if self.trace_memory:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        self._started = (time.time(), time.perf_counter(), time.process_time())
+        self._owner = threading.current_thread()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        self._timer = threading.Timer(self.duration_secs, self._duration_over)
+        self._timer.name = "Stay_Awake-profile"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _off_owner_thread(self) -> bool:
+        """Pre-3.12, and not on the thread whose profiler this is (so it can't be disabled here)."""
+        return sys.version_info < (3, 12) and threading.current_thread() is not self._owner
+
+    def _duration_over(self) -> None:
+        if not self._off_owner_thread():
+            self.stop()
+            return
+        run = self.run_on_owner
+        try:
+            if run is not None and run(self.stop):
+                return
+        except Exception:
+            pass
+        # Nowhere to run it: the atexit stop() (main thread) writes the files
+
+    def stop(self) -> bool:
+        """Stop profiling and write both files (once); True if this call wrote them."""
+        if self._off_owner_thread():
+            return False
+        with self._mutex:
+            if self._stopped or self._started is None:
+                return False
+            self._stopped = True
+        if self._timer is not None and self._timer is not threading.current_thread():
+            self._timer.cancel()
+        prof = self._profiler
+        prof.disable()
+        wall = time.perf_counter() - self._started[1]
+        cpu = time.process_time() - self._started[2]
+        mem = None
+        if self.trace_memory:
+            mem = (tracemalloc.get_traced_memory(), tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        stats = pstats.Stats(prof)
+        stats.dump_stats(self.path)
+        threads = "all threads" if sys.version_info >= (3, 12) else "main thread only (Python < 3.12)"
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            f.write(self._summary(stats, wall, cpu, threads, mem))
+        if self.on_done is not None:
+            self.on_done(self)
+        return True
+
+    def _summary(self, stats, wall: float, cpu: float, threads: str, mem) -> str:
+        out = io.StringIO()
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._started[0]))
+        out.write(f"Stay_Awake profile: started {started}, {wall:.1f}s wall, {cpu:.3f}s CPU "
+                  f"({100 * cpu / wall if wall else 0:.2f}%), profiled: {threads}\n")
+        out.write(f"Full data: {self.path}  (python -m pstats \"{self.path}\")\n")
+        stats.stream = out
+        for key, title in (("tottime", "own time"), ("cumulative", "cumulative time")):
+            out.write(f"\n===== Top {PROFILE_TOP_N} functions by {title} =====\n")
+            stats.sort_stats(key).print_stats(PROFILE_TOP_N)
+        out.write("\n===== Watched functions =====\n")
+        out.write(f"{'calls':>9} {'own s':>10} {'cum s':>10}  function\n")
+        for (file_name, line, func), (_cc, ncalls, tottime, cumtime, _callers) in sorted(stats.stats.items()):
+            if func in PROFILE_WATCH:
+                out.write(f"{ncalls:>9} {tottime:>10.4f} {cumtime:>10.4f}  {func} ({os.path.basename(file_name)}:{line})\n")
+        if mem is not None:
+            (current, peak), snapshot = mem
+            out.write(f"\n===== tracemalloc: {current / 1e6:.2f} MB traced now, {peak / 1e6:.2f} MB peak =====\n")
+            for stat in snapshot.statistics("lineno")[:PROFILE_TRACEMALLOC_TOP_N]:
+                out.write(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback}\n")
+        return out.getvalue()
@@ -0,0 +1,176 @@
+# =============================================================================
+# stay_awake.renditions — per-user disk cache of ready-to-show image pixels.
+#
+# The window image and the tray icon set are pure functions of the source image bytes and
+# a few constants, so the app stores their final pixels once and a warm start maps them
+# straight back in: no decode, no padding, no resampling. One file per key:
+#     b"STAYAWAKE-RC1\n"  u32 header length  JSON header  raw pixel data ...
+# The header lists each image (name, mode, size, offset, length). load() memory-maps the
+# file and returns memoryviews into the mapping (zero-copy: PIL's Image.frombuffer() reads
+# the pixels in place); close() unmaps them again once no image uses them, which also lets
+# Windows delete the file (a mapped file can't be removed there). Entries are evicted when older than max_age_secs (since last use;
+# a hit refreshes the file's mtime) or, oldest first, while the folder is over max_bytes.
+# Every write is atomic (temp file + rename), so concurrent instances never see torn files.
+# =============================================================================
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+RENDITION_CACHE_MAGIC = b"STAYAWAKE-RC1\n"
+RENDITION_CACHE_SUFFIX = ".rc"
+RENDITION_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RENDITION_CACHE_MAX_AGE_SECS = 30 * 86400
+DIGEST_CHUNK_BYTES = 1024 * 1024
+
+def default_cache_dir() -> str:
+    """Per-user cache folder (outlives the temp folder's cleanups, safe to delete)."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "Stay_Awake", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "stay_awake")
+
+def rendition_key(*parts) -> str:
+    """Stable key from str / bytes / int / tuple parts (e.g. source digest, sizes, a version tag)."""
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        data = part if isinstance(part, (bytes, bytearray, memoryview)) else repr(part).encode("utf-8")
+        h.update(struct.pack("<Q", len(data)))
+        h.update(data)
+    return h.hexdigest()
+
+def content_digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+def file_digest(f) -> str:
+    """content_digest() of an open binary file's remaining bytes, read in chunks."""
+    h = hashlib.blake2b(digest_size=20)
+    while chunk := f.read(DIGEST_CHUNK_BYTES):
+        h.update(chunk)
+    return h.hexdigest()
+
+class RenditionCache:
+    def __init__(self, directory: str | None = None, max_bytes: int = RENDITION_CACHE_MAX_BYTES,
+                 max_age_secs: float = RENDITION_CACHE_MAX_AGE_SECS):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age_secs = max_age_secs
+        self.hits = 0
+        self.misses = 0
+        self._maps = []           # open mmaps backing images handed out by load()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + RENDITION_CACHE_SUFFIX)
+
+    def load(self, key: str) -> dict[str, tuple[str, tuple[int, int], memoryview]] | None:
+        """{name: (mode, (w, h), pixels)} for 'key', or None. The pixels stay mapped until close()."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):     # missing, or empty (ValueError from mmap)
+            self.misses += 1
+            return None
+        try:
+            n = len(RENDITION_CACHE_MAGIC)
+            if mm[:n] != RENDITION_CACHE_MAGIC:
+                raise ValueError("bad magic")
+            (hlen,) = struct.unpack_from("<I", mm, n)
+            header = json.loads(mm[n + 4:n + 4 + hlen].decode("utf-8"))
+            if header.get("key") != key:
+                raise ValueError("key mismatch")
+            base = n + 4 + hlen
+            spans = []
+            for rec in header["images"]:
+                start = base + rec["offset"]
+                end = start + rec["length"]
+                if end > len(mm):
+                    raise ValueError("truncated")
+                spans.append((rec["name"], rec["mode"], tuple(rec["size"]), start, end))
+        except (ValueError, KeyError, TypeError, struct.error):
+            mm.close()
+            self.misses += 1
+            self._remove(path)
+            return None
+        view = memoryview(mm)     # only once the file checks out: mm.close() above needs no views
+        images = {name: (mode, size, view[start:end]) for name, mode, size, start, end in spans}
+        self._maps.append(mm)
+        self.hits += 1
+        try:
+            os.utime(path)            # age counts from last use
+        except OSError:
+            pass
+        return images
+
+    def close(self) -> int:
+        """
+        Unmap what load() handed out. A mapping whose pixels are still in use (an image
+        made with frombuffer() is alive) stays open for a later close(). Returns how many stay.
+        """
+        still_used = []
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:   # exported memoryviews still exist
+                still_used.append(mm)
+        self._maps = still_used
+        return len(still_used)
+
+    def save(self, key: str, images: dict[str, tuple[str, tuple[int, int], bytes]]) -> bool:
+        """Store {name: (mode, (w, h), pixel bytes)} under 'key' (atomic), then evict."""
+        records, offset = [], 0
+        for name, (mode, size, data) in images.items():
+            records.append({"name": name, "mode": mode, "size": list(size), "offset": offset, "length": len(data)})
+            offset += len(data)
+        header = json.dumps({"key": key, "created": time.time(), "images": records}).encode("utf-8")
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(RENDITION_CACHE_MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                for _mode, _size, data in images.values():
+                    f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            self._remove(tmp)
+            return False
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep: str | None = None) -> int:
+        """Drop expired entries, then the least recently used ones while over max_bytes."""
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(RENDITION_CACHE_SUFFIX):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path, entry.name[: -len(RENDITION_CACHE_SUFFIX)]))
+        except OSError:
+            return 0
+        removed = 0
+        now = time.time()
+        total = sum(e[1] for e in entries)
+        for mtime, size, path, key in sorted(entries):
+            if key == keep:
+                continue
+            if now - mtime > self.max_age_secs or total > self.max_bytes:
+                if self._remove(path):
+                    removed += 1
+                    total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:   # gone already, or mapped by another instance (Windows)
+            return False
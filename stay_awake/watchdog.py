@@ -0,0 +1,97 @@
+# =============================================================================
+# stay_awake.watchdog — notice when the wake lock is dropped underneath us.
+#
+# A power request can vanish without Stay_Awake doing anything (a D-Bus inhibitor
+# released, a power service restarted, ...). The watchdog asks the backend to
+# verify() the lock at a low, adaptive interval and re-acquires it with backoff:
+#   - healthy:  interval doubles from WATCHDOG_MIN_SECS up to WATCHDOG_MAX_SECS
+#   - lost:     re-acquire now, then retry every REACQUIRE_BACKOFF_MIN_SECS, doubling
+#               up to REACQUIRE_BACKOFF_MAX_SECS, until it sticks
+# State changes ("ok" / "lost" / "failed") are reported through on_state(state, detail).
+# =============================================================================
+
+import threading
+
+WATCHDOG_MIN_SECS = 30.0
+WATCHDOG_MAX_SECS = 300.0
+REACQUIRE_BACKOFF_MIN_SECS = 5.0
+REACQUIRE_BACKOFF_MAX_SECS = 300.0
+
+class WakeLockWatchdog:
+    """Daemon thread that verifies a stay_awake.core.WakeLock and re-acquires it if it was lost."""
+    def __init__(self, wake_lock, on_state=None,
+                 min_secs: float = WATCHDOG_MIN_SECS, max_secs: float = WATCHDOG_MAX_SECS,
+                 backoff_min_secs: float = REACQUIRE_BACKOFF_MIN_SECS, backoff_max_secs: float = REACQUIRE_BACKOFF_MAX_SECS):
+        self.wake_lock = wake_lock
+        self.on_state = on_state
+        self.min_secs = min_secs
+        self.max_secs = max_secs
+        self.backoff_min_secs = backoff_min_secs
+        self.backoff_max_secs = backoff_max_secs
+        self.state = "ok"
+        self.reacquire_attempts = 0      # since the lock was last seen healthy
+        self.reacquires = 0              # successful re-acquires, lifetime
+        self.checks = 0                  # timer wakeups (one verify, or re-acquire attempt, each)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Stay_Awake-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop promptly (wakes the thread out of its wait); safe to call more than once."""
+        self._stop.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=2.0)
+
+    def _set_state(self, state: str, detail: str) -> None:
+        changed = state != self.state
+        self.state = state
+        if changed and self.on_state is not None:
+            try:
+                self.on_state(state, detail)
+            except Exception:
+                pass
+
+    def check_once(self) -> float | None:
+        """One verify (+ re-acquire if needed). Returns a retry delay while failing, else None."""
+        if self.wake_lock.closed or (self.state == "ok" and self.wake_lock.verify()):
+            return None
+        # Lost (or still failing): try to get it back
+        if self.state == "ok":
+            self._set_state("lost", "wake lock no longer in effect; re-acquiring")
+        self.reacquire_attempts += 1
+        try:
+            self.wake_lock.reacquire()
+            ok = self.wake_lock.mode is not None and self.wake_lock.verify()
+            error = "re-acquired lock is not in effect"
+        except Exception as e:
+            if self.wake_lock.closed:
+                return None       # shutting down: cleanup() closed the lock under us
+            ok = False
+            error = str(e) or type(e).__name__
+        if ok:
+            self.reacquires += 1
+            attempts, self.reacquire_attempts = self.reacquire_attempts, 0
+            self._set_state("ok", f"wake lock re-acquired (mode: {self.wake_lock.mode}, attempt {attempts})")
+            return None
+        self._set_state("failed", f"re-acquire failed: {error}")
+        return min(self.backoff_max_secs, self.backoff_min_secs * (2 ** (self.reacquire_attempts - 1)))
+
+    def _run(self) -> None:
+        interval = self.min_secs
+        while not self._stop.wait(interval):
+            self.checks += 1
+            was_ok = self.state == "ok"
+            retry_in = self.check_once()
+            if retry_in is not None:
+                interval = retry_in
+            elif was_ok:
+                # Healthy: back off (a dropped lock is rare, and verify() is cheap anyway)
+                interval = min(self.max_secs, interval * 2)
+            else:
+                # Just recovered: watch closely again
+                interval = self.min_secs
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Stay_Awake.py and the stay_awake package live at the repo root (no install step)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# pystray picks its tray backend at import time; the xorg one needs a display, which CI lacks
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")
+
+@pytest.fixture(scope="session")
+def sa():
+    """The Stay_Awake.py module, Pillow loaded (skips where the GUI dependencies aren't installed)."""
+    for name in ("PIL", "pystray", "wakepy"):
+        pytest.importorskip(name)
+    import Stay_Awake
+    Stay_Awake._import_pil()
+    return Stay_Awake
+
+@pytest.fixture
+def app(sa, tmp_path):
+    """A Stay_AwakeTrayApp that is never run(): no lock, window or tray; its own rendition cache."""
+    from stay_awake.renditions import RenditionCache
+    return sa.Stay_AwakeTrayApp(show_gui=False, rendition_cache=RenditionCache(str(tmp_path / "rc")))
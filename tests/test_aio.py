@@ -0,0 +1,87 @@
+# stay_awake.aio.AsyncHold: cancellation safety and a deadline that lives on the loop.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from stay_awake.aio import AsyncHold
+from stay_awake.backends import FakeBackend
+
+async def _until(predicate, timeout=5.0):
+    limit = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < limit:
+        await asyncio.sleep(0.01)
+
+def test_cancel_inside_block_releases_once():
+    backend = FakeBackend()
+
+    async def main():
+        entered = asyncio.Event()
+
+        async def worker():
+            async with AsyncHold(for_="1h", backend=backend):
+                entered.set()
+                await asyncio.sleep(3600)
+
+        task = asyncio.create_task(worker())
+        await entered.wait()
+        assert backend.held
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert backend.calls == ["acquire", "release"]
+    assert not backend.held
+
+def test_cancel_during_acquire_still_releases_once():
+    backend = FakeBackend(latency_secs=0.2)
+
+    async def main():
+        task = asyncio.create_task(AsyncHold(backend=backend).acquire())
+        await asyncio.sleep(0.05)       # the executor is inside backend.acquire()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await _until(lambda: "release" in backend.calls)
+
+    asyncio.run(main())
+    assert backend.calls == ["acquire", "release"]
+    assert not backend.held
+
+def test_deadline_fires_on_the_running_loop():
+    backend = FakeBackend()
+
+    async def main():
+        hold = AsyncHold(for_="10s", backend=backend)
+        hold.target_epoch = time.time() + 0.2
+        async with hold:
+            task = hold._deadline_task
+            assert task is not None
+            assert task in asyncio.all_tasks()           # a task on this loop, not a threading.Timer
+            assert task.get_loop() is asyncio.get_running_loop()
+            await _until(lambda: not hold.active)
+            assert hold.expired
+            assert not backend.held
+        return hold
+
+    hold = asyncio.run(main())
+    assert hold._deadline_task is None
+    assert backend.calls == ["acquire", "release"]
+    assert not any(isinstance(t, threading.Timer) for t in threading.enumerate())
+
+def test_release_before_deadline_cancels_it():
+    backend = FakeBackend()
+
+    async def main():
+        hold = await AsyncHold(for_="1h", backend=backend).acquire()
+        task = hold._deadline_task
+        await hold.release()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert not hold.expired
+
+    asyncio.run(main())
+    assert backend.calls == ["acquire", "release"]
@@ -0,0 +1,240 @@
+# stay_awake.conditions: each wait_* returns once its condition clears, and not before.
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from stay_awake import conditions
+
+def _start(fn, *args):
+    """Run fn(*args) on a daemon thread; the returned list gets its result."""
+    result = []
+    t = threading.Thread(target=lambda: result.append(fn(*args)), daemon=True)
+    t.start()
+    return t, result
+
+# -------------------- --while-pid --------------------
+
+def _sleeper():
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+def test_wait_for_pids_exit_returns_when_killed_child_exits():
+    proc = _sleeper()
+    try:
+        t, _ = _start(conditions.wait_for_pids_exit, [proc.pid])
+        t.join(0.5)
+        assert t.is_alive()
+    finally:
+        proc.kill()
+        proc.wait()   # reaped, so the liveness fallback sees it gone too
+    t.join(10)
+    assert not t.is_alive()
+
+def test_wait_for_pids_exit_waits_for_all():
+    first, second = _sleeper(), _sleeper()
+    try:
+        t, _ = _start(conditions.wait_for_pids_exit, [first.pid, second.pid, first.pid])
+        first.kill()
+        first.wait()
+        t.join(0.5)
+        assert t.is_alive()
+    finally:
+        second.kill()
+        second.wait()
+    t.join(10)
+    assert not t.is_alive()
+
+def test_wait_for_pids_exit_dead_pid_returns_at_once():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    assert not conditions.pid_exists(proc.pid)
+    t, _ = _start(conditions.wait_for_pids_exit, [proc.pid])
+    t.join(5)
+    assert not t.is_alive()
+
+def test_liveness_fallback(monkeypatch):
+    monkeypatch.setattr(conditions, "PID_FALLBACK_POLL_SECS", 0.05)
+    proc = _sleeper()
+    try:
+        t, _ = _start(conditions._poll_pids_exit, [proc.pid])
+        t.join(0.3)
+        assert t.is_alive()
+    finally:
+        proc.kill()
+        proc.wait()
+    t.join(5)
+    assert not t.is_alive()
+
+# -------------------- --while-dir-nonempty / --while-file-growing --------------------
+
+@pytest.fixture
+def fast_fs(monkeypatch):
+    monkeypatch.setattr(conditions, "FS_EVENT_COALESCE_SECS", 0.05)
+    monkeypatch.setattr(conditions, "FS_STAT_SAMPLE_SECS", 0.05)
+
+@pytest.fixture(params=["native", "stat-sampling"])
+def waiter_kind(request, monkeypatch, fast_fs):
+    """Run each filesystem test on this OS's change notifications and on the _StatSampleWaiter fallback."""
+    if request.param == "stat-sampling":
+        monkeypatch.setattr(conditions, "_fs_change_waiter", lambda path, is_dir: conditions._StatSampleWaiter(path))
+    return request.param
+
+def test_dir_nonempty_waits_for_settle_after_emptying(tmp_path, waiter_kind):
+    (tmp_path / "job.tmp").write_bytes(b"x")
+    t, _ = _start(conditions.wait_while_dir_nonempty, str(tmp_path), 0.3)
+    t.join(0.3)
+    assert t.is_alive()
+    (tmp_path / "job.tmp").unlink()
+    emptied = time.monotonic()
+    t.join(5)
+    assert not t.is_alive()
+    assert time.monotonic() - emptied >= 0.3
+
+def test_dir_refilled_during_settle_restarts_it(tmp_path, waiter_kind):
+    t, _ = _start(conditions.wait_while_dir_nonempty, str(tmp_path), 0.4)
+    time.sleep(0.2)
+    (tmp_path / "late.tmp").write_bytes(b"x")
+    time.sleep(0.3)
+    assert t.is_alive()             # 0.5s after start, but not empty for 0.4s
+    (tmp_path / "late.tmp").unlink()
+    emptied = time.monotonic()
+    t.join(5)
+    assert not t.is_alive()
+    assert time.monotonic() - emptied >= 0.4
+
+def test_file_growing_holds_while_appended(tmp_path, waiter_kind):
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"")
+    t, _ = _start(conditions.wait_while_file_growing, str(path), 0.3)
+    for _ in range(8):              # ~0.8s of writes, each well inside the settle time
+        time.sleep(0.1)
+        with open(path, "ab") as f:
+            f.write(b"x" * 100)
+        assert t.is_alive()
+    last_write = time.monotonic()
+    t.join(5)
+    assert not t.is_alive()
+    assert time.monotonic() - last_write >= 0.3
+
+def test_untouched_file_settles(tmp_path, waiter_kind):
+    path = tmp_path / "done.bin"
+    path.write_bytes(b"x")
+    start = time.monotonic()
+    t, _ = _start(conditions.wait_while_file_growing, str(path), 0.2)
+    t.join(5)
+    assert not t.is_alive()
+    assert time.monotonic() - start >= 0.2
+
+def test_change_waiter_falls_back_to_stat_sampling(tmp_path, monkeypatch, fast_fs):
+    def _unavailable(*args):
+        raise OSError(38, "Function not implemented")
+    monkeypatch.setattr(conditions, "_InotifyWaiter", _unavailable)
+    monkeypatch.setattr(conditions, "_WinChangeWaiter", _unavailable)
+    waiter = conditions._fs_change_waiter(str(tmp_path), is_dir=True)
+    try:
+        assert isinstance(waiter, conditions._StatSampleWaiter)
+        assert not waiter.wait(0.1)
+        os.utime(tmp_path, ns=(0, 0))
+        assert waiter.wait(1)
+    finally:
+        waiter.close()
+
+# -------------------- --while-connections --------------------
+
+_PROC_NET_TCP = """\
+  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1001 1 0000000000000000 100 0 0 10 0
+   1: 0100007F:0CEA 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1002 1 0000000000000000 100 0 0 10 0
+   2: 0A00000F:0016 0A000001:C3A2 01 00000000:00000000 02:000A5F3C 00000000     0        0 1003 4 0000000000000000 20 4 30 10 -1
+   3: 0A00000F:9C40 5DB8D822:01BB 06 00000000:00000000 03:00000E9A 00000000  1000        0 0 3 0000000000000000
+   4: garbage
+"""
+_PROC_NET_TCP6 = """\
+  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000000000000000000001000000:0D3D 00000000000000000000000001000000:E0F4 01 00000000:00000000 00:00000000 00000000  1000        0 2001 1 0000000000000000 20 4 0 10 -1
+"""
+
+def test_parse_proc_net_tcp():
+    assert list(conditions._parse_proc_net_tcp(_PROC_NET_TCP.splitlines())) == [
+        (22, False), (3306, False), (22, True), (40000, False)]    # LISTEN, LISTEN, ESTABLISHED, TIME_WAIT
+    assert list(conditions._parse_proc_net_tcp(_PROC_NET_TCP6.splitlines())) == [(3389, True)]
+    assert list(conditions._parse_proc_net_tcp([])) == []
+
+def test_linux_tcp_rows_reads_both_tables(tmp_path):
+    (tmp_path / "tcp").write_text(_PROC_NET_TCP, encoding="ascii")
+    (tmp_path / "tcp6").write_text(_PROC_NET_TCP6, encoding="ascii")
+    paths = (str(tmp_path / "tcp"), str(tmp_path / "missing"), str(tmp_path / "tcp6"))
+    assert conditions.has_established_connections({3389}, lambda: conditions._linux_tcp_rows(paths))
+    assert not conditions.has_established_connections({3306, 40000}, lambda: conditions._linux_tcp_rows(paths))
+
+class _Clock:
+    """Virtual time.monotonic()/time.sleep() for the module under test: waits take no real time."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(conditions, "time", clock)
+    return clock
+
+def _sessions(clock, *spans, rows_when_up=((22, True),), rows_when_down=()):
+    """Connection source: 'rows_when_up' while clock.now is inside any [start, end) span."""
+    return lambda: list(rows_when_up if any(a <= clock.now < b for a, b in spans) else rows_when_down)
+
+def test_established_session_blocks(clock):
+    conditions.wait_while_connections([22], 30, _sessions(clock, (0, 1000)))
+    assert clock.now >= 1000 + 30
+    assert max(clock.sleeps) == conditions.CONN_CHECK_MAX_SECS       # backed off while up
+    assert clock.sleeps[0] == conditions.CONN_CHECK_MIN_SECS
+
+def test_other_ports_and_states_do_not_hold(clock):
+    idle = _sessions(clock, rows_when_down=[(80, True), (22, False), (2222, True)])
+    conditions.wait_while_connections([22], 30, idle)
+    assert clock.now == 30
+
+def test_returning_session_resets_grace(clock, monkeypatch):
+    monkeypatch.setattr(conditions, "CONN_CHECK_MIN_SECS", 5.0)
+    # checks at 0 (up), 5, 10 (up again: the grace that began at 5 is void), 15, 20, 25, 27
+    conditions.wait_while_connections([22], 12, _sessions(clock, (0, 1), (10, 11)))
+    assert clock.now == 15 + 12
+
+# -------------------- --heartbeat-file --------------------
+
+def test_touched_heartbeat_keeps_wait_alive(tmp_path):
+    beat = tmp_path / "beat"
+    beat.touch()
+    t, result = _start(conditions.wait_for_missed_heartbeat, str(beat), 0.3)
+    for _ in range(8):              # ~0.8s of beats, each inside the timeout
+        time.sleep(0.1)
+        os.utime(beat)
+        assert t.is_alive()
+    t.join(5)
+    assert result == [True]
+
+def test_missed_heartbeat_returns_true(tmp_path):
+    start = time.monotonic()
+    t, result = _start(conditions.wait_for_missed_heartbeat, str(tmp_path / "never-created"), 0.2)
+    t.join(5)
+    assert result == [True]
+    assert time.monotonic() - start >= 0.2     # startup counts as a beat
+
+def test_heartbeat_stop_event_returns_false(tmp_path):
+    stop = threading.Event()
+    t, result = _start(conditions.wait_for_missed_heartbeat, str(tmp_path / "beat"), 60, stop)
+    time.sleep(0.1)
+    stop.set()
+    t.join(5)
+    assert result == [False]
@@ -0,0 +1,148 @@
+# Lifecycle, shutdown and deadline tests for stay_awake.core, on the in-memory backends
+# (no wakepy, no OS calls); WakepyBackend last, with wakepy's faked activation.
+
+import threading
+import time
+import warnings
+
+import pytest
+
+from stay_awake.backends import FakeBackend, ScriptedFailureBackend, WakeBackend, WakeLockError, WakepyBackend
+from stay_awake.core import Hold, WakeLock
+
+def test_hold_acquires_and_releases_once():
+    backend = FakeBackend()
+    with Hold(backend=backend) as h:
+        assert h.active
+        assert backend.held
+    assert not h.active
+    assert not backend.held
+    assert backend.calls == ["acquire", "release"]
+    stats = h.wake_lock.stats()
+    assert (stats["acquires"], stats["releases"], stats["mode"]) == (1, 1, None)
+
+def test_cleanup_is_idempotent():
+    backend = FakeBackend()
+    lock = WakeLock(backend)
+    lock.acquire()
+    lock.acquire()
+    for _ in range(3):
+        lock.release()
+    assert backend.calls == ["acquire", "release"]
+    assert (lock.acquire_count, lock.release_count) == (1, 1)
+
+def test_concurrent_releases_call_backend_once():
+    backend = FakeBackend(latency_secs=0.01)
+    lock = WakeLock(backend)
+    lock.acquire()
+    threads = [threading.Thread(target=lock.release) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert backend.calls.count("release") == 1
+
+def test_scripted_acquire_failure_leaves_lock_free():
+    backend = ScriptedFailureBackend(acquire_script=[False, OSError("D-Bus down"), True])
+    lock = WakeLock(backend)
+    with pytest.raises(WakeLockError):
+        lock.acquire()
+    with pytest.raises(OSError):
+        lock.acquire()
+    assert not lock.active
+    lock.acquire()
+    assert lock.active
+    stats = lock.stats()
+    assert (stats["acquires"], stats["acquire_failures"]) == (1, 2)
+    lock.release()
+    lock.release()
+    assert backend.calls == ["acquire", "release"]
+
+def test_acquire_not_in_effect_counts_as_failure():
+    lock = WakeLock(ScriptedFailureBackend(acquire_script=[None]))
+    lock.acquire()
+    assert lock.active
+    assert lock.mode is None
+    assert lock.stats()["acquire_failures"] == 1
+
+def test_scripted_release_failure_still_drops_lock():
+    lock = WakeLock(ScriptedFailureBackend(release_script=[False]))
+    lock.acquire()
+    with pytest.raises(WakeLockError):
+        lock.release()
+    assert not lock.active
+    lock.release()
+    assert lock.stats()["release_failures"] == 1
+
+def test_deadline_already_passed_releases_at_once():
+    backend = FakeBackend()
+    h = Hold(for_="10s", backend=backend)
+    h.target_epoch = time.time() - 1
+    h.acquire()
+    assert h.expired
+    assert not h.active
+    assert backend.calls == ["acquire", "release"]
+
+def test_deadline_expiry_releases_lock_inside_block():
+    backend = FakeBackend()
+    h = Hold(for_="10s", backend=backend)
+    h.target_epoch = time.time() + 0.5          # re-ceiled to a 1s timer on acquire
+    with h:
+        assert h.active
+        limit = time.monotonic() + 5
+        while h.active and time.monotonic() < limit:
+            time.sleep(0.02)
+        assert h.expired
+        assert not backend.held
+    assert backend.calls == ["acquire", "release"]
+
+def test_release_before_deadline_cancels_timer():
+    backend = FakeBackend()
+    h = Hold(for_="10s", backend=backend).acquire()
+    h.release()
+    assert h._timer is None
+    assert not h.expired
+    assert backend.calls == ["acquire", "release"]
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        WakeBackend()
+
+def test_closed_lock_refuses_reacquire():
+    backend = FakeBackend()
+    lock = WakeLock(backend)
+    lock.acquire()
+    lock.close()
+    lock.close()
+    assert not lock.active
+    with pytest.raises(WakeLockError):
+        lock.reacquire()
+    assert not backend.held
+    assert backend.calls == ["acquire", "release"]
+
+def test_close_waits_for_reacquire_in_flight():
+    # A watchdog re-acquire that is still inside backend.acquire() when cleanup closes the
+    # lock must not leave the system held awake on exit.
+    backend = FakeBackend(latency_secs=0.2)
+    lock = WakeLock(backend)
+    lock.acquire()
+    watchdog = threading.Thread(target=lock.reacquire)
+    watchdog.start()
+    time.sleep(0.3)          # release done, acquire in progress
+    lock.close()
+    watchdog.join()
+    assert not backend.held
+    assert backend.calls == ["acquire", "release", "acquire", "release"]
+
+def test_wakepy_backend_releases_from_another_thread(monkeypatch):
+    pytest.importorskip("wakepy")
+    monkeypatch.setenv("WAKEPY_FAKE_SUCCESS", "1")   # wakepy's own switch: "activates" without OS calls
+    lock = WakeLock(WakepyBackend())
+    t = threading.Thread(target=lock.acquire)         # e.g. a watchdog re-acquire
+    t.start()
+    t.join()
+    assert lock.mode
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")                # wakepy warns when a Mode changes threads
+        lock.release()                                # e.g. cleanup() on the main thread
+    assert lock.stats()["release_failures"] == 0
@@ -0,0 +1,86 @@
+# stay_awake.filewatch.FileChangeWatcher and the app's image hot reload: a save by temp file
+# + rename is one change, and the wake lock is never touched.
+
+import os
+import time
+
+import pytest
+
+from stay_awake import conditions, filewatch
+from stay_awake.backends import FakeBackend
+from stay_awake.core import WakeLock
+from stay_awake.renditions import RenditionCache
+
+@pytest.fixture(params=["native", "stat-sampling"])
+def waiter_kind(request, monkeypatch):
+    """Run each test on this OS's change notifications and on the _StatSampleWaiter fallback."""
+    monkeypatch.setattr(conditions, "FS_EVENT_COALESCE_SECS", 0.1)
+    monkeypatch.setattr(conditions, "FS_STAT_SAMPLE_SECS", 0.05)
+    if request.param == "stat-sampling":
+        monkeypatch.setattr(filewatch, "saved_file_waiter", conditions._StatSampleWaiter)
+    return request.param
+
+def _save_by_rename(path, data):
+    """What most editors and image tools do: write a temp file next to it, rename it over."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def _until(predicate, timeout=5.0):
+    limit = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < limit:
+        time.sleep(0.01)
+    return predicate()
+
+def test_save_by_rename_is_one_change(tmp_path, waiter_kind):
+    path = tmp_path / "icon.png"
+    path.write_bytes(b"first")
+    (tmp_path / "other.txt").write_bytes(b"x")
+    calls = []
+    watcher = filewatch.FileChangeWatcher(str(path), calls.append)
+    watcher.start()
+    try:
+        (tmp_path / "other.txt").write_bytes(b"changed")       # same folder, other file
+        time.sleep(0.3)
+        assert calls == []
+        _save_by_rename(path, b"second, longer")
+        assert _until(lambda: calls)
+        time.sleep(0.5)                                        # no second call for the same save
+        assert calls == [str(path)]
+        _save_by_rename(path, b"third save")                   # the watch survived the rename
+        assert _until(lambda: len(calls) == 2)
+    finally:
+        watcher.stop()
+    assert watcher.changes == 2
+
+class _Window:
+    """Stands in for the Tk root: records what run_on_tk() queues."""
+    def __init__(self):
+        self.queued = []
+
+    def after(self, ms, fn):
+        self.queued.append(fn)
+
+def test_app_reloads_on_save_by_rename_without_touching_the_lock(sa, tmp_path, waiter_kind):
+    icon = tmp_path / "icon.png"
+    sa.Image.new("RGBA", (64, 48), (200, 0, 0, 255)).save(icon)
+    app = sa.Stay_AwakeTrayApp(show_gui=False, icon_override_path=str(icon),
+                               rendition_cache=RenditionCache(str(tmp_path / "rc")))
+    backend = FakeBackend(mode="fake")
+    app.wake_lock = WakeLock(backend)
+    app.wake_lock.acquire()
+    app.create_tray_icon_image()
+    app.main_window = _Window()
+    app._start_icon_watch()
+    try:
+        blue = tmp_path / "blue.png"
+        sa.Image.new("RGBA", (64, 48), (0, 0, 200, 255)).save(blue)
+        _save_by_rename(icon, blue.read_bytes())
+        assert _until(lambda: app.image_reloads == 1)
+        time.sleep(0.5)
+        assert app.image_reloads == 1
+    finally:
+        app._icon_watcher.stop()
+    assert app._tray_icon_image.getpixel((8, 8))[:3] == (0, 0, 200)
+    assert len(app.main_window.queued) == 1                    # the window swap, via run_on_tk()
+    assert backend.calls == ["acquire"] and app.wake_lock.stats()["active"]
@@ -0,0 +1,77 @@
+# _open_image_reduced(): big image files are decoded near display size, in bounded memory.
+
+import struct
+import zlib
+
+import pytest
+
+from stay_awake.renditions import RenditionCache
+
+PALETTE = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+
+def _png_header_only(path, w, h):
+    """A PNG whose IHDR claims w x h, with no pixel data: any attempt to decode it fails."""
+    ihdr = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
+    chunk = lambda kind, data: struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b""))
+
+@pytest.fixture
+def converts(sa, monkeypatch):
+    """(mode, size) of every Image.convert() call."""
+    calls = []
+    real_convert = sa.Image.Image.convert
+    def _convert(self, mode=None, *args, **kwargs):
+        calls.append((self.mode, self.size))
+        return real_convert(self, mode, *args, **kwargs)
+    monkeypatch.setattr(sa.Image.Image, "convert", _convert)
+    return calls
+
+@pytest.mark.parametrize("fmt", ["GIF", "PNG"])
+def test_palette_image_is_downscaled_before_conversion(sa, tmp_path, converts, fmt):
+    im = sa.Image.new("P", (4000, 3000))
+    im.putpalette([c for rgb in PALETTE for c in rgb])
+    draw = sa.ImageDraw.Draw(im)
+    for i in range(0, 4000, 50):
+        draw.rectangle([i, 0, i + 49, 2999], fill=(i // 50) % len(PALETTE))
+    path = tmp_path / f"big.{fmt.lower()}"
+    im.save(path, fmt)
+    converts.clear()
+    out = sa.Stay_AwakeTrayApp._open_image_reduced(path)
+    assert out.mode == "RGBA"
+    assert sa.MAX_DISPLAY_PX <= max(out.size) < 2 * sa.MAX_DISPLAY_PX
+    assert converts and all(size == out.size for _mode, size in converts)   # never at 4000x3000
+    assert {rgba[:3] for _n, rgba in out.getcolors(256)} <= set(PALETTE)    # indices, not blends
+
+def test_one_bit_image_is_box_filtered(sa, tmp_path):
+    im = sa.Image.new("1", (2048, 2048))
+    sa.ImageDraw.Draw(im).rectangle([0, 0, 1023, 2047], fill=1)
+    path = tmp_path / "bw.png"
+    im.save(path)
+    out = sa.Stay_AwakeTrayApp._open_image_reduced(path)
+    assert out.size == (512, 512)
+    assert out.getpixel((0, 0)) == (255, 255, 255, 255) and out.getpixel((511, 0)) == (0, 0, 0, 255)
+
+def test_over_pixel_cap_is_refused_before_decoding(sa, tmp_path):
+    path = tmp_path / "huge.png"
+    _png_header_only(path, 8000, 6000)
+    with pytest.raises(ValueError, match="megapixel limit"):     # not the decoder's "truncated" error
+        sa.Stay_AwakeTrayApp._open_image_reduced(path)
+
+def test_cap_counts_decoded_pixels(sa, tmp_path, monkeypatch):
+    monkeypatch.setattr(sa, "MAX_SOURCE_PIXELS", 1_000_000)
+    img = sa.Image.new("RGB", (1600, 1000), (200, 100, 50))
+    for name in ("big.jpg", "big.png", "small.png", "small.webp"):
+        (img if name.startswith("big") else img.resize((600, 500))).save(tmp_path / name)
+    assert sa.Stay_AwakeTrayApp._open_image_reduced(tmp_path / "big.jpg").size == (800, 500)   # DCT-scaled to 1/2
+    assert sa.Stay_AwakeTrayApp._open_image_reduced(tmp_path / "small.png").size == (600, 500)
+    for name in ("big.png", "small.webp"):      # 1.6 MP; 0.3 MP at 4x the decode memory
+        with pytest.raises(ValueError, match="megapixel limit"):
+            sa.Stay_AwakeTrayApp._open_image_reduced(tmp_path / name)
+
+def test_over_cap_override_falls_back_to_embedded_image(sa, tmp_path):
+    path = tmp_path / "huge.png"
+    _png_header_only(path, 8000, 6000)
+    app = sa.Stay_AwakeTrayApp(show_gui=False, icon_override_path=str(path),
+                               rendition_cache=RenditionCache(str(tmp_path / "rc")))
+    assert app._load_eye_image().size == (1024, 857)
+    assert app._source_path is None
@@ -0,0 +1,69 @@
+# Where the app's image comes from: only a file that actually decoded is reported as "in use"
+# (_source_path, watched for hot reload), image files are hashed and decoded in chunks, and
+# the Stay_Awake_icon.* header probes are cached next to the renditions.
+
+from pathlib import Path
+
+import pytest
+
+from stay_awake.renditions import RenditionCache, content_digest
+
+PRESIZED_PNG_HEAD = (b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR"
+                     + (64).to_bytes(4, "big") + (48).to_bytes(4, "big") + b"\x08\x06\x00\x00\x00")
+
+def _app(sa, tmp_path, icon):
+    return sa.Stay_AwakeTrayApp(show_gui=False, icon_override_path=str(icon),
+                                rendition_cache=RenditionCache(str(tmp_path / "rc")))
+
+def test_first_source_only_reads(sa, tmp_path):
+    icon = tmp_path / "icon.png"
+    icon.write_bytes(PRESIZED_PNG_HEAD + b"not really a png")
+    app = _app(sa, tmp_path, icon)
+    assert app._first_source() == ("file", icon)
+    assert app._peek_source_digest() == content_digest(icon.read_bytes())
+    assert app._source_path is None
+
+def test_undecodable_override_is_not_in_use(sa, tmp_path):
+    icon = tmp_path / "icon.png"
+    icon.write_bytes(PRESIZED_PNG_HEAD + b"not really a png")
+    app = _app(sa, tmp_path, icon)
+    img = app._load_eye_image()             # falls back to the embedded image
+    assert img.size == (1024, 857)
+    assert app._source_path is None
+
+def test_decoded_override_is_in_use(sa, tmp_path):
+    icon = tmp_path / "icon.png"
+    sa.Image.new("RGBA", (64, 48), (10, 20, 30, 255)).save(icon)
+    app = _app(sa, tmp_path, icon)
+    assert app._load_eye_image().size == (64, 48)
+    assert app._source_path == icon
+
+def test_file_source_is_hashed_in_chunks(sa, tmp_path, monkeypatch):
+    icon = tmp_path / "icon.png"
+    sa.Image.new("RGBA", (64, 48), (10, 20, 30, 255)).save(icon)
+    data = icon.read_bytes()
+    monkeypatch.setattr("stay_awake.renditions.DIGEST_CHUNK_BYTES", 100)
+    monkeypatch.setattr(Path, "read_bytes", lambda self: pytest.fail(f"read {self} whole"))
+    app = _app(sa, tmp_path, icon)
+    assert app._peek_source_digest() == content_digest(data)
+    assert app._load_eye_image().size == (64, 48)
+    assert app._source_digest == content_digest(data)
+
+def test_icon_probe_cache_lives_in_the_cache_folder(sa, tmp_path, monkeypatch):
+    folder = tmp_path / "app"
+    folder.mkdir()
+    sa.Image.new("RGBA", (64, 48), (10, 20, 30, 255)).save(folder / "Stay_Awake_icon.png")
+    (folder / "Stay_Awake_icon.jpg").write_bytes(b"not an image")
+    monkeypatch.setattr(sa.Stay_AwakeTrayApp, "_script_dir", lambda self: folder)
+    probes = []
+    real_probe = sa.Stay_AwakeTrayApp._probe_image_header
+    monkeypatch.setattr(sa.Stay_AwakeTrayApp, "_probe_image_header",
+                        staticmethod(lambda path: probes.append(path.name) or real_probe(path)))
+    cache = RenditionCache(str(tmp_path / "rc"))
+    app = sa.Stay_AwakeTrayApp(show_gui=False, rendition_cache=cache)
+    assert app._usable_icon_candidates(folder) == ["Stay_Awake_icon.png"]
+    assert sorted(probes) == ["Stay_Awake_icon.jpg", "Stay_Awake_icon.png"]
+    assert [p.name for p in (tmp_path / "rc").iterdir()] == [app._icon_candidates_cache_path(folder).name]
+    assert app._usable_icon_candidates(folder) == ["Stay_Awake_icon.png"]
+    assert len(probes) == 2                 # warm: stats only
+    assert cache.evict() == 0               # not a rendition entry
@@ -0,0 +1,49 @@
+# stay_awake.journal: atomic record/clear and ownership by the writing PID.
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from stay_awake.journal import DeadlineJournal
+
+@pytest.fixture
+def other_live_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+def _write_as(path, pid, state):
+    path.write_text(json.dumps(dict(state, version=1, pid=pid, written=0)), encoding="utf-8")
+
+def test_record_load_clear(tmp_path):
+    journal = DeadlineJournal(str(tmp_path / "j.json"))
+    assert journal.live_owner() is None
+    assert journal.record({"kind": "app", "target_epoch": 123.0})
+    assert not journal.record({"kind": "app", "target_epoch": 123.0})    # unchanged: no write
+    assert journal.load()["target_epoch"] == 123.0
+    assert journal.live_owner() is None                                   # our own PID
+    journal.clear()
+    assert not os.path.exists(journal.path)
+
+def test_live_instance_owns_its_journal(tmp_path, other_live_pid):
+    path = tmp_path / "j.json"
+    _write_as(path, other_live_pid, {"kind": "app", "target_epoch": 123.0})
+    journal = DeadlineJournal(str(path))
+    assert journal.live_owner() == other_live_pid
+    journal.clear()                     # a second instance's clean exit
+    assert journal.load()["target_epoch"] == 123.0
+
+def test_dead_instance_journal_is_free(tmp_path):
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    path = tmp_path / "j.json"
+    _write_as(path, proc.pid, {"kind": "app", "target_epoch": 123.0})
+    journal = DeadlineJournal(str(path))
+    assert journal.live_owner() is None
+    assert journal.load()["pid"] == proc.pid
+    journal.clear()
+    assert not path.exists()
@@ -0,0 +1,56 @@
+# stay_awake.leasedir: the on-disk index and the first scan.
+
+import os
+import time
+
+import pytest
+
+from stay_awake.backends import FakeBackend
+from stay_awake.core import WakeLock
+from stay_awake.leasedir import LeaseDirWatcher, remove_lease_file, write_lease_file
+from stay_awake.leases import LeaseTable
+
+def _watcher(directory, index_path, **kw):
+    table = LeaseTable(WakeLock(FakeBackend()))
+    return LeaseDirWatcher(str(directory), table, node="node1", index_path=str(index_path), **kw), table
+
+def test_stale_index_is_not_applied_before_first_scan(tmp_path):
+    shared, index = tmp_path / "share", tmp_path / "index.json"
+    shared.mkdir()
+    until = time.time() + 3600
+    write_lease_file(str(shared), "gone", until)
+    write_lease_file(str(shared), "live", until)
+    first, _ = _watcher(shared, index)
+    first.scan()
+
+    remove_lease_file(str(shared), "gone")
+    watcher, table = _watcher(shared, index)
+    assert len(table) == 0                      # index loaded, nothing applied yet
+    assert not table.wake_lock.active
+    watcher.scan()
+    assert [l.name for l in table.leases()] == ["live"]
+
+def test_unreachable_share_at_startup_holds_nothing(tmp_path):
+    shared, index = tmp_path / "share", tmp_path / "index.json"
+    shared.mkdir()
+    write_lease_file(str(shared), "job", time.time() + 3600)
+    _watcher(shared, index)[0].scan()
+    os.rename(shared, tmp_path / "moved")
+
+    watcher, table = _watcher(shared, index)
+    with pytest.raises(OSError):
+        watcher.scan()
+    assert len(table) == 0
+    assert not table.wake_lock.active
+
+def test_first_scan_is_full_even_if_directory_mtime_matches(tmp_path):
+    shared, index = tmp_path / "share", tmp_path / "index.json"
+    shared.mkdir()
+    write_lease_file(str(shared), "job", time.time() + 3600)
+    _watcher(shared, index)[0].scan()
+
+    watcher, table = _watcher(shared, index, full_scan_secs=10 ** 9)
+    assert watcher.scan() is True               # lists although the index's dir mtime matches
+    assert watcher.parses == 0                  # ...and reuses the index's parsed entries
+    assert [l.name for l in table.leases()] == ["job"]
+    assert watcher.scan() is False              # then only the cheap mtime check
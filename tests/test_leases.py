@@ -0,0 +1,138 @@
+# stay_awake.leases at scale and over the socket, on FakeBackend (no wakepy, no OS calls).
+
+import json
+import random
+import socket
+import threading
+import time
+
+import pytest
+
+from stay_awake.backends import FakeBackend
+from stay_awake.core import WakeLock
+from stay_awake.leases import LeaseKeyError, LeaseServer, LeaseTable, lease_request
+
+N_LEASES = 3000
+
+def _lock_calls(backend):
+    return [c for c in backend.calls if c != "verify"]
+
+def test_thousands_of_leases_one_lock_expiry_in_order():
+    backend = FakeBackend()
+    table = LeaseTable(WakeLock(backend))
+    base = time.time() + 3600
+    deadlines = {f"job-{i}": base + i * 0.25 for i in range(N_LEASES)}
+    names = list(deadlines)
+    random.Random(1).shuffle(names)
+    keys = {name: table.open(name, until=deadlines[name]).key for name in names}
+    assert len(table) == N_LEASES
+
+    # Heartbeat leases: beat each one (O(1)), keyed
+    beaters = [f"beat-{i}" for i in range(N_LEASES // 3)]
+    beat_keys = {name: table.open(name, heartbeat=60).key for name in beaters}
+    assert all(table.beat(name, beat_keys[name]) for name in beaters)
+
+    # Renew a third with their keys (replaces the deadline, keeps the key)
+    for name in names[: N_LEASES // 3]:
+        deadlines[name] += 7200
+        assert table.open(name, until=deadlines[name], key=keys[name]).key == keys[name]
+
+    # Close another third
+    closed = set(names[N_LEASES // 3: 2 * N_LEASES // 3])
+    for name in closed:
+        assert table.close(name, keys[name])
+    for name in beaters:
+        assert table.close(name, beat_keys[name])
+
+    expected = sorted((n for n in deadlines if n not in closed), key=deadlines.get)
+    expired = []
+    now = time.time()
+    while len(expired) < len(expected):
+        due = table.next_deadline()
+        assert due is not None
+        now = max(now, due)
+        expired += table.expire_due(now)
+    assert expired == expected
+    assert len(table) == 0
+    assert table.next_deadline() is None
+    assert _lock_calls(backend) == ["acquire", "release"]
+    assert table.expired_count == len(expected)
+
+def test_wrong_key_is_refused():
+    table = LeaseTable(WakeLock(FakeBackend()))
+    lease = table.open("render", heartbeat=60)
+    for attempt in (lambda: table.close("render", ""), lambda: table.close("render", "guess"),
+                    lambda: table.beat("render", "guess"), lambda: table.open("render", for_="1h", key="guess")):
+        with pytest.raises(LeaseKeyError):
+            attempt()
+    assert len(table) == 1
+    assert table.beat("render", lease.key)
+    assert table.close("render", lease.key)
+
+def test_snapshot_keeps_keys_for_restore():
+    table = LeaseTable(WakeLock(FakeBackend()))
+    key = table.open("render", for_="1h").key
+    restored = LeaseTable(WakeLock(FakeBackend()))
+    assert restored.restore(table.snapshot()) == 1
+    assert restored.close("render", key)
+    assert "key" not in table.leases()[0].as_dict()
+
+def test_slow_backend_does_not_block_table():
+    backend = FakeBackend(latency_secs=0.5)
+    table = LeaseTable(WakeLock(backend))
+    opener = threading.Thread(target=table.open, args=("slow",), kwargs={"for_": "1h"})
+    opener.start()
+    time.sleep(0.1)                  # opener is now inside backend.acquire()
+    t0 = time.perf_counter()
+    assert [l.name for l in table.leases()] == ["slow"]
+    assert not table.beat("slow")
+    assert time.perf_counter() - t0 < 0.2
+    opener.join()
+    assert table.wake_lock.active
+
+def test_racing_open_and_close_leave_lock_matching_table():
+    backend = FakeBackend(latency_secs=0.001)
+    table = LeaseTable(WakeLock(backend))
+
+    def churn(prefix):
+        for i in range(200):
+            lease = table.open(f"{prefix}-{i}")
+            table.close(lease.name, lease.key)
+
+    threads = [threading.Thread(target=churn, args=(p,)) for p in "abcd"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(table) == 0
+    assert not table.wake_lock.active
+    assert not backend.held
+
+@pytest.fixture
+def server():
+    table = LeaseTable(WakeLock(FakeBackend()))
+    srv = LeaseServer(table, port=0, idle_timeout=0.5)
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    table.stop()
+
+def test_server_requires_key(server):
+    port = server.server_address[1]
+    reply = lease_request("open", port, name="render", **{"for": "1h"})
+    assert reply["ok"] and reply["key"]
+    assert "key" not in reply["lease"]
+    assert not lease_request("close", port, name="render")["ok"]
+    assert not lease_request("close", port, name="render", key="guess")["ok"]
+    assert "key" not in lease_request("list", port)["leases"][0]
+    assert lease_request("close", port, name="render", key=reply["key"]) == {"ok": True, "closed": True}
+
+def test_server_drops_idle_connections(server):
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(json.dumps({"op": "list"}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            assert json.loads(f.readline())["ok"]
+            t0 = time.monotonic()
+            assert f.readline() == b""      # server closed the idle connection
+        assert time.monotonic() - t0 < 3
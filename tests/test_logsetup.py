@@ -0,0 +1,96 @@
+# stay_awake.logsetup: callers never wait on a handler; levels, rotation and the exit flush.
+
+import atexit
+import io
+import logging
+import threading
+import time
+
+import pytest
+
+from stay_awake import logsetup
+
+class _BlockedStream(io.StringIO):
+    """A console whose write() hangs until released (a paused terminal, a full pipe)."""
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, s):
+        self.release.wait()
+        return super().write(s)
+
+@pytest.fixture
+def start(monkeypatch):
+    """start_logging() with the stay_awake logger restored and the listener stopped afterwards."""
+    logger = logging.getLogger(logsetup.LOGGER_NAME)
+    monkeypatch.setattr(logger, "handlers", [])
+    monkeypatch.setattr(logger, "propagate", logger.propagate)
+    monkeypatch.setattr(logger, "level", logger.level)
+    listeners = []
+
+    def _start(*args, stdout=None):
+        monkeypatch.setattr("sys.stdout", stdout if stdout is not None else io.StringIO())
+        listener = logsetup.start_logging(*args)
+        atexit.unregister(listener.stop)
+        listeners.append(listener)
+        return listener
+
+    yield _start
+    for listener in listeners:
+        if listener._thread is not None:
+            listener.stop()
+
+def test_blocked_console_never_blocks_the_caller(start):
+    stream = _BlockedStream()
+    listener = start("INFO", stdout=stream)
+    log = logsetup.get_logger("test")
+    t0 = time.perf_counter()
+    for i in range(1000):
+        log.info("tick %d", i)
+    assert time.perf_counter() - t0 < 1.0       # the writer thread is stuck in write()
+    assert stream.getvalue() == ""
+    stream.release.set()
+    listener.stop()
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "tick 0" and lines[-1] == "tick 999" and len(lines) == 1000
+
+def test_level_filters_before_formatting(start):
+    stream = io.StringIO()
+    listener = start("WARNING", stdout=stream)
+    log = logsetup.get_logger("test")
+
+    class _Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a record below the level")
+
+    log.info("hidden %s", _Exploding())
+    log.warning("shown %s", "once")
+    listener.stop()
+    assert stream.getvalue() == "shown once\n"
+
+def test_log_file_rotates(start, tmp_path, monkeypatch):
+    monkeypatch.setattr(logsetup, "LOG_FILE_MAX_BYTES", 2000)
+    path = tmp_path / "stay_awake.log"
+    listener = start("DEBUG", str(path))
+    log = logsetup.get_logger("test")
+    for i in range(200):
+        log.debug("line %03d %s", i, "x" * 40)
+    listener.stop()
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["stay_awake.log"] + [f"stay_awake.log.{n}" for n in range(1, logsetup.LOG_FILE_BACKUPS + 1)]
+    assert all(p.stat().st_size <= 2000 for p in tmp_path.iterdir())
+    last = path.read_text(encoding="utf-8").splitlines()[-1]
+    assert last.endswith("line 199 " + "x" * 40)
+    assert " DEBUG   [" in last                     # LOG_FILE_FORMAT: time, level, thread
+
+def test_listener_stop_flushes_everything_queued(start, tmp_path):
+    path = tmp_path / "stay_awake.log"
+    stream = io.StringIO()
+    listener = start("INFO", str(path), stdout=stream)
+    log = logsetup.get_logger("test")
+    for i in range(500):
+        log.info("bye %d", i)
+    listener.stop()                                # what the atexit hook runs
+    assert stream.getvalue().count("\n") == 500
+    assert path.read_text(encoding="utf-8").count("\n") == 500
@@ -0,0 +1,134 @@
+# stay_awake.metrics: the Prometheus text format, parsed back; atomic file rewrites.
+
+import os
+import re
+import threading
+
+import pytest
+
+from stay_awake.backends import FakeBackend
+from stay_awake.core import WakeLock
+from stay_awake.metrics import Metric, MetricsExporter, render_prometheus
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(,|$)')
+
+def _unescape(text):
+    return re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), text)
+
+def _parse(text):
+    """Minimal text-format parser: {name: (kind, help)}, [(name, labels, value)]. Strict about shape."""
+    assert text.endswith("\n")
+    families, samples = {}, []
+    for line in text[:-1].split("\n"):
+        if line.startswith("# HELP "):
+            name, help_text = line[len("# HELP "):].split(" ", 1)
+            families[name] = (None, _unescape(help_text))
+        elif line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE "):].split(" ")
+            assert families[name][0] is None            # HELP, then TYPE, once per family
+            families[name] = (kind, families[name][1])
+        else:
+            m = _SAMPLE.match(line)
+            assert m, line
+            name, raw_labels, value = m.groups()
+            labels = {}
+            if raw_labels:
+                pos = 0
+                while pos < len(raw_labels):
+                    lm = _LABEL.match(raw_labels, pos)
+                    assert lm, raw_labels
+                    labels[lm.group(1)] = _unescape(lm.group(2))
+                    pos = lm.end()
+            assert families[name][0] in ("gauge", "counter")
+            samples.append((name, labels, float(value)))
+    return families, samples
+
+def test_render_names_types_and_escaping():
+    text = render_prometheus([
+        Metric("app_lock_active", "gauge", "1 while held.", 1, {"mode": 'say "hi"\\now\nnext'}),
+        Metric("app_lock_active", "gauge", "1 while held.", 0, {"mode": ""}),
+        Metric("app_ticks_total", "counter", "Ticks\nwith a C:\\path.", 42),
+        Metric("app_rss_bytes", "gauge", "Unknown here.", None),
+        Metric("app_cpu_seconds_total", "counter", "CPU.", 1.25),
+    ])
+    families, samples = _parse(text)
+    assert families == {
+        "app_lock_active": ("gauge", "1 while held."),
+        "app_ticks_total": ("counter", "Ticks\nwith a C:\\path."),
+        "app_cpu_seconds_total": ("counter", "CPU."),
+    }
+    assert samples == [
+        ("app_lock_active", {"mode": 'say "hi"\\now\nnext'}, 1.0),
+        ("app_lock_active", {"mode": ""}, 0.0),
+        ("app_ticks_total", {}, 42.0),
+        ("app_cpu_seconds_total", {}, 1.25),
+    ]
+    assert "app_ticks_total 42\n" in text            # integers without a ".0"
+
+class _FakeApp:
+    """The counters Stay_AwakeTrayApp keeps, without Tk: a held FakeBackend lock and some ticks."""
+    def __init__(self):
+        self.wake_lock = WakeLock(FakeBackend(mode="fake"))
+        self.wake_lock.acquire()
+        self.countdown_ticks = 0
+
+    def collect(self):
+        st = self.wake_lock.stats()
+        return [
+            Metric("stay_awake_lock_active", "gauge", "1 while the wake lock is held.", int(st["active"]), {"mode": st["mode"] or ""}),
+            Metric("stay_awake_countdown_ticks_total", "counter", "Countdown display updates.", self.countdown_ticks),
+            Metric("stay_awake_lock_acquire_failures_total", "counter", "Failed acquires.", st["acquire_failures"]),
+        ]
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows refuses to replace a file a reader has open")
+def test_file_is_rewritten_atomically(tmp_path):
+    app = _FakeApp()
+    path = str(tmp_path / "stay_awake.prom")
+    exporter = MetricsExporter(app.collect, file_path=path)
+    exporter.write_file()
+    seen, stop, errors = [], threading.Event(), []
+
+    def _reader():
+        while not stop.is_set():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                families, samples = _parse(text)    # never a half-written file
+                seen.append(samples[1][2])
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=_reader)
+    reader.start()
+    for i in range(1, 301):
+        app.countdown_ticks = i * 1000             # the file size changes as the value grows
+        exporter.write_file()
+    stop.set()
+    reader.join()
+    assert errors == []
+    assert seen and seen == sorted(seen)
+    assert exporter.writes == 301
+    assert os.listdir(tmp_path) == ["stay_awake.prom"]     # no temp file left behind
+    families, samples = _parse(open(path, encoding="utf-8").read())
+    assert samples == [
+        ("stay_awake_lock_active", {"mode": "fake"}, 1.0),
+        ("stay_awake_countdown_ticks_total", {}, 300000.0),
+        ("stay_awake_lock_acquire_failures_total", {}, 0.0),
+    ]
+    app.wake_lock.release()
+    exporter.stop()                                        # final write shows the released lock
+    assert _parse(open(path, encoding="utf-8").read())[1][0] == ("stay_awake_lock_active", {"mode": ""}, 0.0)
+
+def test_app_metrics_parse(app):
+    app.wake_lock = WakeLock(FakeBackend(mode="fake"))
+    app.wake_lock.acquire()
+    app.running = True
+    app.countdown_ticks = 7
+    families, samples = _parse(render_prometheus(app._collect_metrics()))
+    assert all(name.startswith(("stay_awake_", "process_")) for name in families)
+    assert all(kind == "counter" for name, (kind, _) in families.items() if name.endswith("_total"))
+    values = {name: (labels, value) for name, labels, value in samples}
+    assert values["stay_awake_lock_active"] == ({"mode": "fake"}, 1.0)
+    assert values["stay_awake_countdown_ticks_total"] == ({}, 7.0)
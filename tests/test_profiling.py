@@ -0,0 +1,53 @@
+# stay_awake.profiling: the profile is switched off on the thread that owns it.
+
+import os
+import queue
+import sys
+import threading
+import time
+
+from stay_awake.profiling import SessionProfiler
+
+def _busy():
+    return sum(i * i for i in range(10000))
+
+def _wait_for(predicate, secs=5.0):
+    limit = time.monotonic() + secs
+    while not predicate() and time.monotonic() < limit:
+        time.sleep(0.01)
+    return predicate()
+
+def test_duration_over_stops_on_owner_thread(tmp_path):
+    path = str(tmp_path / "p.prof")
+    owner_queue = queue.Queue()
+    profiler = SessionProfiler(path, duration_secs=0.1)
+    profiler.run_on_owner = lambda fn: owner_queue.put(fn) or True
+    profiler.start()
+    _busy()
+    owner_queue.get(timeout=5)()         # the "Tk loop" runs the queued stop()
+    assert os.path.exists(path) and os.path.exists(profiler.summary_path)
+    assert sys.getprofile() is None      # this thread's profiler is really off
+    assert not profiler.stop()           # once only
+
+def test_stop_elsewhere_is_deferred_before_312(tmp_path):
+    path = str(tmp_path / "p.prof")
+    profiler = SessionProfiler(path, duration_secs=0.1)
+    profiler.start()
+    try:
+        if sys.version_info < (3, 12):
+            # No run_on_owner: nothing written from the timer thread...
+            time.sleep(0.3)
+            assert not os.path.exists(path)
+            result = []
+            t = threading.Thread(target=lambda: result.append(profiler.stop()))
+            t.start()
+            t.join()
+            assert result == [False]
+        else:
+            assert _wait_for(lambda: os.path.exists(profiler.summary_path))
+    finally:
+        profiler.stop()                  # ...the atexit path on the owner thread writes them
+    assert os.path.exists(path)
+    assert sys.getprofile() is None
+    with open(profiler.summary_path, encoding="utf-8") as f:
+        assert "profiled:" in f.readline()
@@ -0,0 +1,102 @@
+# stay_awake.renditions.RenditionCache: round trip, damaged files, eviction, unmapping.
+
+import io
+import os
+import time
+
+import pytest
+
+from stay_awake.renditions import RENDITION_CACHE_MAGIC, RenditionCache, content_digest, file_digest
+
+IMAGES = {"window": ("RGBA", (2, 2), bytes(range(16))), "tray-16": ("L", (3, 1), b"abc")}
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenditionCache(str(tmp_path / "rc"))
+
+def _pixels(entry):
+    return {name: (mode, size, bytes(view)) for name, (mode, size, view) in entry.items()}
+
+def _age(cache, key, secs):
+    t = time.time() - secs
+    os.utime(cache._path(key), (t, t))
+
+def test_round_trip(cache):
+    assert cache.load("k") is None and cache.misses == 1
+    assert cache.save("k", IMAGES)
+    assert _pixels(cache.load("k")) == IMAGES
+    assert cache.hits == 1
+    assert os.listdir(cache.directory) == ["k.rc"]       # no temp file left behind
+
+def test_hit_refreshes_the_age(cache):
+    cache.save("k", IMAGES)
+    _age(cache, "k", 3600)
+    cache.load("k")
+    assert time.time() - os.path.getmtime(cache._path("k")) < 60
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"X" + data[1:],                                  # bad magic
+    lambda data: data[:-1],                                        # truncated pixels
+    lambda data: data[:len(RENDITION_CACHE_MAGIC) + 2],            # truncated header length
+    lambda data: data.replace(b'"key": "k"', b'"key": "j"'),       # someone else's entry
+    lambda data: b"",
+])
+def test_damaged_file_is_a_miss_and_removed(cache, damage):
+    cache.save("k", IMAGES)
+    path = cache._path("k")
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(damage(data))
+    assert cache.load("k") is None
+    assert cache.misses == 1 and cache._maps == []
+    assert not os.path.exists(path) or os.path.getsize(path) == 0
+
+def test_evict_by_age(cache):
+    for key in ("old", "new"):
+        cache.save(key, IMAGES)
+    _age(cache, "old", cache.max_age_secs + 60)
+    assert cache.evict() == 1
+    assert os.listdir(cache.directory) == ["new.rc"]
+
+def test_evict_oldest_first_while_over_size(cache):
+    for n, key in enumerate(("a", "b", "c")):
+        cache.save(key, IMAGES)
+        _age(cache, key, 100 - n)                    # a is the least recently used
+    cache.max_bytes = os.path.getsize(cache._path("b")) + os.path.getsize(cache._path("c"))
+    assert cache.evict() == 1
+    assert sorted(os.listdir(cache.directory)) == ["b.rc", "c.rc"]
+    cache.max_bytes = 0
+    assert cache.evict(keep="b") == 1                # never the entry just saved
+    assert os.listdir(cache.directory) == ["b.rc"]
+
+def test_close_unmaps_what_nothing_uses(cache):
+    cache.save("k", IMAGES)
+    entry = cache.load("k")
+    cache.load("k")                                  # a second mapping, not used by anyone
+    assert cache.close() == 1                        # 'entry' still points into the first
+    assert _pixels(entry) == IMAGES
+    del entry
+    assert cache.close() == 0 and cache._maps == []
+    os.remove(cache._path("k"))                      # Windows refuses while it's mapped
+
+def test_file_digest_matches_content_digest(monkeypatch):
+    data = os.urandom(10_000)
+    monkeypatch.setattr("stay_awake.renditions.DIGEST_CHUNK_BYTES", 4096)
+    assert file_digest(io.BytesIO(data)) == content_digest(data)
+
+def test_hot_reload_unmaps_the_old_renditions(sa, tmp_path):
+    icon = tmp_path / "icon.png"
+    sa.Image.new("RGBA", (64, 48), (200, 0, 0, 255)).save(icon)
+    make = lambda: sa.Stay_AwakeTrayApp(show_gui=False, icon_override_path=str(icon),
+                                        rendition_cache=RenditionCache(str(tmp_path / "rc")))
+    first = make()
+    first.create_tray_icon_image()
+    first._build_tray_icon_set()                     # saves the renditions
+    app = make()
+    app.create_tray_icon_image()
+    assert app._renditions_from_cache and len(app.rendition_cache._maps) == 1
+    sa.Image.new("RGBA", (64, 48), (0, 0, 200, 255)).save(icon)
+    app._reload_image_source(str(icon))
+    assert app.rendition_cache._maps == []
+    assert app._tray_icon_image.getpixel((8, 8))[2] == 200
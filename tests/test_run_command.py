@@ -0,0 +1,44 @@
+# --run: where the command line is split, and the child's lifetime is the hold.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+@pytest.mark.parametrize("argv, expected", [
+    (["--for", "1h", "--run", "--", "cmd", "--run"], (["--for", "1h"], ["--", "cmd", "--run"])),
+    (["--run", "cmd", "-x"], ([], ["cmd", "-x"])),
+    (["--", "--run", "cmd"], (["--", "--run", "cmd"], None)),               # after "--": an argument
+    (["--icon=--run", "--no-gui"], (["--icon=--run", "--no-gui"], None)),  # one token
+    (["--icon", "--run", "--", "true"], (["--icon"], ["--", "true"])),     # not a value
+    (["--no-gui", "--run"], (["--no-gui"], [])),
+    (["--no-gui"], (["--no-gui"], None)),
+])
+def test_split_run_argv(sa, argv, expected):
+    assert sa._split_run_argv(argv) == expected
+
+def _stay_awake(sa, tmp_path, *args):
+    # WAKEPY_FAKE_SUCCESS: wakepy's own test switch, "activates" without touching the OS
+    env = dict(os.environ, WAKEPY_FAKE_SUCCESS="1", PYSTRAY_BACKEND="dummy",
+               XDG_STATE_HOME=str(tmp_path), LOCALAPPDATA=str(tmp_path))
+    return subprocess.run([sys.executable, sa.__file__, *args], env=env, capture_output=True, text=True, timeout=60)
+
+@pytest.mark.parametrize("args, message", [
+    (["--icon", "--run", "--", "true"], "argument --icon: expected one argument"),
+    (["--no-gui", "--run"], "--run needs a command"),
+    (["--no-gui", "--run", "--"], "--run needs a command"),
+])
+def test_run_command_line_errors(sa, tmp_path, args, message):
+    proc = _stay_awake(sa, tmp_path, *args)
+    assert proc.returncode == 2
+    assert message in proc.stderr
+
+def test_child_exit_ends_the_hold(sa, tmp_path):
+    proc = _stay_awake(sa, tmp_path, "--no-gui", "--for", "1h", "--run", "--",
+                       sys.executable, "-c", "import sys; sys.exit(3)")
+    output = proc.stdout + proc.stderr
+    assert proc.returncode == 3                 # long before the 1h upper bound
+    assert "child exited with code 3" in output
+    assert "All hold conditions cleared" in output
+    assert "Normal power management restored" in output
@@ -0,0 +1,61 @@
+# Tray icon DPI following, driven by FakeDpiSource: a DPI change swaps in the precomputed
+# TRAY_ICON_SIZES rendition and never decodes the source image again.
+
+import pytest
+
+from stay_awake.dpi import TRAY_ICON_SIZES, FakeDpiSource, tray_icon_size
+from stay_awake.renditions import RenditionCache
+
+@pytest.mark.parametrize("dpi, size", [(None, 16), (96, 16), (120, 20), (144, 24), (168, 32), (192, 32),
+                                       (240, 40), (288, 48), (336, 64), (384, 64), (480, 64)])
+def test_tray_icon_size(dpi, size):
+    assert tray_icon_size(dpi) == size
+    assert size in TRAY_ICON_SIZES
+
+class _Icon:
+    icon = None
+
+@pytest.fixture
+def dpi_app(sa, tmp_path, monkeypatch):
+    source = FakeDpiSource(96)
+    app = sa.Stay_AwakeTrayApp(show_gui=False, dpi_source=source, rendition_cache=RenditionCache(str(tmp_path / "rc")))
+    app.icon = _Icon()
+    opens = []
+    real_open = sa.Image.open
+    monkeypatch.setattr(sa.Image, "open", lambda *a, **kw: opens.append(a) or real_open(*a, **kw))
+    return app, source, opens
+
+def _follow(app, source, steps):
+    source.start(app._on_dpi_change)
+    for dpi in steps:
+        source.set_dpi(dpi)
+        size = tray_icon_size(dpi)
+        assert app._tray_icon_image.size == (size, size), dpi
+        assert app._tray_icon_image is app._tray_icons[size]
+        assert app.icon.icon is app._tray_icon_image
+
+def test_dpi_change_picks_prebuilt_rendition(dpi_app):
+    app, source, opens = dpi_app
+    assert app.create_tray_icon_image().size == (16, 16)
+    assert len(opens) == 1
+    app._build_tray_icon_set()             # what the background thread does after the tray is up
+    prebuilt = dict(app._tray_icons)
+    assert sorted(prebuilt) == sorted(TRAY_ICON_SIZES)
+    _follow(app, source, (120, 144, 192, 240, 288, 384, 480, 96, 144))
+    assert all(app._tray_icons[s] is prebuilt[s] for s in TRAY_ICON_SIZES)
+    assert len(opens) == 1                 # one decode, at startup
+
+def test_dpi_change_before_icon_set_reuses_decoded_source(dpi_app):
+    app, source, opens = dpi_app
+    app.create_tray_icon_image()
+    _follow(app, source, (192, 120, 384))
+    assert len(opens) == 1
+
+def test_same_rendition_does_not_touch_tray(dpi_app):
+    app, source, _opens = dpi_app
+    app.create_tray_icon_image()
+    source.start(app._on_dpi_change)
+    source.set_dpi(384)
+    shown = app.icon.icon = object()
+    source.set_dpi(480)                    # also the 64px rendition
+    assert app.icon.icon is shown
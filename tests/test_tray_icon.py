@@ -0,0 +1,46 @@
+# Tray icon pixels: _square_icon_image()'s separable-pass shortcut must match the plain
+# pad-to-square + resize it replaces, pixel for pixel.
+
+import random
+
+import pytest
+
+from stay_awake.dpi import TRAY_ICON_SIZES
+
+def _source(Image, w, h, mode, rng):
+    noise = Image.effect_noise((w, h), 60).convert("L")
+    im = Image.merge("RGB", (noise, noise.transpose(Image.FLIP_TOP_BOTTOM), noise.transpose(Image.FLIP_LEFT_RIGHT)))
+    if mode == "RGBA-partial":
+        im = im.convert("RGBA")
+        im.putalpha(Image.linear_gradient("L").resize((w, h)))
+        return im
+    if mode == "RGBA-holes":
+        im = im.convert("RGBA")
+        im.putalpha(noise.point(lambda v: 0 if v < 100 else 255))
+        return im
+    return im.convert(mode)
+
+def _reference(app, im, px):
+    return app._resize_keep_aspect(app._pad_to_square_edge_stretch(im), px)
+
+MODES = ("RGB", "RGBA", "RGBA-partial", "RGBA-holes", "L", "P", "LA", "1", "CMYK")
+
+def test_square_icon_matches_pad_then_resize_random_landscapes(sa, app):
+    rng = random.Random(42)
+    for _ in range(60):
+        h = rng.randint(1, 700)
+        w = rng.randint(h + 1, 1400)
+        mode = rng.choice(MODES)
+        px = rng.choice(TRAY_ICON_SIZES + (rng.randint(1, 300),))
+        im = _source(sa.Image, w, h, mode, rng)
+        out, ref = app._square_icon_image(im, px), _reference(app, im, px)
+        assert (out.mode, out.size) == (ref.mode, ref.size), (w, h, mode, px)
+        assert out.tobytes() == ref.tobytes(), (w, h, mode, px)
+
+@pytest.mark.parametrize("w, h", [(1024, 857), (513, 512), (65, 64), (3, 2), (100, 1), (64, 40), (1, 100), (171, 256), (40, 40)])
+def test_square_icon_matches_edge_cases(sa, app, w, h):
+    rng = random.Random(w * 1000 + h)
+    for mode in ("RGB", "RGBA-partial"):
+        im = _source(sa.Image, w, h, mode, rng)
+        for px in TRAY_ICON_SIZES:
+            assert app._square_icon_image(im, px).tobytes() == _reference(app, im, px).tobytes(), (w, h, mode, px)
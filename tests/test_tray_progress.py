@@ -0,0 +1,91 @@
+# --tray-progress on a fake clock: one composition and one Tk wakeup per ring step, each
+# scheduled for exactly its step boundary; within a step the composed icon is reused.
+
+import time
+
+import pytest
+
+class _Clock:
+    """time.monotonic() under test control; everything else is the real time module."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+class _Window:
+    """The Tk root as _schedule_tray_progress() uses it: after() timers on the fake clock."""
+    def __init__(self, clock):
+        self.clock = clock
+        self.timers = []
+
+    def after(self, ms, fn):
+        self.timers.append((self.clock.now + ms / 1000, fn))
+        return len(self.timers)
+
+    def winfo_exists(self):
+        return True
+
+    def run_next(self):
+        """Advance the clock to the next timer and run it; False when none is pending."""
+        if not self.timers:
+            return False
+        due, fn = min(self.timers, key=lambda t: t[0])
+        self.timers.remove((due, fn))
+        self.clock.now = max(self.clock.now, due)
+        fn()
+        return True
+
+class _Icon:
+    icon = None
+
+@pytest.fixture
+def progress_app(sa, app, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sa, "time", clock)
+    app.tray_progress = True
+    app.auto_quit_deadline = clock.now + 3600
+    app._auto_quit_total_secs = 3600
+    app.main_window = _Window(clock)
+    app.icon = _Icon()
+    app._tray_icon_image = app.create_tray_icon_image()
+    return app, clock
+
+def test_one_composition_per_step_at_each_boundary(sa, progress_app):
+    app, clock = progress_app
+    start = clock.now
+    steps, icons = [], []
+    app.main_window.after(0, app._schedule_tray_progress)
+    while app.main_window.run_next():
+        steps.append(app._tray_progress_step())
+        icons.append(app.icon.icon)
+        assert (clock.now - start) * sa.TRAY_PROGRESS_STEPS / 3600 - steps[-1] < 0.001   # no later than its boundary
+    assert steps == list(range(sa.TRAY_PROGRESS_STEPS))
+    assert app.tray_progress_ticks == app.tray_progress_updates == sa.TRAY_PROGRESS_STEPS
+    assert len({id(icon) for icon in icons}) == sa.TRAY_PROGRESS_STEPS
+    assert clock.now < app.auto_quit_deadline                 # nothing scheduled at the deadline
+
+def test_same_step_reuses_the_composed_icon(sa, progress_app):
+    app, clock = progress_app
+    base = app._tray_icon_image
+    first = app._tray_icon_shown(base)
+    clock.now += 3600 / sa.TRAY_PROGRESS_STEPS * 0.9            # still step 0
+    assert app._tray_icon_shown(base) is first
+    assert app.tray_progress_updates == 1
+    clock.now += 3600 / sa.TRAY_PROGRESS_STEPS * 0.2            # step 1
+    second = app._tray_icon_shown(base)
+    assert second is not first and app.tray_progress_updates == 2
+    other = base.copy()                                      # a new rendition (DPI change, reload)
+    assert app._tray_icon_shown(other) is not second
+    assert app.tray_progress_updates == 3
+
+def test_no_ring_without_a_deadline(progress_app):
+    app, _clock = progress_app
+    app.auto_quit_deadline = None
+    base = app._tray_icon_image
+    assert app._tray_icon_shown(base) is base
+    app._schedule_tray_progress()
+    assert app.main_window.timers == [] and app.tray_progress_updates == 0
@@ -0,0 +1,98 @@
+# stay_awake.watchdog: lost-lock recovery and shutdown (FakeBackend, and real wakepy over a fake session).
+
+import pytest
+
+from stay_awake.backends import FakeBackend, ScriptedFailureBackend, WakepyBackend
+from stay_awake.core import WakeLock
+from stay_awake.watchdog import WakeLockWatchdog
+
+def test_watchdog_reacquires_dropped_lock():
+    backend = FakeBackend()
+    lock = WakeLock(backend)
+    lock.acquire()
+    states = []
+    dog = WakeLockWatchdog(lock, on_state=lambda state, detail: states.append(state))
+    assert dog.check_once() is None
+    backend.drop()
+    assert dog.check_once() is None
+    assert backend.held
+    assert states == ["lost", "ok"]
+    assert dog.reacquires == 1
+
+def test_watchdog_backs_off_while_reacquire_fails():
+    backend = ScriptedFailureBackend(acquire_script=[True, False, False])
+    lock = WakeLock(backend)
+    lock.acquire()
+    dog = WakeLockWatchdog(lock, backoff_min_secs=5, backoff_max_secs=300)
+    backend.drop()
+    assert dog.check_once() == 5
+    assert dog.check_once() == 10
+    assert dog.check_once() is None
+    assert dog.state == "ok"
+
+def test_watchdog_leaves_closed_lock_alone():
+    backend = FakeBackend()
+    lock = WakeLock(backend)
+    lock.acquire()
+    states = []
+    dog = WakeLockWatchdog(lock, on_state=lambda state, detail: states.append(state))
+    lock.close()
+    assert dog.check_once() is None
+    assert not backend.held
+    assert states == []
+
+# -------------------- real wakepy, inhibitor dropped by the session --------------------
+
+class _Session:
+    """Stands in for a session manager: hands out inhibitor cookies, and can forget them."""
+    def __init__(self):
+        self.cookies = set()
+        self._next = 0
+
+    def inhibit(self) -> int:
+        self._next += 1
+        self.cookies.add(self._next)
+        return self._next
+
+    def listed(self):
+        return set(self.cookies)
+
+_SESSION_METHOD = "stay-awake-test-session"
+_session = _Session()
+
+@pytest.fixture
+def session():
+    """A fresh _Session behind a wakepy keep.running method (registered once per run)."""
+    wakepy = pytest.importorskip("wakepy")
+    if not any(m.name == _SESSION_METHOD for m in wakepy.core.registry.get_methods_for_mode("keep.running")):
+        class _SessionMethod(wakepy.Method):
+            name = _SESSION_METHOD
+            mode_name = "keep.running"
+            supported_platforms = (wakepy.core.PlatformType.ANY,)
+
+            def enter_mode(self):
+                self.cookie = _session.inhibit()
+
+            def exit_mode(self):
+                _session.cookies.discard(self.cookie)   # like Uninhibit of a cookie the session already forgot
+    _session.__init__()
+    return _session
+
+def test_wakepy_backend_detects_session_dropping_our_inhibitor(session):
+    backend = WakepyBackend(inhibitor_source=session.listed, methods=[_SESSION_METHOD])
+    lock = WakeLock(backend)
+    lock.acquire()
+    assert lock.mode == _SESSION_METHOD
+    session.inhibit()                       # another app's inhibitor stays up throughout
+    states = []
+    dog = WakeLockWatchdog(lock, on_state=lambda state, detail: states.append(state))
+    assert dog.check_once() is None and states == []
+    (ours,) = backend._ours
+    session.cookies.discard(ours)           # e.g. the session manager restarted
+    assert not backend.verify()             # wakepy itself still says "active"
+    assert dog.check_once() is None
+    assert states == ["lost", "ok"]
+    assert dog.reacquires == 1
+    assert backend._ours and backend._ours <= session.cookies
+    lock.release()
+    assert len(session.cookies) == 1        # only the other app's
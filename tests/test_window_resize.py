@@ -0,0 +1,120 @@
+# Window image following the window size: a scripted drag replays <Configure> events on a
+# virtual-clock stand-in for the Tk root and counts the LANCZOS resamples (image_resamples).
+
+import heapq
+import itertools
+
+import pytest
+
+CHROME_H = 210            # window height that isn't the image (blurb, buttons, padding)
+
+class _Photo:
+    def __init__(self, im):
+        self._size = im.size
+
+    def width(self):
+        return self._size[0]
+
+    def height(self):
+        return self._size[1]
+
+class _Label:
+    def __init__(self):
+        self.image = None
+
+    def configure(self, image):
+        self.image = image
+
+class _Root:
+    """Just enough of tk.Tk for the resize path: after()/after_cancel() on a virtual clock, and a size."""
+    def __init__(self, app, w, h):
+        self.app = app
+        self.now = 0
+        self.w, self.h = w, h
+        self._queue = []
+        self._ids = itertools.count()
+        self._cancelled = set()
+
+    def after(self, ms, fn):
+        after_id = next(self._ids)
+        heapq.heappush(self._queue, (self.now + ms, after_id, fn))
+        return after_id
+
+    def after_cancel(self, after_id):
+        self._cancelled.add(after_id)
+
+    def run_until(self, t):
+        while self._queue and self._queue[0][0] <= t:
+            when, after_id, fn = heapq.heappop(self._queue)
+            self.now = when
+            if after_id not in self._cancelled:
+                fn()
+        self.now = t
+
+    def winfo_ismapped(self):
+        return True
+
+    def winfo_width(self):
+        return self.w
+
+    def winfo_height(self):
+        return self.h
+
+    def winfo_reqheight(self):
+        return self.app._cached_photo_main.height() + CHROME_H
+
+class _Event:
+    def __init__(self, widget):
+        self.widget = widget
+
+@pytest.fixture
+def window(app, sa, monkeypatch):
+    monkeypatch.setattr(sa.ImageTk, "PhotoImage", _Photo)
+    full = _Photo(app._window_rendition())
+    root = app.main_window = _Root(app, full.width() + 2 * sa.WINDOW_PADDING_PX, full.height() + CHROME_H)
+    # As create_main_window() leaves it
+    app._image_label = _Label()
+    app._cached_photo_main = full
+    app._window_image_full = (full.width(), full.height())
+    app._window_photo_side = max(app._window_image_full)
+    app._window_photos[app._window_photo_side] = full
+    fits = []
+    real_fit = app._fit_window_image
+    monkeypatch.setattr(app, "_fit_window_image", lambda: (real_fit(), fits.append(app._window_photo_side)))
+    return app, root, fits
+
+def _drag(app, root, to_w, to_h, steps, frame_ms=16):
+    """Drag the window edge to (to_w, to_h) at 60 Hz, then let go."""
+    from_w, from_h = root.w, root.h
+    for k in range(1, steps + 1):
+        root.run_until(root.now + frame_ms)
+        root.w = round(from_w + (to_w - from_w) * k / steps)
+        root.h = round(from_h + (to_h - from_h) * k / steps)
+        app._on_window_configure(_Event(root))
+    root.run_until(root.now + 500)
+
+def test_scripted_drag_resamples_once_per_new_size(window):
+    app, root, fits = window
+    assert app._window_image_full == (512, 428)
+    _drag(app, root, 250, 400, 120)            # shrink: fits 192
+    _drag(app, root, 544, 638, 120)            # back to full size: the original photo
+    _drag(app, root, 400, 520, 60)             # 352
+    for _ in range(3):
+        _drag(app, root, 330, 470, 30)         # 288
+        _drag(app, root, 400, 520, 30)         # 352 again
+    assert fits == [192, 512, 352, 288, 352, 288, 352, 288, 352]   # one fit per pause, none mid-drag
+    assert app.image_resamples == 3            # 192, 352, 288: everything else from the LRU
+    assert app._image_label.image is app._cached_photo_main
+    assert app._cached_photo_main.width() == 352
+
+def test_lru_keeps_full_size_and_shown_photo(sa, window):
+    app, root, fits = window
+    widths = [200, 240, 280, 320, 360, 400, 440, 480]
+    for w in widths:
+        _drag(app, root, w, 638, 10)
+    assert app.image_resamples == len(widths)
+    assert len(app._window_photos) == sa.WINDOW_IMAGE_LRU_SIZE
+    assert 512 in app._window_photos and app._window_photo_side in app._window_photos
+    _drag(app, root, 544, 638, 10)             # full size: never evicted, no resample
+    assert app.image_resamples == len(widths)
+    assert app._window_photo_side == 512